@@ -4,4 +4,8 @@ pip install -r requirements.txt --break-system-packages
 
 # Collect static files only — NO database operations during build
 # Database operations (migrate, seed) happen at runtime via Vercel
-python manage.py collectstatic --noinput
\ No newline at end of file
+python manage.py collectstatic --noinput
+
+# Precompressed full-tour bundle in staticfiles/tour/ (only reads the
+# database; skipped when it is not reachable from the build)
+python manage.py build_tour_bundle --skip-unavailable
\ No newline at end of file
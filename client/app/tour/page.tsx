@@ -14,7 +14,7 @@ export default function TourIndexPage() {
                 // Fetch featured scene to start the tour
                 const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
                 console.log("Fetching featured scene from:", apiUrl); // DEBUG LOG
-                const res = await fetch(`${apiUrl}/api/scenes/featured/`);
+                const res = await fetch(`${apiUrl}/api/scenes/featured/?neighbors=1`);
                 if (res.ok) {
                     const data = await res.json();
                     setStartScene(data);
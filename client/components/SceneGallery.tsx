@@ -5,7 +5,8 @@ import { Scene } from "@/types/scene";
 async function getScenes(): Promise<Scene[]> {
     // Use env var for API URL, fallback to localhost for dev
     const apiUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
-    const res = await fetch(`${apiUrl}/api/scenes/`, { cache: 'no-store' });
+    // 'no-cache' revalidates with ETag (304 when nothing changed) instead of re-downloading
+    const res = await fetch(`${apiUrl}/api/scenes/`, { cache: 'no-cache' });
 
     if (!res.ok) {
         throw new Error('Failed to fetch scenes');
@@ -6,6 +6,7 @@ import { MarkersPlugin } from '@photo-sphere-viewer/markers-plugin';
 import '@photo-sphere-viewer/core/index.css';
 import '@photo-sphere-viewer/markers-plugin/index.css';
 import { Scene } from '@/types/scene';
+import { fetchTour } from '@/lib/compact';
 
 interface PSViewerProps {
     initialData: Scene;
@@ -41,9 +42,11 @@ const PSViewer = ({ initialData }: PSViewerProps) => {
         const fetchScenes = async () => {
             const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
             try {
-                const res = await fetch(`${baseUrl}/api/scenes/`);
-                if (res.ok) {
-                    const data = await res.json();
+                // Only what the scene switcher shows, in the compact format
+                const { data } = await fetchTour<Scene[]>(
+                    `${baseUrl}/api/scenes/?fields=id,slug,title,thumbnail,building,floor`
+                );
+                if (data) {
                     setSceneList(data);
                 }
             } catch (error) {
@@ -105,6 +108,16 @@ const PSViewer = ({ initialData }: PSViewerProps) => {
         return url;
     };
 
+    // Warm the browser cache with the panoramas the visitor is likely to open next
+    const warmNeighbors = (scene: Scene) => {
+        (scene.neighbors || []).slice(0, 2).forEach(neighbor => {
+            if (neighbor.panorama) {
+                const img = new Image();
+                img.src = getProxyUrl(neighbor.panorama);
+            }
+        });
+    };
+
     // Load Scene Function (Internal Navigation)
     const loadScene = async (slug: string) => {
         if (isTransitioning || slug === currentScene.slug) return;
@@ -114,7 +127,7 @@ const PSViewer = ({ initialData }: PSViewerProps) => {
         const baseUrl = process.env.NEXT_PUBLIC_API_URL || 'http://127.0.0.1:8000';
 
         try {
-            const res = await fetch(`${baseUrl}/api/scenes/${slug}/`);
+            const res = await fetch(`${baseUrl}/api/scenes/${slug}/?neighbors=1`);
             if (!res.ok) throw new Error("Scene load failed");
             const newSceneData: Scene = await res.json();
 
@@ -137,6 +150,7 @@ const PSViewer = ({ initialData }: PSViewerProps) => {
                 });
 
                 setCurrentScene(newSceneData);
+                warmNeighbors(newSceneData);
                 // window.history.pushState({}, '', `/tour/${slug}`); // SPA Mode: Disable URL updates
             }
         } catch (error) {
@@ -186,6 +200,7 @@ const PSViewer = ({ initialData }: PSViewerProps) => {
         // DEBUGGING EVENTS
         viewer.addEventListener('ready', () => {
             console.log("PSV Ready");
+            warmNeighbors(initialData);
 
             // Trigger Little Planet Animation
             if (initialData.is_featured) {
@@ -0,0 +1,77 @@
+// Decoder for the compact API format (docs/API_COMPACT_FORMAT.md)
+
+export const COMPACT_MEDIA_TYPE = 'application/vnd.unutour.compact+json';
+
+type Json = null | boolean | number | string | Json[] | { [key: string]: Json };
+type Column = Json[] | { $s: (number | null)[] } | { rows: number[]; v: Column };
+
+interface CompactDocument {
+    $compact: number;
+    strings: string[];
+    data: Json;
+}
+
+export function decodeCompact<T = unknown>(document: CompactDocument): T {
+    if (document.$compact !== 1) {
+        throw new Error(`Unknown compact format version: ${document.$compact}`);
+    }
+    const { strings } = document;
+
+    // Values per row; sparse columns only set the rows listed
+    const column = (encoded: Column): Map<number, Json> => {
+        const values = new Map<number, Json>();
+        if (Array.isArray(encoded)) {
+            encoded.forEach((item, index) => values.set(index, value(item)));
+        } else if ('$s' in encoded) {
+            encoded.$s.forEach((index, row) => values.set(row, index === null ? null : strings[index]));
+        } else {
+            const present = column(encoded.v);
+            encoded.rows.forEach((row, index) => values.set(row, present.get(index) as Json));
+        }
+        return values;
+    };
+
+    const rows = (table: { [key: string]: Json }): { [key: string]: Json }[] => {
+        const n = table.n as number;
+        const result = Array.from({ length: n }, () => ({} as { [key: string]: Json }));
+        (table.cols as string[]).forEach((name, index) => {
+            column((table.data as Json[])[index] as Column).forEach((item, row) => {
+                result[row][name] = item;
+            });
+        });
+        return result;
+    };
+
+    const value = (encoded: Json): Json => {
+        if (Array.isArray(encoded)) return encoded.map(value);
+        if (encoded === null || typeof encoded !== 'object') return encoded;
+        switch (encoded.$t) {
+            case 'rows':
+                return rows(encoded);
+            case 'map': {
+                const keys = column(encoded.keys as Column);
+                const items = rows(encoded);
+                return Object.fromEntries(items.map((item, index) => [keys.get(index) as string, item]));
+            }
+            case 'obj':
+                return Object.fromEntries(
+                    Object.entries(encoded.v as { [key: string]: Json }).map(([key, item]) => [key, value(item)])
+                );
+            default:
+                return Object.fromEntries(Object.entries(encoded).map(([key, item]) => [key, value(item)]));
+        }
+    };
+
+    return value(document.data) as T;
+}
+
+// fetch() asking for the compact format; falls back to plain JSON responses
+export async function fetchTour<T = unknown>(url: string, init: RequestInit = {}): Promise<{ res: Response; data: T | null }> {
+    const headers = new Headers(init.headers);
+    headers.set('Accept', COMPACT_MEDIA_TYPE);
+    const res = await fetch(url, { ...init, headers });
+    if (!res.ok) return { res, data: null };
+    const body = await res.json();
+    const compact = (res.headers.get('Content-Type') || '').startsWith(COMPACT_MEDIA_TYPE);
+    return { res, data: compact ? decodeCompact<T>(body) : (body as T) };
+}
@@ -11,6 +11,32 @@ export interface Hotspot {
     yaw: number;
 }
 
+export interface MultiRes {
+    basePath: string;
+    path: string;
+    extension: string;
+    tileResolution: number;
+    maxLevel: number;
+    cubeResolution: number;
+}
+
+// {format: {"320w": url, ...}}
+export type SrcsetMap = Record<string, Record<string, string>>;
+
+// Scene reachable from a navigation hotspot (?neighbors=1)
+export interface SceneNeighbor {
+    slug: string;
+    title: string;
+    panorama: string | null;
+    panorama_srcset: SrcsetMap;
+    dominant_color: string;
+    blurhash: string;
+    lqip: string;
+    initial_pitch: number;
+    initial_yaw: number;
+    initial_fov: number;
+}
+
 export interface Scene {
     id: number;
     slug: string;
@@ -24,13 +50,25 @@ export interface Scene {
     published_date: string;
     author?: string;
     panorama_image?: string; // URL
+    panorama_srcset?: SrcsetMap;
+    panorama_width?: number | null;
+    panorama_height?: number | null;
+    panorama_size?: number | null; // bytes
+    panorama_format?: string;
+    panorama_sha256?: string;
     thumbnail?: string;      // URL
+    thumbnail_srcset?: SrcsetMap;
     initial_pitch?: number;
     initial_yaw?: number;
     initial_fov?: number;
+    multires?: MultiRes | null;
     is_featured: boolean;
+    dominant_color?: string; // #rrggbb
+    blurhash?: string;
+    lqip?: string;           // data URI
     hotspots?: Hotspot[];
     created_at?: string;
+    neighbors?: SceneNeighbor[];
 }
 
 export interface GroupedScenes {
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark memori pemrosesan panorama (peak RSS per ukuran gambar)
+
+Setiap ukuran diproses di subprocess terpisah (placeholder, derivatives,
+thumbnail dan tile pyramid, sama seperti media worker) sehingga peak RSS yang
+dilaporkan adalah milik satu job saja. Gunakan hasilnya untuk menentukan
+TOUR_MEDIA_MEMORY_LIMIT dan ukuran worker.
+
+Usage:
+    python scripts/benchmark_media_memory.py
+    python scripts/benchmark_media_memory.py --sizes 8192 16384 --limit 512
+    python scripts/benchmark_media_memory.py --sizes 8192 --limit 256 --format png
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+MB = 1024 * 1024
+
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / MB if sys.platform == 'darwin' else peak / 1024
+
+
+def generate(path, width, image_format='jpeg'):
+    """Write a width x width/2 test panorama without holding it in memory twice."""
+    import numpy as np
+    from PIL import Image
+
+    height = width // 2
+    image = Image.new('RGB', (width, height))
+    x = np.linspace(0, 255, width, dtype=np.uint8)
+    for top in range(0, height, 512):
+        rows = min(512, height - top)
+        y = np.linspace(top, top + rows, rows, dtype=np.float32) * 255 / height
+        strip = np.empty((rows, width, 3), dtype=np.uint8)
+        strip[..., 0] = x
+        strip[..., 1] = y.astype(np.uint8)[:, None]
+        # Some texture so JPEG sizes look like real photos
+        strip[..., 2] = np.random.randint(0, 255, (rows, width), dtype=np.uint8)
+        image.paste(Image.fromarray(strip), (0, top))
+    image.save(path, image_format.upper(), **({'quality': 85} if image_format != 'png' else {}))
+
+
+def measure(path, limit_mb):
+    """Run the panorama pipeline on ``path`` and print a JSON result line."""
+    import django
+    from django.conf import settings
+
+    media_root = tempfile.mkdtemp(prefix='bench-media-')
+    settings.configure(
+        MEDIA_ROOT=media_root,
+        MEDIA_URL='/media/',
+        TOUR_MEDIA_MEMORY_LIMIT=limit_mb * MB,
+        TOUR_TILE_SIZE=512,
+        TOUR_DERIVATIVE_FORMATS=['webp', 'jpeg'],
+    )
+    django.setup()
+
+    from django.core.files import File
+    from PIL import Image
+    from tour_api.imaging import render_panorama
+
+    Image.MAX_IMAGE_PIXELS = None
+    baseline = peak_rss_mb()
+    started = time.monotonic()
+    with open(path, 'rb') as file:
+        fields, ladder, _ = render_panorama(
+            File(file, name=path), 'tiles/bench', 'derivatives/bench', with_thumbnail=True
+        )
+    print(json.dumps({
+        'seconds': round(time.monotonic() - started, 1),
+        'baseline_mb': round(baseline),
+        'peak_mb': round(peak_rss_mb()),
+        'cube_resolution': fields['cube_resolution'],
+        'max_level': fields['tile_max_level'],
+        'largest_derivative': max(int(width) for width in ladder['jpeg']),
+    }))
+
+
+def run_child(*args):
+    result = subprocess.run(
+        [sys.executable, __file__, *args], capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[4096, 8192, 16384],
+                        help='Panorama widths to test (height = width / 2)')
+    parser.add_argument('--limit', type=int, default=768,
+                        help='TOUR_MEDIA_MEMORY_LIMIT in MB (0 = unlimited)')
+    parser.add_argument('--format', choices=['jpeg', 'png', 'webp'], default='jpeg',
+                        help='Test image format (non-JPEG must fit the limit at full size)')
+    parser.add_argument('--generate', nargs=2, metavar=('PATH', 'WIDTH'), help=argparse.SUPPRESS)
+    parser.add_argument('--measure', metavar='PATH', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.generate:
+        generate(args.generate[0], int(args.generate[1]), args.format)
+        return
+    if args.measure:
+        measure(args.measure, args.limit)
+        return
+
+    print(f"Memory limit: {args.limit or 'unlimited'} MB, format: {args.format}")
+    print(f"{'Size':>13} {'File':>8} {'Baseline':>9} {'Peak RSS':>9} {'Time':>7} {'Cube':>6} {'Levels':>6} {'Max deriv':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for width in args.sizes:
+            path = os.path.join(workdir, f'pano-{width}.{args.format}')
+            run_child('--generate', path, str(width), '--format', args.format)
+            label = f"{width}x{width // 2}"
+            file_mb = os.path.getsize(path) / MB
+            try:
+                result = json.loads(run_child('--measure', path, '--limit', str(args.limit)))
+            except RuntimeError as exc:
+                print(f"{label:>13} {file_mb:>6.1f}MB  ✗ {exc}")
+                continue
+            print(
+                f"{label:>13} {file_mb:>6.1f}MB {result['baseline_mb']:>7}MB {result['peak_mb']:>7}MB {result['seconds']:>6}s "
+                f"{result['cube_resolution']:>6} {result['max_level']:>6} {result['largest_derivative']:>9}"
+            )
+            os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
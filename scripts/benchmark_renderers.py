@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Benchmark JSONRenderer DRF vs TourJSONRenderer (orjson) vs MessagePack
+
+Memakai data tour dummy yang sama dengan benchmark_serializers.py (database
+SQLite in-memory), lalu mengukur waktu render list scene, semua detail dan
+config Pannellum dengan kedua renderer JSON serta memastikan bytes-nya
+identik. Bila msgpack terpasang, output MessagePackRenderer juga diukur dan
+di-unpack kembali untuk dicek sama dengan hasil parse JSON-nya.
+
+Usage:
+    python scripts/benchmark_renderers.py
+    python scripts/benchmark_renderers.py --sizes 100 1000 10000 --repeat 5
+"""
+
+import argparse
+import json
+
+from benchmark_serializers import populate, setup, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Prefetch
+    from rest_framework.renderers import JSONRenderer
+    from tour_api import fastpath, renderers
+    from tour_api.models import Hotspot, Scene
+    from tour_api.serializers import SceneDetailSerializer
+
+    if renderers.orjson is None:
+        print("orjson is not installed: TourJSONRenderer falls back to the stdlib encoder")
+    if renderers.msgpack is None:
+        print("msgpack is not installed: MessagePack columns are skipped")
+    drf, tour, packer = JSONRenderer(), renderers.TourJSONRenderer(), renderers.MessagePackRenderer()
+
+    print(f"{'Scenes':>7} {'Payload':>10} {'Size':>9} {'DRF':>10} {'Tour':>10} {'Speedup':>8}  Identical"
+          f" {'MsgPack':>9} {'Pack':>10}  Round-trip")
+    for count in args.sizes:
+        populate(count)
+        scenes = Scene.objects.filter(is_active=True)
+        payloads = {
+            'list': fastpath.scene_list(scenes),
+            'details': SceneDetailSerializer(
+                scenes.prefetch_related(Prefetch('hotspots', queryset=Hotspot.objects.select_related('to_scene'))),
+                many=True,
+                context={'request': None},
+            ).data,
+            'pannellum': fastpath.pannellum_config(scenes),
+        }
+        for name, data in payloads.items():
+            slow, slow_ms = timed(lambda: drf.render(data), args.repeat)
+            fast, fast_ms = timed(lambda: tour.render(data), args.repeat)
+            line = (f"{count:>7} {name:>10} {len(slow) // 1024:>7}KB {slow_ms:>8.1f}ms {fast_ms:>8.1f}ms "
+                    f"{slow_ms / fast_ms:>7.1f}x  {'yes' if slow == fast else 'NO':>9}")
+            if renderers.msgpack is not None:
+                packed, pack_ms = timed(lambda: packer.render(data), args.repeat)
+                same = renderers.msgpack.unpackb(packed) == json.loads(slow)
+                line += f" {len(packed) // 1024:>7}KB {pack_ms:>8.1f}ms  {'yes' if same else 'NO'}"
+            print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark serializer DRF vs fast path .values() (tour_api.fastpath)
+
+Mengisi database SQLite in-memory dengan N scene (+2 hotspot per scene),
+lalu mengukur waktu membangun JSON /api/scenes/ dan /api/scenes/pannellum/
+dengan kedua cara dan memastikan hasil render-nya identik byte per byte.
+
+Usage:
+    python scripts/benchmark_serializers.py
+    python scripts/benchmark_serializers.py --sizes 100 1000 10000 --repeat 5
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+sys.path.append(str(PROJECT_ROOT))
+
+
+def setup():
+    os.environ['USE_LOCAL_DB'] = 'True'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'unu_tour.settings')
+    import django
+    from django.db import connection
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        django.setup()
+        # In-memory SQLite, the real database is never touched
+        connection.creation.create_test_db(verbosity=0)
+
+
+def populate(count):
+    from tour_api.models import Hotspot, Scene
+
+    Hotspot.objects.all().delete()
+    Scene.objects.all().delete()
+    scenes = []
+    for i in range(count):
+        sha = f"{i:064x}"
+        scenes.append(Scene(
+            title=f"Ruang {i}",
+            slug=f"ruang-{i}",
+            building='Gedung Utama' if i % 2 else 'Gedung A',
+            floor=(i % 9) + 1 if i % 10 else None,
+            floor_description='Ruang Kuliah',
+            order=i,
+            published_date=date(2024, 1, 1),
+            panorama_image=f"panoramas/sha256/{sha[:2]}/{sha[2:4]}/{sha}.jpg",
+            thumbnail=f"derivatives/{sha}/thumb-640.jpeg",
+            derivatives={
+                'thumbnail': {fmt: {str(w): f"derivatives/{sha}/thumb-{w}.{fmt}" for w in (320, 640)}
+                              for fmt in ('webp', 'jpeg')},
+            },
+            tiles_path=f"tiles/{sha}" if i % 3 else '',
+            tile_resolution=512,
+            tile_max_level=3,
+            cube_resolution=2048,
+            lqip='data:image/webp;base64,UklGRh4AAABXRUJQVlA4',
+            blurhash='LEHV6nWB2yk8pyo0adR*.7kCMdnj',
+            dominant_color='#6a7b8c',
+            is_featured=i == 0,
+            initial_yaw=float(i % 360),
+        ))
+    scenes = Scene.objects.bulk_create(scenes)
+    hotspots = []
+    for i, scene in enumerate(scenes):
+        hotspots.append(Hotspot(from_scene=scene, to_scene=scenes[(i + 1) % count],
+                                hotspot_type='scene', pitch=-5.5, yaw=90.0, text='Lanjut'))
+        hotspots.append(Hotspot(from_scene=scene, hotspot_type='info', pitch=10.0, yaw=-45.25,
+                                text='Info', info_description='Keterangan ruangan'))
+    Hotspot.objects.bulk_create(hotspots)
+
+
+def timed(build, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        data = build()
+        timings.append(time.perf_counter() - started)
+    return data, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Prefetch
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from tour_api import fastpath
+    from tour_api.models import Hotspot
+    from tour_api.serializers import PannellumConfigSerializer, SceneListSerializer
+    from tour_api.views import SceneViewSet
+
+    request = Request(APIRequestFactory().get('/api/scenes/', HTTP_HOST='localhost'))
+    renderer = JSONRenderer()
+    # The view prefetches hotspots__to_scene, which SQLite cannot compile for
+    # ~1000+ target scenes; a joined to_scene gives DRF the same output with
+    # one query less, so the speedups shown are conservative
+    queryset = SceneViewSet.queryset.prefetch_related(None).prefetch_related(
+        Prefetch('hotspots', queryset=Hotspot.objects.select_related('to_scene'))
+    )
+
+    print(f"{'Scenes':>7} {'Endpoint':>10} {'DRF':>10} {'Fast':>10} {'Speedup':>8}  Identical")
+    for count in args.sizes:
+        populate(count)
+        cases = {
+            'list': (
+                lambda: SceneListSerializer(queryset.all(), many=True, context={'request': request}).data,
+                lambda: fastpath.scene_list(queryset.all(), request),
+            ),
+            'pannellum': (
+                lambda: PannellumConfigSerializer(queryset.all()).data,
+                lambda: fastpath.pannellum_config(queryset.all()),
+            ),
+        }
+        for name, (slow, fast) in cases.items():
+            slow_data, slow_ms = timed(slow, args.repeat)
+            fast_data, fast_ms = timed(fast, args.repeat)
+            identical = renderer.render(slow_data) == renderer.render(fast_data)
+            print(f"{count:>7} {name:>10} {slow_ms:>8.1f}ms {fast_ms:>8.1f}ms {slow_ms / fast_ms:>7.1f}x  "
+                  f"{'yes' if identical else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
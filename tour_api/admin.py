@@ -1,9 +1,16 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
-from .models import Scene, Hotspot
+from .metadata import ImageTooLarge, check_decodable, is_equirectangular
+from .models import Scene, Hotspot, UploadSession
 from .admin_site import admin_site
+from . import changelog
+from .cache import mark_tour_changed
+from .jobs import enqueue_scene_media
 
 
 class HotspotInline(admin.StackedInline):
@@ -19,8 +26,63 @@ class HotspotInline(admin.StackedInline):
     verbose_name_plural = "Hotspot Manual - Lebih mudah gunakan Visual Editor di bawah"
 
 
+class SceneAdminForm(forms.ModelForm):
+    """Scene form yang menerima panorama dari chunked upload (/api/uploads/)"""
+    panorama_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    
+    class Meta:
+        model = Scene
+        fields = '__all__'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # File may arrive via panorama_upload instead of the multipart field
+        self.fields['panorama_image'].required = False
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        upload_id = cleaned_data.get('panorama_upload')
+        panorama = cleaned_data.get('panorama_image')
+        size = None
+        image_format = ''
+        
+        if upload_id:
+            session = UploadSession.objects.filter(
+                pk=upload_id, status='complete'
+            ).select_related('blob').first()
+            if session is None or session.blob is None:
+                self.add_error('panorama_image', 'Upload panorama belum selesai, silakan ulangi.')
+            else:
+                cleaned_data['panorama_image'] = session.blob.name
+                size = (session.blob.width, session.blob.height)
+                image_format = session.blob.format
+        elif not panorama and not self.instance.panorama_image:
+            self.add_error('panorama_image', 'Foto panorama wajib diisi.')
+        elif hasattr(panorama, 'image'):
+            # Header already parsed by forms.ImageField, no extra read needed
+            size = panorama.image.size
+            image_format = panorama.image.format
+        
+        if size and size[0] and not is_equirectangular(*size):
+            self.add_error(
+                'panorama_image',
+                f'Panorama harus equirectangular dengan rasio 2:1 (diterima {size[0]}x{size[1]}).'
+            )
+        
+        limit = getattr(settings, 'TOUR_MEDIA_MEMORY_LIMIT', 0)
+        if size and size[0] and limit:
+            # Refused here instead of failing the media job later
+            try:
+                check_decodable(*size, image_format, limit)
+            except ImageTooLarge as exc:
+                self.add_error('panorama_image', str(exc))
+        
+        return cleaned_data
+
+
 @admin.register(Scene, site=admin_site)
 class SceneAdmin(admin.ModelAdmin):
+    form = SceneAdminForm
     change_form_template = 'admin/tour_api/scene/change_form.html'
     change_list_template = 'admin/tour_api/scene/change_list.html'
     list_display = (
@@ -56,7 +118,7 @@ class SceneAdmin(admin.ModelAdmin):
             'description': 'Tentukan gedung dan lantai untuk organisasi yang lebih baik'
         }),
         ('Media', {
-            'fields': ('panorama_image', 'thumbnail', 'panorama_preview')
+            'fields': ('panorama_image', 'panorama_upload', 'thumbnail', 'panorama_preview', 'panorama_info', 'media_status')
         }),
         ('Status', {
             'fields': ('is_active', 'is_featured')
@@ -65,9 +127,11 @@ class SceneAdmin(admin.ModelAdmin):
     
     inlines = [HotspotInline]
     
-    readonly_fields = ('created_at', 'updated_at', 'panorama_preview', 'hotspot_count')
+    readonly_fields = (
+        'created_at', 'updated_at', 'panorama_preview', 'panorama_info', 'hotspot_count', 'media_status'
+    )
     
-    actions = ['make_featured', 'make_active', 'make_inactive']
+    actions = ['make_featured', 'make_active', 'make_inactive', 'reprocess_media']
     
     list_per_page = 20
     list_max_show_all = 100
@@ -163,25 +227,99 @@ class SceneAdmin(admin.ModelAdmin):
         return mark_safe('<p style="color: #999;">Belum ada gambar</p>')
     panorama_preview.short_description = "Preview Panorama"
     
+    MEDIA_STATUS_COLORS = {
+        'pending': '#f39c12',
+        'running': '#3498db',
+        'done': '#27ae60',
+        'failed': '#e74c3c',
+    }
+    
+    def panorama_info(self, obj):
+        """Resolusi, format, ukuran dan warna dominan (dari database, tanpa membuka file)"""
+        if not obj.panorama_width:
+            return mark_safe('<span style="color: #999;">Belum tersedia</span>')
+        swatch = ''
+        if obj.dominant_color:
+            swatch = format_html(
+                '<span style="display: inline-block; width: 12px; height: 12px; '
+                'background: {}; border: 1px solid #ccc; vertical-align: middle;"></span> ',
+                obj.dominant_color
+            )
+        return format_html(
+            '{}{} x {} px, {}, {} MB',
+            swatch,
+            obj.panorama_width,
+            obj.panorama_height,
+            obj.panorama_format or '-',
+            round((obj.panorama_size or 0) / (1024 * 1024), 1),
+        )
+    panorama_info.short_description = "Info Panorama"
+    
+    def media_status(self, obj):
+        """Status job pemrosesan media terakhir (tiles, placeholder, derivatives)"""
+        job = obj.media_jobs.order_by('-created_at').first() if obj.pk else None
+        if job is None:
+            return mark_safe('<span style="color: #999;">Belum ada job</span>')
+        badge = format_html(
+            '<span style="background: {}; color: white; padding: 3px 8px; '
+            'border-radius: 3px; font-size: 10px; font-weight: 600;">{}</span> '
+            '<span style="color: #666; font-size: 12px;">percobaan {}/{}, {}</span>',
+            self.MEDIA_STATUS_COLORS.get(job.status, '#666'),
+            job.get_status_display().upper(),
+            job.attempts,
+            job.max_attempts,
+            job.updated_at.strftime('%d %b %Y %H:%M'),
+        )
+        if job.last_error:
+            badge += format_html(
+                '<pre style="margin-top: 8px; max-height: 120px; overflow: auto; '
+                'font-size: 11px; color: #e74c3c;">{}</pre>',
+                job.last_error.strip().splitlines()[-1]
+            )
+        return badge
+    media_status.short_description = "Status Pemrosesan Media"
+    
     def make_featured(self, request, queryset):
         """Set selected scene as featured (starting point)"""
-        Scene.objects.filter(is_featured=True).update(is_featured=False)
-        count = queryset.update(is_featured=True)
+        now = timezone.now()
+        previous = Scene.objects.filter(is_featured=True)
+        changed = set(previous.values_list('pk', flat=True)) | set(queryset.values_list('pk', flat=True))
+        previous.update(is_featured=False, updated_at=now)
+        count = queryset.update(is_featured=True, updated_at=now)
+        changelog.record(Scene, sorted(changed), 'update')
+        mark_tour_changed()
         self.message_user(request, f"{count} scene dijadikan featured (starting point)")
     make_featured.short_description = "Jadikan starting point"
     
     def make_active(self, request, queryset):
         """Activate selected scenes"""
-        count = queryset.update(is_active=True)
+        # Ids first: with an is_active filter the queryset is empty after update()
+        ids = list(queryset.values_list('pk', flat=True))
+        count = queryset.update(is_active=True, updated_at=timezone.now())
+        changelog.record(Scene, ids, 'update')
+        mark_tour_changed()
         self.message_user(request, f"{count} scene diaktifkan")
     make_active.short_description = "Aktifkan scene"
     
     def make_inactive(self, request, queryset):
         """Deactivate selected scenes"""
-        count = queryset.update(is_active=False)
+        # Ids first: with an is_active filter the queryset is empty after update()
+        ids = list(queryset.values_list('pk', flat=True))
+        count = queryset.update(is_active=False, updated_at=timezone.now())
+        changelog.record(Scene, ids, 'update')
+        mark_tour_changed()
         self.message_user(request, f"{count} scene dinonaktifkan")
     make_inactive.short_description = "Nonaktifkan scene"
     
+    def reprocess_media(self, request, queryset):
+        """Queue tiles/placeholders/derivatives regeneration"""
+        count = 0
+        for scene in queryset.exclude(panorama_image=''):
+            enqueue_scene_media(scene, Scene.MEDIA_FIELDS)
+            count += 1
+        self.message_user(request, f"{count} scene masuk antrian pemrosesan media")
+    reprocess_media.short_description = "Proses ulang media"
+    
     def preview_link(self, obj):
         """Link to preview scene in frontend"""
         return format_html(
@@ -0,0 +1,137 @@
+"""
+Penyimpanan panorama berbasis hash isi (content-addressed).
+
+File dengan isi identik disimpan satu kali di
+``panoramas/sha256/<ab>/<cd>/<hash>.<ext>`` dan dicatat di ``MediaBlob``
+dengan reference count. Turunan (tiles, derivatives) juga diberi nama
+berdasarkan hash sehingga hanya diproses sekali per gambar unik.
+"""
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import F, Q
+
+from .metadata import read_header
+from .models import MediaBlob, Scene, UploadSession
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def content_hash(file):
+    """Return ``(sha256 hex digest, size)`` of a file, reading it in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    file.seek(0)
+    return digest.hexdigest(), size
+
+
+def blob_name(digest, original_name, prefix='panoramas'):
+    extension = os.path.splitext(original_name)[1].lower() or '.jpg'
+    return f"{prefix}/sha256/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def store(file, original_name, digest=None, size=None, header=None):
+    """
+    Store ``file`` under its content hash unless an identical blob exists.
+    ``header`` is ``(width, height, format)`` if already known.
+    Returns the ``MediaBlob`` (its ``ref_count`` is not changed here).
+    """
+    if digest is None:
+        digest, size = content_hash(file)
+    name = blob_name(digest, original_name)
+
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(sha256=digest).first()
+        created = blob is None
+        if created:
+            width, height, image_format = header or read_header(file)
+            blob = MediaBlob.objects.create(
+                sha256=digest,
+                name=name,
+                size=size,
+                width=width,
+                height=height,
+                format=image_format,
+            )
+        if created or not default_storage.exists(blob.name):
+            file.seek(0)
+            # Name is free (checked above), so storage keeps it unchanged
+            blob.name = default_storage.save(blob.name, file)
+            blob.save(update_fields=['name'])
+    return blob
+
+
+def acquire(blob_id):
+    MediaBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + 1)
+
+
+def release(blob_id):
+    """Drop one reference; unreferenced blobs are purged by the media worker."""
+    from .jobs import enqueue
+
+    MediaBlob.objects.filter(pk=blob_id, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+    if MediaBlob.objects.filter(pk=blob_id, ref_count=0).exists():
+        enqueue('purge_blob', blob_id=blob_id)
+
+
+def delete_tree(prefix):
+    """Delete every file below ``prefix`` in default storage."""
+    try:
+        directories, files = default_storage.listdir(prefix)
+    except FileNotFoundError:
+        return
+    for name in files:
+        default_storage.delete(f"{prefix}/{name}")
+    for directory in directories:
+        delete_tree(f"{prefix}/{directory}")
+
+
+def derived_prefixes(digest):
+    """Stored tiles/derivatives prefixes of a blob, one per output version."""
+    prefixes = []
+    for kind in ('tiles', 'derivatives'):
+        try:
+            directories, _ = default_storage.listdir(kind)
+        except FileNotFoundError:
+            continue
+        prefixes.extend(
+            f"{kind}/{name}" for name in directories
+            # Unversioned prefixes predate tour_api.imaging.output_version()
+            if name == digest or name.startswith(f"{digest}-")
+        )
+    return prefixes
+
+
+def purge(blob_id):
+    """
+    Remove an unreferenced blob, its stored file and its derived media.
+    Returns whether it was removed.
+
+    Checked under the blob's row lock, which ``uploads.complete()`` also
+    holds until its session points at the blob: a blob handed to a live
+    upload session (not yet saved on a scene) or used by a scene is kept.
+    """
+    from .uploads import expiry_cutoff
+
+    with transaction.atomic():
+        blob = MediaBlob.objects.select_for_update().filter(pk=blob_id).first()
+        if blob is None or blob.ref_count > 0:
+            # Re-uploaded while the purge was queued
+            return False
+        in_use = (
+            Scene.objects.filter(Q(panorama_blob=blob) | Q(panorama_image=blob.name)).exists()
+            or UploadSession.objects.filter(blob=blob, updated_at__gte=expiry_cutoff()).exists()
+        )
+        if in_use:
+            return False
+        default_storage.delete(blob.name)
+        for prefix in derived_prefixes(blob.sha256):
+            delete_tree(prefix)
+        blob.delete()
+    return True
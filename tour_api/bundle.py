@@ -0,0 +1,141 @@
+"""
+Bundle tour statis: list + semua detail + config Pannellum dalam satu file.
+
+``build()`` menulis ``STATIC_ROOT/tour/tour.<hash>.json`` beserta sibling
+``.br`` dan ``.gz`` lalu memperbarui pointer ``current.json``. Nama file
+memuat hash isi sehingga WhiteNoise/CDN boleh meng-cache selamanya
+(``WHITENOISE_IMMUTABLE_FILE_TEST``); klien cukup menanyakan hash terbaru
+lewat ``/api/bundle/`` yang tidak menyentuh database.
+
+Dijalankan oleh ``manage.py build_tour_bundle`` (saat build) dan job
+``build_bundle`` yang diantrikan setiap konten tour berubah.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Prefetch
+from django.utils import timezone
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip siblings are always written
+    brotli = None
+
+from . import changelog, fastpath, snapshot
+from .models import Hotspot, Scene
+from .renderers import TourJSONRenderer
+from .serializers import SceneDetailSerializer
+
+BUNDLE_DIR = 'tour'
+POINTER_NAME = 'current.json'
+NAME_RE = re.compile(r'^tour\.(?P<hash>[0-9a-f]{12})\.json$')
+# Older bundles kept so clients still downloading one do not get a 404
+KEEP_BUNDLES = 3
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def bundle_root():
+    return Path(settings.STATIC_ROOT) / BUNDLE_DIR
+
+
+def writable():
+    """Whether ``build()`` can write its files (not on read-only deploys such as Vercel)."""
+    path = bundle_root()
+    while not path.exists() and path != path.parent:
+        path = path.parent
+    return os.access(path, os.W_OK)
+
+
+def build_content():
+    """
+    The bundle JSON: ``{"change_token": N, "scenes": [...], "details": {slug: ...},
+    "pannellum": {...}}``; clients continue with ``/api/changes/?since=N``.
+    """
+    # Token first: a change during the build only causes another build
+    # (or is sent again by /api/changes/)
+    change_token = changelog.current_token()
+    scenes = Scene.objects.filter(is_active=True)
+    details = SceneDetailSerializer(
+        scenes.prefetch_related(Prefetch('hotspots', queryset=Hotspot.objects.select_related('to_scene'))),
+        many=True,
+        context={'request': None},
+    ).data
+    render = TourJSONRenderer().render
+    return b''.join([
+        b'{"change_token":%d,"scenes":' % change_token,
+        render(fastpath.scene_list(scenes)),
+        b',"details":',
+        render({detail['slug']: detail for detail in details}),
+        b',"pannellum":',
+        bytes(snapshot.rebuild().content),
+        b'}',
+    ])
+
+
+def _write(path, data):
+    # Write-then-rename so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(data)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _prune(root, current):
+    bundles = sorted(
+        (path for path in root.iterdir() if NAME_RE.match(path.name) and path.name != current),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in bundles[KEEP_BUNDLES - 1:]:
+        for sibling in (path, path.with_name(path.name + '.gz'), path.with_name(path.name + '.br')):
+            sibling.unlink(missing_ok=True)
+
+
+def build():
+    """Write the current bundle (if its content changed) and return the pointer."""
+    content = build_content()
+    digest = hashlib.sha256(content).hexdigest()[:12]
+    name = f'tour.{digest}.json'
+    root = bundle_root()
+    root.mkdir(parents=True, exist_ok=True)
+
+    path = root / name
+    if not path.exists():
+        # Compressed siblings first: once the .json exists it is complete
+        _write(root / f'{name}.gz', gzip.compress(content, GZIP_LEVEL, mtime=0))
+        if brotli is not None:
+            _write(root / f'{name}.br', brotli.compress(content, quality=BROTLI_QUALITY))
+        _write(path, content)
+    else:
+        # Keep it the newest for pruning
+        path.touch()
+
+    pointer = {
+        'hash': digest,
+        'path': f'{BUNDLE_DIR}/{name}',
+        'size': len(content),
+        'built_at': timezone.now().isoformat(),
+    }
+    _write(root / POINTER_NAME, json.dumps(pointer).encode())
+    _prune(root, name)
+    return pointer
+
+
+def current():
+    """The pointer written by the last ``build()``, or ``None``."""
+    try:
+        return json.loads((bundle_root() / POINTER_NAME).read_bytes())
+    except (FileNotFoundError, ValueError):
+        return None
@@ -0,0 +1,195 @@
+"""
+Cache respons API tour dengan versi global.
+
+Setiap perubahan konten tour (Scene/Hotspot) menaikkan "tour version" yang
+disimpan di database (``TourVersion``, satu baris), sekali per transaksi.
+Key cache memuat versi tersebut (untuk detail scene: validator scene itu,
+lihat tour_api.conditional), jadi invalidasi cukup satu ``UPDATE`` dan key
+lama kedaluwarsa sendiri. Versi dibaca dengan satu lookup primary key, dan
+karena ada di database perubahan dari proses mana pun (worker lain, media
+worker, instance serverless) langsung terlihat, juga dengan cache per proses
+(locmem). Penulisan yang melewati signals (``QuerySet.update``,
+``bulk_create``, SQL langsung) wajib memanggil ``mark_tour_changed()``.
+"""
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_ID = 1
+# Polling interval (seconds) while another worker rebuilds a cold key
+LOCK_POLL_INTERVAL = 0.05
+
+
+def tour_cache():
+    return caches[getattr(settings, 'TOUR_API_CACHE_ALIAS', 'default')]
+
+
+def current_version():
+    """``(version, changed_at)`` of the tour; ``(0, None)`` before the first change."""
+    from .models import TourVersion
+
+    row = TourVersion.objects.filter(pk=VERSION_ID).values_list('version', 'changed_at').first()
+    return row or (0, None)
+
+
+def mark_tour_changed():
+    """
+    Bump the tour version (invalidating every cached tour response), rebuild
+    the Pannellum snapshot and schedule a static bundle rebuild, once per
+    transaction after it commits.
+    Model signals call this; so must writes that bypass them
+    (``QuerySet.update``, ``bulk_create``).
+    """
+    on_commit_once(_tour_changed)
+
+
+class _OnCommitOnce:
+    def __init__(self, func):
+        # Django names the hook (``__qualname__``) when logging its failure
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        self.func()
+
+
+def on_commit_once(func):
+    """``transaction.on_commit(func)`` unless ``func`` is already pending in this transaction."""
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+        isinstance(callback, _OnCommitOnce) and callback.func is func and not callback.done
+        for _, callback, _ in connection.run_on_commit
+    ):
+        return
+    # Robust: the write is already committed, a failing hook must not turn
+    # its response into an error
+    transaction.on_commit(_OnCommitOnce(func), robust=True)
+
+
+def _tour_changed():
+    from . import snapshot
+    from .jobs import enqueue_bundle_build
+
+    _bump_version()
+    snapshot.rebuild()
+    enqueue_bundle_build()
+
+
+def _bump_version():
+    from .models import TourVersion
+
+    if TourVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1, changed_at=timezone.now()):
+        return
+    try:
+        TourVersion.objects.create(pk=VERSION_ID)
+    except IntegrityError:
+        # Created concurrently
+        TourVersion.objects.filter(pk=VERSION_ID).update(version=F('version') + 1, changed_at=timezone.now())
+
+
+def request_key(request, prefix, params=None):
+    """
+    Cache key for ``request``: absolute URL (serializers emit absolute media
+    URLs) + sorted query. ``params`` replaces the query values of the same
+    names (e.g. a normalized list that may also come from a POST body).
+    """
+    params = params or {}
+    query = sorted(
+        (name, value)
+        for name in request.query_params if name not in params
+        for value in request.query_params.getlist(name)
+    )
+    raw = f"{request.build_absolute_uri(request.path)}?{query!r}|{sorted(params.items())!r}"
+    return f"tour:resp:{prefix}:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def cached_data(key, build, token=None):
+    """
+    Return ``(data, hit)`` for ``key`` under the validator ``token`` (default:
+    the tour version), calling ``build()`` on a miss. ``build`` returns
+    ``(data, cacheable)``.
+
+    Stampede protection: only the worker that wins ``cache.add`` on the lock
+    key rebuilds; others poll for up to TOUR_API_CACHE_LOCK_WAIT seconds and
+    only build themselves if the winner did not finish in time.
+    """
+    cache = tour_cache()
+    if token is None:
+        token = str(current_version()[0])
+    versioned = f"{key}:{hashlib.sha256(token.encode()).hexdigest()[:32]}"
+    data = cache.get(versioned)
+    if data is not None:
+        return data, True
+
+    timeout = getattr(settings, 'TOUR_API_CACHE_TIMEOUT', 3600)
+    lock_key = f"{versioned}:lock"
+    lock_wait = getattr(settings, 'TOUR_API_CACHE_LOCK_WAIT', 5)
+    if not cache.add(lock_key, 1, timeout=lock_wait * 2):
+        deadline = time.monotonic() + lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            data = cache.get(versioned)
+            if data is not None:
+                return data, True
+        data, cacheable = build()
+        return data, False
+
+    try:
+        data, cacheable = build()
+        if cacheable:
+            cache.set(versioned, data, timeout=timeout)
+    finally:
+        cache.delete(lock_key)
+    return data, False
+
+
+class CachedReadMixin:
+    """
+    Cache ``Response.data`` of read actions under the tour version.
+
+    Data (not rendered bytes) is cached so content negotiation still applies.
+    Only 200 responses are stored. With ``ConditionalGetMixin`` the token of
+    ``self.validators`` keys the entry, so a cached body always belongs to
+    the ETag sent with it.
+    """
+
+    def cached_response(self, request, build, key=None):
+        """
+        ``build()`` through the cache. Only GET/HEAD are cached unless an
+        explicit ``key`` marks another method as a read.
+        """
+        if not getattr(settings, 'TOUR_API_CACHE_ENABLED', True):
+            return build()
+        if key is None:
+            if request.method not in ('GET', 'HEAD'):
+                return build()
+            key = request_key(request, self.action or 'view')
+
+        responses = []
+
+        def _build():
+            response = build()
+            responses.append(response)
+            data = response.data
+            if data is not None and not isinstance(data, (dict, list)):
+                # e.g. ValuesQuerySet: evaluate so it can be pickled
+                data = list(data)
+            return data, response.status_code == status.HTTP_200_OK
+
+        validators = getattr(self, 'validators', None)
+        data, hit = cached_data(key, _build, token=validators[0] if validators else None)
+        if responses and responses[0].status_code != status.HTTP_200_OK:
+            return responses[0]
+        response = Response(data)
+        response['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
@@ -0,0 +1,105 @@
+"""
+Change log untuk sinkronisasi inkremental (``/api/changes/?since=<token>``).
+
+Setiap create/update/delete Scene dan Hotspot menulis satu
+``ChangeLogEntry`` di transaksi yang sama; id entry (auto-increment) adalah
+token perubahan. Penghapusan meninggalkan tombstone sehingga klien offline
+tahu record mana yang harus dibuang. Model signals mencatat ``save()`` dan
+``delete()``; penulisan yang melewati signals (``QuerySet.update``,
+``bulk_create``, ``bulk_update``) memanggil ``record()`` sendiri.
+
+Feed mengelompokkan entry per record: beberapa perubahan pada record yang
+sama cukup dikirim sekali dengan isi terbarunya.
+
+Id entry dibagikan saat insert, bukan saat commit, jadi feed menahan entry
+yang lebih muda dari ``TOUR_API_CHANGES_SETTLE_SECONDS``. Transaksi yang
+terbuka lebih lama dari itu (mis. impor tour) bisa meng-commit entry di bawah
+token yang sudah dikirim ke klien; setelah commit entry tersebut ditulis ulang
+di atas log sehingga tetap sampai ke semua klien.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ChangeLogEntry, Hotspot, Scene
+
+MODEL_NAMES = {Scene: 'scene', Hotspot: 'hotspot'}
+
+
+def record(model, ids, action):
+    """Log ``action`` for the ``model`` rows with primary keys ``ids``."""
+    model_name = MODEL_NAMES[model]
+    ids = list(ids)
+    written_at = timezone.now()
+    _write(model_name, ids, action)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: _replay_if_late(model_name, ids, action, written_at))
+
+
+def _write(model_name, ids, action):
+    ChangeLogEntry.objects.bulk_create(
+        ChangeLogEntry(model=model_name, object_id=pk, action=action) for pk in ids
+    )
+
+
+def _replay_if_late(model_name, ids, action, written_at):
+    # Committed after the settle window: entries with higher ids may already
+    # have been served, so write these again on top of the log
+    if timezone.now() - written_at >= _settle_window():
+        _write(model_name, ids, action)
+
+
+def _settle_window():
+    return timedelta(seconds=settings.TOUR_API_CHANGES_SETTLE_SECONDS)
+
+
+def _settled():
+    # Ids are assigned at insert, so a transaction still open could commit an
+    # entry below a token a client has already synced past: entries younger
+    # than the settle window are held back (later commits are replayed).
+    return ChangeLogEntry.objects.filter(created_at__lte=timezone.now() - _settle_window())
+
+
+def current_token(settled=True):
+    """Token of the newest (settled) entry, 0 for an empty log."""
+    entries = _settled() if settled else ChangeLogEntry.objects.all()
+    return entries.aggregate(token=Max('id'))['token'] or 0
+
+
+def entries_since(since, limit):
+    """``(entries, has_more)`` of settled entries after token ``since``, oldest first."""
+    entries = list(
+        _settled().filter(pk__gt=since)
+        .order_by('pk')
+        .values_list('pk', 'model', 'object_id', 'action')[:limit + 1]
+    )
+    return entries[:limit], len(entries) > limit
+
+
+def group(entries):
+    """
+    ``{model_name: {object_id: first_action}}`` for ``entries``; the first
+    action tells whether the client can already know the record.
+    """
+    grouped = {model_name: {} for model_name in MODEL_NAMES.values()}
+    for _, model_name, object_id, action in entries:
+        grouped[model_name].setdefault(object_id, action)
+    return grouped
+
+
+def partition(actions, records):
+    """
+    ``{"created", "updated", "deleted"}`` for one model: ``records`` maps
+    the ids still visible to their representation, every other id is a
+    tombstone. Order follows ``actions`` (token order).
+    """
+    result = {'created': [], 'updated': [], 'deleted': []}
+    for object_id, action in actions.items():
+        if object_id not in records:
+            result['deleted'].append(object_id)
+        else:
+            result['created' if action == 'create' else 'updated'].append(records[object_id])
+    return result
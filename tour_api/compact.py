@@ -0,0 +1,110 @@
+"""
+Format kompak (kolom) untuk payload tour yang berisi banyak hotspot.
+
+Detail scene, list scene, batch dan config Pannellum mengulang key yang
+sama (``pitch``, ``yaw``, ``type``, ``text``, ``sceneId``) di setiap item.
+``encode()`` mengubah array berisi object menjadi array per kolom dan
+memindahkan string yang berulang (nama gedung, slug tujuan, tipe hotspot)
+ke satu tabel string. Hasilnya dikirim oleh ``CompactJSONRenderer``
+(``?format=compact`` atau ``Accept: application/vnd.unutour.compact+json``).
+
+Kontrak decoder: docs/API_COMPACT_FORMAT.md. ``decode()`` adalah
+implementasi referensinya.
+"""
+
+VERSION = 1
+# Arrays/objects with fewer items stay as they are (columns would not pay off)
+MIN_TABLE_ROWS = 3
+TYPE_KEY = '$t'
+
+
+class _Encoder:
+    def __init__(self):
+        self.strings = []
+        self.string_ids = {}
+
+    def value(self, value):
+        if isinstance(value, dict):
+            if len(value) >= MIN_TABLE_ROWS and all(isinstance(item, dict) for item in value.values()):
+                table = self.table('map', list(value.values()))
+                table['keys'] = self.column(list(value.keys()))
+                return table
+            encoded = {key: self.value(item) for key, item in value.items()}
+            if TYPE_KEY in value:
+                return {TYPE_KEY: 'obj', 'v': encoded}
+            return encoded
+        if isinstance(value, (list, tuple)):
+            if len(value) >= MIN_TABLE_ROWS and all(isinstance(item, dict) for item in value):
+                return self.table('rows', value)
+            return [self.value(item) for item in value]
+        return value
+
+    def table(self, kind, rows):
+        names = list(dict.fromkeys(name for row in rows for name in row))
+        columns = []
+        for name in names:
+            present = [index for index, row in enumerate(rows) if name in row]
+            column = self.column([rows[index][name] for index in present])
+            if len(present) < len(rows):
+                column = {'rows': present, 'v': column}
+            columns.append(column)
+        return {TYPE_KEY: kind, 'n': len(rows), 'cols': names, 'data': columns}
+
+    def column(self, values):
+        strings = [value for value in values if value is not None]
+        if strings and all(isinstance(value, str) for value in strings) and len(set(strings)) < len(strings):
+            return {'$s': [None if value is None else self.string_id(value) for value in values]}
+        return [self.value(value) for value in values]
+
+    def string_id(self, value):
+        index = self.string_ids.get(value)
+        if index is None:
+            index = self.string_ids[value] = len(self.strings)
+            self.strings.append(value)
+        return index
+
+
+def encode(data):
+    """The compact document for ``data`` (already JSON-ready response data)."""
+    encoder = _Encoder()
+    encoded = encoder.value(data)
+    return {'$compact': VERSION, 'strings': encoder.strings, 'data': encoded}
+
+
+def decode(document):
+    """Inverse of ``encode()``."""
+    if document.get('$compact') != VERSION:
+        raise ValueError(f"Versi format kompak tidak dikenal: {document.get('$compact')!r}")
+    strings = document['strings']
+
+    def column(encoded):
+        if isinstance(encoded, list):
+            return [value(item) for item in encoded]
+        if '$s' in encoded:
+            return [None if index is None else strings[index] for index in encoded['$s']]
+        return dict(zip(encoded['rows'], column(encoded['v'])))
+
+    def rows(table):
+        result = [{} for _ in range(table['n'])]
+        for name, encoded in zip(table['cols'], table['data']):
+            values = column(encoded)
+            items = values.items() if isinstance(values, dict) else enumerate(values)
+            for index, item in items:
+                result[index][name] = item
+        return result
+
+    def value(encoded):
+        if isinstance(encoded, list):
+            return [value(item) for item in encoded]
+        if not isinstance(encoded, dict):
+            return encoded
+        kind = encoded.get(TYPE_KEY)
+        if kind == 'rows':
+            return rows(encoded)
+        if kind == 'map':
+            return dict(zip(column(encoded['keys']), rows(encoded)))
+        if kind == 'obj':
+            return {key: value(item) for key, item in encoded['v'].items()}
+        return {key: value(item) for key, item in encoded.items()}
+
+    return value(document['data'])
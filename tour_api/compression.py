@@ -0,0 +1,131 @@
+"""
+Kompresi Brotli/gzip untuk respons JSON API.
+
+WhiteNoise hanya mengompres file statis; middleware ini menangani respons
+``/api/`` di atas ``TOUR_API_COMPRESS_MIN_SIZE`` byte. Respons ber-ETag
+(semua endpoint read, lihat tour_api.conditional) menyimpan hasil kompresi
+di cache dengan key ETag + encoding, jadi satu versi konten cukup
+dikompres sekali. ETag dijadikan weak karena body berbeda per encoding;
+If-None-Match tetap cocok (perbandingan weak).
+
+Respons streaming dan yang sudah ber-``Content-Encoding`` (mis. snapshot
+gzip Pannellum) dilewati.
+"""
+import gzip
+import hashlib
+import re
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, gzip is always available
+    brotli = None
+
+from .cache import tour_cache
+
+COMPRESSIBLE_TYPE_RE = re.compile(r'json|msgpack|^text/|javascript|xml', re.IGNORECASE)
+
+
+def accepted_encodings(header):
+    """``{encoding: q}`` from an Accept-Encoding header."""
+    encodings = {}
+    for part in header.split(','):
+        name, _, params = part.strip().partition(';')
+        q = 1.0
+        match = re.search(r'q=([\d.]+)', params)
+        if match:
+            try:
+                q = float(match.group(1))
+            except ValueError:
+                q = 0.0
+        if name:
+            encodings[name.strip().lower()] = q
+    return encodings
+
+
+def choose_encoding(header, available=None):
+    """
+    The ``available`` encoding with the highest q-value (earlier ones win
+    ties) or ``None``; defaults to ``'br'`` (when Brotli is installed) and
+    ``'gzip'``. Encodings refused with ``q=0`` are never chosen.
+    """
+    if available is None:
+        available = ('br', 'gzip') if brotli is not None else ('gzip',)
+    encodings = accepted_encodings(header)
+    options = [(encoding, encodings.get(encoding, encodings.get('*', 0))) for encoding in available]
+    if not options:
+        return None
+    encoding, q = max(options, key=lambda option: option[1])
+    return encoding if q > 0 else None
+
+
+def compress(content, encoding):
+    if encoding == 'br':
+        return brotli.compress(content, quality=getattr(settings, 'TOUR_API_COMPRESS_BROTLI_QUALITY', 5))
+    return gzip.compress(content, getattr(settings, 'TOUR_API_COMPRESS_GZIP_LEVEL', 6), mtime=0)
+
+
+def _cache_key(etag, encoding, content):
+    # Length guards against an ETag reused for a different body
+    raw = '|'.join(str(part) for part in (
+        etag, encoding, len(content),
+        getattr(settings, 'TOUR_API_COMPRESS_BROTLI_QUALITY', 5),
+        getattr(settings, 'TOUR_API_COMPRESS_GZIP_LEVEL', 6),
+    ))
+    return f"tour:compressed:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+class CompressionMiddleware:
+    """Negotiate Brotli/gzip for API responses; compressed bodies are cached per ETag."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._eligible(request, response):
+            return response
+
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if len(response.content) < getattr(settings, 'TOUR_API_COMPRESS_MIN_SIZE', 1024):
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        compressed = self._compressed(response, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = f'W/{etag}'
+        return response
+
+    def _eligible(self, request, response):
+        return (
+            getattr(settings, 'TOUR_API_COMPRESS_ENABLED', True)
+            and request.path.startswith('/api/')
+            and not response.streaming
+            and not response.has_header('Content-Encoding')
+            and bool(COMPRESSIBLE_TYPE_RE.search(response.get('Content-Type', '')))
+        )
+
+    def _compressed(self, response, encoding):
+        content = response.content
+        etag = response.get('ETag')
+        if not etag or etag.startswith('W/') or not getattr(settings, 'TOUR_API_CACHE_ENABLED', True):
+            return compress(content, encoding)
+
+        cache = tour_cache()
+        key = _cache_key(etag, encoding, content)
+        compressed = cache.get(key)
+        if compressed is None:
+            compressed = compress(content, encoding)
+            cache.set(key, compressed, timeout=getattr(settings, 'TOUR_API_CACHE_TIMEOUT', 3600))
+        return compressed
@@ -0,0 +1,98 @@
+"""
+Conditional GET (ETag / Last-Modified / 304) untuk API tour.
+
+Validator seluruh tour adalah tour version (satu lookup primary key, lihat
+tour_api.cache); validator satu scene dihitung dari satu query agregat
+ber-index (jumlah hotspot dan MAX(updated_at)). Tanpa serialisasi, sehingga
+kunjungan ulang cukup dijawab 304 tanpa payload.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework import status
+
+from .models import Scene
+
+
+def tour_validators():
+    """``(token, last_modified)`` for the whole tour, from the tour version."""
+    from .cache import current_version
+
+    version, changed_at = current_version()
+    return f'v{version}', _newest(changed_at)
+
+
+def scene_validators(slug):
+    """
+    Validators for one scene: its own ``updated_at`` plus a hotspot version
+    (count, newest hotspot, newest target scene whose slug/title it shows).
+    """
+    values = Scene.objects.filter(slug=slug).aggregate(
+        scene_updated=Max('updated_at'),
+        hotspot_count=Count('hotspots', distinct=True),
+        hotspot_updated=Max('hotspots__updated_at'),
+        target_updated=Max('hotspots__to_scene__updated_at'),
+    )
+    return _token(values), _newest(
+        values['scene_updated'], values['hotspot_updated'], values['target_updated']
+    )
+
+
+def _token(values):
+    return '|'.join(
+        value.isoformat() if hasattr(value, 'isoformat') else str(value)
+        for _, value in sorted(values.items())
+    )
+
+
+def _newest(*timestamps):
+    timestamps = [value for value in timestamps if value is not None]
+    return int(max(timestamps).timestamp()) if timestamps else None
+
+
+def make_etag(request, token):
+    """Strong ETag over the validators, the URL and the negotiated representation."""
+    query = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    accepted = getattr(request, 'accepted_media_type', '')
+    raw = f"{request.get_host()}{request.path}?{query!r}|{accepted}|{token}"
+    return f'"{hashlib.sha256(raw.encode()).hexdigest()[:32]}"'
+
+
+class ConditionalGetMixin:
+    """
+    Answer ``If-None-Match`` / ``If-Modified-Since`` with 304 before the view
+    does any work. Override ``get_validators`` for per-object validators; the
+    result is kept on ``self.validators`` for the view to reuse.
+    """
+    validators = None
+
+    def get_validators(self, request):
+        return tour_validators()
+
+    def conditional_response(self, request, build):
+        if request.method not in ('GET', 'HEAD'):
+            return build()
+
+        self.validators = token, last_modified = self.get_validators(request)
+        etag = make_etag(request, token)
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = build()
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        # The body differs per Content-Encoding: a strong ETag would claim
+        # byte equality (If-None-Match compares weakly, so 304s still work)
+        response['ETag'] = f'W/{etag}' if response.has_header('Content-Encoding') else etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Let browsers keep the payload but revalidate on every use
+        patch_cache_control(response, no_cache=True)
+        patch_vary_headers(response, ['Accept'])
+        return response
@@ -0,0 +1,108 @@
+"""
+Turunan gambar responsif (width ladder) untuk thumbnail dan panorama.
+
+Hasilnya disimpan di ``Scene.derivatives`` dengan bentuk::
+
+    {
+        "thumbnail": {"webp": {"320": "<name>", ...}, "jpeg": {...}},
+        "panorama": {"webp": {"2048": "<name>", ...}, "jpeg": {...}}
+    }
+"""
+import hashlib
+import io
+
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+PANORAMA_WIDTHS = (2048, 4096, 8192)
+THUMBNAIL_RATIO = 16 / 9
+
+FORMAT_OPTIONS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+    'avif': ('AVIF', 'avif', {'quality': 60}),
+}
+
+
+def output_formats():
+    return getattr(settings, 'TOUR_DERIVATIVE_FORMATS', ('webp', 'jpeg'))
+
+
+def _encode(image, format_name):
+    pil_format, _, options = FORMAT_OPTIONS[format_name]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def _store(data, name):
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(data))
+
+
+def base_path(scene, source_name):
+    """Storage prefix for derivatives of one source file."""
+    digest = hashlib.sha1(source_name.encode('utf-8')).hexdigest()[:12]
+    return f"derivatives/{scene.pk}-{digest}"
+
+
+def build_ladder(image, widths, prefix, label):
+    """
+    Resize ``image`` to every width in ``widths`` (never upscaling) and store
+    each in all configured formats. Returns ``{format: {width: name}}``.
+    """
+    ladder = {}
+    current = image
+    # Largest first so each step resizes from the previous, smaller image
+    for width in sorted(widths, reverse=True):
+        if width > image.width:
+            continue
+        height = round(image.height * width / image.width)
+        if current.width != width:
+            current = current.resize((width, height), Image.LANCZOS)
+        for format_name in output_formats():
+            extension = FORMAT_OPTIONS[format_name][1]
+            name = _store(_encode(current, format_name), f"{prefix}/{label}-{width}.{extension}")
+            ladder.setdefault(format_name, {})[str(width)] = name
+    for sizes in ladder.values():
+        # Keep ascending order so serialized maps read small -> large
+        items = sorted(sizes.items(), key=lambda item: int(item[0]))
+        sizes.clear()
+        sizes.update(items)
+    return ladder
+
+
+def thumbnail_from_panorama(panorama, width=THUMBNAIL_WIDTHS[-1]):
+    """Crop the centre of an equirectangular image to a 16:9 thumbnail."""
+    # Middle half of the horizontal field of view looks natural as a flat photo
+    crop_width = panorama.width // 2
+    crop_height = min(panorama.height, round(crop_width / THUMBNAIL_RATIO))
+    left = (panorama.width - crop_width) // 2
+    top = (panorama.height - crop_height) // 2
+    crop = panorama.crop((left, top, left + crop_width, top + crop_height))
+    if crop.width > width:
+        crop = crop.resize((width, round(width / THUMBNAIL_RATIO)), Image.LANCZOS)
+    return crop
+
+
+def store_thumbnail(thumbnail, prefix):
+    """Store an auto-generated thumbnail JPEG and return its storage name."""
+    return _store(_encode(thumbnail, 'jpeg'), f"{prefix}/thumbnail.jpg")
+
+
+def srcset_map(names, request=None):
+    """``{format: {"<width>w": url}}`` for a stored ladder."""
+    result = {}
+    for format_name, sizes in (names or {}).items():
+        urls = {}
+        for width, name in sizes.items():
+            url = default_storage.url(name)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            urls[f"{width}w"] = url
+        result[format_name] = urls
+    return result
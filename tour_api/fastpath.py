@@ -0,0 +1,263 @@
+"""
+Fast path untuk endpoint list & Pannellum config.
+
+Membangun JSON yang sama persis dengan ``SceneListSerializer`` dan
+``PannellumConfigSerializer`` langsung dari baris ``.values()`` dan prefix
+URL media yang dihitung sekali, tanpa membuat instance model maupun field
+DRF per objek. Serializer tetap menjadi acuan (lihat
+``scripts/benchmark_serializers.py`` yang membandingkan keduanya).
+"""
+from django.core.files.storage import default_storage
+from django.utils.encoding import filepath_to_uri
+
+from . import tiles
+from .models import Hotspot
+
+URL_PROBE = 'url-probe'
+
+SCENE_LIST_COLUMNS = (
+    'id', 'slug', 'title', 'thumbnail', 'derivatives', 'building', 'floor',
+    'floor_description', 'order', 'location', 'published_date', 'is_featured',
+    'dominant_color', 'blurhash', 'lqip',
+)
+PANNELLUM_COLUMNS = (
+    'id', 'slug', 'title', 'author', 'panorama_image', 'initial_pitch',
+    'initial_yaw', 'initial_fov', 'lqip', 'blurhash', 'is_featured',
+    'tiles_path', 'tile_resolution', 'tile_max_level', 'cube_resolution',
+)
+
+
+class MediaURL:
+    """
+    ``default_storage.url(name)`` (made absolute for ``request``) computed
+    from a prefix probed once. Storages whose URL is not ``prefix + name``
+    (signed URLs, ...) fall back to calling the storage per file.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        probe = default_storage.url(URL_PROBE)
+        self.prefix = probe[:-len(URL_PROBE)] if probe.endswith(URL_PROBE) else None
+        if self.prefix is not None and request is not None:
+            self.prefix = request.build_absolute_uri(self.prefix)
+
+    def __call__(self, name):
+        if self.prefix is not None:
+            return self.prefix + filepath_to_uri(name)
+        url = default_storage.url(name)
+        if self.request is not None:
+            url = self.request.build_absolute_uri(url)
+        return url
+
+    def srcset(self, names):
+        """Same output as ``derivatives.srcset_map``."""
+        return {
+            format_name: {f"{width}w": self(name) for width, name in sizes.items()}
+            for format_name, sizes in (names or {}).items()
+        }
+
+
+def _location_label(row):
+    if row['floor']:
+        return f"{row['building']}, Lantai {row['floor']}"
+    return f"{row['building']} (Area Outdoor)"
+
+
+# Columns read by computed fields; other fields read the column of their name
+FIELD_COLUMNS = {
+    'thumbnail_srcset': ('derivatives',),
+    'location_label': ('building', 'floor'),
+    'hotspots': (),
+}
+# Always selected: the keyset paginator reads the ordering columns from rows
+ORDERING_COLUMNS = ('id', 'building', 'floor', 'order', 'title')
+# Scenes whose hotspots are fetched together when embedding them
+HOTSPOT_BATCH_SIZE = 500
+
+FIELD_BUILDERS = {
+    'thumbnail': lambda row, media_url: media_url(row['thumbnail']) if row['thumbnail'] else None,
+    'thumbnail_srcset': lambda row, media_url: media_url.srcset((row['derivatives'] or {}).get('thumbnail')),
+    'location_label': lambda row, media_url: _location_label(row),
+    'published_date': lambda row, media_url: row['published_date'].isoformat() if row['published_date'] else None,
+}
+
+
+def scene_rows(queryset, fields=None):
+    """``.values()`` rows for ``scene_item`` (also carry every ordering column)."""
+    if fields is None:
+        return queryset.prefetch_related(None).values(*SCENE_LIST_COLUMNS)
+    columns = dict.fromkeys(ORDERING_COLUMNS)
+    for name in fields:
+        columns.update(dict.fromkeys(FIELD_COLUMNS.get(name, (name,))))
+    return queryset.prefetch_related(None).values(*columns)
+
+
+def scene_list(queryset, request=None, fields=None):
+    """``SceneListSerializer(queryset, many=True).data`` from ``.values()`` rows."""
+    return list(scene_items(scene_rows(queryset, fields), MediaURL(request), fields))
+
+
+def scene_items(rows, media_url, fields=None):
+    """
+    ``scene_item`` per row, lazily. With ``hotspots`` in ``fields`` their
+    hotspots are fetched per batch of rows.
+    """
+    if fields is None or 'hotspots' not in fields:
+        for row in rows:
+            yield scene_item(row, media_url, fields)
+        return
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == HOTSPOT_BATCH_SIZE:
+            yield from _with_hotspots(batch, media_url, fields)
+            batch = []
+    yield from _with_hotspots(batch, media_url, fields)
+
+
+def _with_hotspots(rows, media_url, fields):
+    if not rows:
+        return
+    hotspots = hotspot_items([row['id'] for row in rows])
+    for row in rows:
+        row['hotspots'] = hotspots.get(row['id'], [])
+        yield scene_item(row, media_url, fields)
+
+
+def scene_item(row, media_url, fields=None):
+    """
+    One ``SceneListSerializer`` item from a ``scene_rows`` row, limited to
+    ``fields`` when given.
+    """
+    if fields is not None:
+        return {
+            name: FIELD_BUILDERS[name](row, media_url) if name in FIELD_BUILDERS else row[name]
+            for name in fields
+        }
+    return {
+        'id': row['id'],
+        'slug': row['slug'],
+        'title': row['title'],
+        'thumbnail': media_url(row['thumbnail']) if row['thumbnail'] else None,
+        'thumbnail_srcset': media_url.srcset((row['derivatives'] or {}).get('thumbnail')),
+        'building': row['building'],
+        'floor': row['floor'],
+        'floor_description': row['floor_description'],
+        'location_label': _location_label(row),
+        'location': row['location'],
+        'published_date': row['published_date'].isoformat() if row['published_date'] else None,
+        'is_featured': row['is_featured'],
+        'dominant_color': row['dominant_color'],
+        'blurhash': row['blurhash'],
+        'lqip': row['lqip'],
+    }
+
+
+def hotspot_items(scene_ids):
+    """``HotspotSerializer`` items per scene id, in ``hotspots`` prefetch order."""
+    grouped = {}
+    rows = Hotspot.objects.filter(from_scene__in=scene_ids).values_list(
+        'id', 'from_scene_id', 'to_scene_id', 'hotspot_type', 'to_scene__slug',
+        'to_scene__title', 'text', 'info_description', 'pitch', 'yaw',
+    )
+    for (pk, from_scene_id, to_scene_id, hotspot_type, to_slug, to_title,
+         text, info_description, pitch, yaw) in rows:
+        grouped.setdefault(from_scene_id, []).append({
+            'id': pk,
+            'from_scene': from_scene_id,
+            'to_scene': to_scene_id,
+            'hotspot_type': hotspot_type,
+            'to_scene_slug': to_slug,
+            'to_scene_title': to_title,
+            'text': text,
+            'info_description': info_description,
+            'pitch': pitch,
+            'yaw': yaw,
+        })
+    return grouped
+
+
+def _hotspots_by_scene(queryset):
+    """
+    Hotspot rows per scene in the same order as the ``hotspots`` prefetch.
+    Scenes are selected with a subquery and targets with a join, so there is
+    no parameter list growing with the tour size.
+    """
+    grouped = {}
+    rows = Hotspot.objects.filter(from_scene__in=queryset.values('pk')).values_list(
+        'from_scene_id', 'pitch', 'yaw', 'hotspot_type', 'text', 'info_description', 'to_scene__slug'
+    )
+    for from_scene_id, pitch, yaw, hotspot_type, text, info_description, to_slug in rows:
+        hotspot = {
+            "pitch": pitch,
+            "yaw": yaw,
+            "type": "scene" if hotspot_type == 'scene' else "info",
+            "text": text,
+        }
+        if hotspot_type == 'scene' and to_slug is not None:
+            hotspot["sceneId"] = to_slug
+        elif hotspot_type == 'info':
+            hotspot["text"] = info_description or text
+        grouped.setdefault(from_scene_id, []).append(hotspot)
+    return grouped
+
+
+def pannellum_default(first_scene_slug):
+    """The ``default`` block of the Pannellum config."""
+    return {
+        "firstScene": first_scene_slug,
+        "sceneFadeDuration": 1000,
+        "autoLoad": True,
+        "showControls": True,
+        "compass": True,
+        "northOffset": 0
+    }
+
+
+def pannellum_scenes(queryset):
+    """``(row, scene_config)`` per scene of ``queryset``, in queryset order."""
+    queryset = queryset.prefetch_related(None)
+    scenes = list(queryset.values(*PANNELLUM_COLUMNS))
+    if not scenes:
+        return []
+
+    media_url = MediaURL()
+    hotspots = _hotspots_by_scene(queryset)
+    entries = []
+    for scene in scenes:
+        scene_config = {
+            "title": scene['title'],
+            "author": scene['author'],
+            "panorama": media_url(scene['panorama_image']) if scene['panorama_image'] else "",
+            "pitch": scene['initial_pitch'],
+            "yaw": scene['initial_yaw'],
+            "hfov": scene['initial_fov'],
+            "hotSpots": hotspots.get(scene['id'], []),
+        }
+        if scene['lqip']:
+            scene_config["preview"] = scene['lqip']
+            scene_config["blurhash"] = scene['blurhash']
+        if scene['tiles_path']:
+            scene_config["type"] = "multires"
+            scene_config["multiRes"] = tiles.multires_config(
+                media_url(scene['tiles_path']),
+                scene['tile_resolution'],
+                scene['tile_max_level'],
+                scene['cube_resolution'],
+            )
+        entries.append((scene, scene_config))
+    return entries
+
+
+def pannellum_config(queryset):
+    """``PannellumConfigSerializer(queryset).data`` from ``.values()`` rows."""
+    entries = pannellum_scenes(queryset)
+    if not entries:
+        return {}
+
+    first_scene = next((row for row, _ in entries if row['is_featured']), entries[0][0])
+    return {
+        "default": pannellum_default(first_scene['slug']),
+        "scenes": {row['slug']: scene_config for row, scene_config in entries},
+    }
@@ -0,0 +1,227 @@
+"""
+Pipeline pemrosesan media scene (dijalankan setiap panorama/thumbnail berubah).
+"""
+import hashlib
+import logging
+
+import PIL
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from . import derivatives, metadata, placeholders, tiles
+from .cache import mark_tour_changed
+
+logger = logging.getLogger(__name__)
+
+
+def memory_limit():
+    """Bytes a single media job may use for decoded image data (0 = no limit)."""
+    return getattr(settings, 'TOUR_MEDIA_MEMORY_LIMIT', 0)
+
+
+def open_image(field_file):
+    """
+    Open an ImageField file from storage and return a loaded RGB image,
+    decoded at reduced scale if needed to stay within ``memory_limit()``.
+    Raises ``metadata.ImageTooLarge`` for images that do not fit even then.
+    """
+    field_file.open('rb')
+    try:
+        image, original_size = metadata.open_bounded(field_file, memory_limit())
+        image.load()
+    finally:
+        field_file.close()
+    if image.size != original_size:
+        logger.info(
+            "Decoded %s at %dx%d (from %dx%d) to stay within TOUR_MEDIA_MEMORY_LIMIT",
+            field_file.name, image.width, image.height, *original_size
+        )
+    return image if image.mode == 'RGB' else image.convert('RGB')
+
+
+# Scene fields produced from the panorama alone (shareable between scenes
+# that use the same content-addressed file)
+PANORAMA_OUTPUT_FIELDS = (
+    'dominant_color',
+    'blurhash',
+    'lqip',
+    'tiles_path',
+    'tile_resolution',
+    'tile_max_level',
+    'cube_resolution',
+)
+
+
+# Bump when processing changes its output for the same source and settings
+PIPELINE_VERSION = 1
+
+
+def output_version():
+    """
+    Short hash of everything besides the source that shapes derived media
+    (pipeline version, encoder, tile size/quality, derivative formats and
+    widths).
+    """
+    parts = (
+        PIPELINE_VERSION, PIL.__version__,
+        tiles.tile_size(), tiles.TILE_EXTENSION, tiles.TILE_QUALITY,
+        tuple(derivatives.output_formats()),
+        [derivatives.FORMAT_OPTIONS[name] for name in derivatives.output_formats()],
+        derivatives.PANORAMA_WIDTHS, derivatives.THUMBNAIL_WIDTHS,
+    )
+    return hashlib.sha256(repr(parts).encode('utf-8')).hexdigest()[:12]
+
+
+def panorama_prefix(scene, kind):
+    """
+    Storage prefix for media derived from the panorama: keyed by content
+    hash plus ``output_version()`` for MediaBlob panoramas (so those names
+    never get different bytes and can be cached as immutable), otherwise
+    by scene and file name.
+    """
+    if scene.panorama_blob_id:
+        return f"{kind}/{scene.panorama_blob.sha256}-{output_version()}"
+    digest = hashlib.sha1(scene.panorama_image.name.encode('utf-8')).hexdigest()[:12]
+    return f"{kind}/{scene.pk}-{digest}"
+
+
+def tiles_base_path(scene):
+    """Storage prefix for a scene's tile pyramid."""
+    return panorama_prefix(scene, 'tiles')
+
+
+def processed_sibling(scene):
+    """Another scene whose outputs for the same panorama blob are ready."""
+    from .models import Scene
+
+    if not scene.panorama_blob_id:
+        return None
+    return Scene.objects.filter(
+        panorama_blob_id=scene.panorama_blob_id,
+        tiles_path=tiles_base_path(scene),
+    ).exclude(pk=scene.pk).first()
+
+
+def render_panorama(field_file, tiles_path, derivatives_prefix, with_thumbnail=False):
+    """
+    Decode a panorama once (within ``memory_limit()``) and produce every
+    output derived from it.
+
+    Returns ``(fields, ladder, thumbnail)``: values for
+    ``PANORAMA_OUTPUT_FIELDS``, the stored panorama ladder and a thumbnail
+    image (``None`` unless ``with_thumbnail``).
+    """
+    panorama = open_image(field_file)
+    fields = {
+        'dominant_color': metadata.dominant_color(panorama),
+        'blurhash': placeholders.blurhash(panorama),
+        'lqip': placeholders.lqip_data_uri(panorama),
+    }
+    ladder = derivatives.build_ladder(
+        panorama, derivatives.PANORAMA_WIDTHS, derivatives_prefix, 'pano'
+    )
+    thumbnail = derivatives.thumbnail_from_panorama(panorama) if with_thumbnail else None
+
+    # Tiles last: only the numpy copy is kept while projecting
+    source = tiles.image_to_array(panorama)
+    del panorama
+    pyramid = tiles.build_pyramid(source, tiles_path)
+    fields.update(
+        tiles_path=tiles_path,
+        tile_resolution=pyramid['tile_resolution'],
+        tile_max_level=pyramid['max_level'],
+        cube_resolution=pyramid['cube_resolution'],
+    )
+    return fields, ladder, thumbnail
+
+
+def process_scene_media(scene, changed=('panorama_image', 'thumbnail')):
+    """
+    Generate derived media for ``scene`` and persist the results.
+
+    ``changed`` names the image fields that were (re)uploaded; only the
+    outputs depending on them are rebuilt. Outputs of a panorama already
+    processed for another scene are copied instead of regenerated.
+    """
+    from . import changelog
+    from .models import Scene
+
+    changed = set(changed)
+    updates = {}
+    ladders = dict(scene.derivatives or {})
+    thumbnail = None
+
+    if 'panorama_image' in changed:
+        sibling = processed_sibling(scene)
+        # Replace missing (or previously generated) thumbnails
+        needs_thumbnail = not scene.thumbnail or ladders.get('thumbnail_auto')
+        if sibling is not None:
+            updates.update({field: getattr(sibling, field) for field in PANORAMA_OUTPUT_FIELDS})
+            ladders['panorama'] = sibling.derivatives.get('panorama', {})
+        else:
+            outputs, ladders['panorama'], thumbnail = render_panorama(
+                scene.panorama_image,
+                tiles_base_path(scene),
+                panorama_prefix(scene, 'derivatives'),
+                with_thumbnail=needs_thumbnail,
+            )
+            updates.update(outputs)
+
+        if scene.panorama_width is None:
+            # Panorama without a MediaBlob (e.g. assigned by path)
+            updates.update(metadata.scan(scene.panorama_image, with_color=False))
+
+        if needs_thumbnail:
+            ladders['thumbnail_auto'] = True
+            if sibling is not None and sibling.derivatives.get('thumbnail_auto'):
+                updates['thumbnail'] = sibling.thumbnail.name
+                ladders['thumbnail'] = sibling.derivatives.get('thumbnail', {})
+            else:
+                if thumbnail is None:
+                    thumbnail = derivatives.thumbnail_from_panorama(open_image(scene.panorama_image))
+                updates['thumbnail'] = derivatives.store_thumbnail(
+                    thumbnail, panorama_prefix(scene, 'derivatives')
+                )
+                changed.add('thumbnail')
+            scene.thumbnail.name = updates['thumbnail']
+    elif 'thumbnail' in changed:
+        ladders.pop('thumbnail_auto', None)
+
+    if 'thumbnail' in changed and scene.thumbnail:
+        if thumbnail is None:
+            thumbnail = open_image(scene.thumbnail)
+        if ladders.get('thumbnail_auto'):
+            prefix = panorama_prefix(scene, 'derivatives')
+        else:
+            prefix = derivatives.base_path(scene, scene.thumbnail.name)
+        ladders['thumbnail'] = derivatives.build_ladder(
+            thumbnail, derivatives.THUMBNAIL_WIDTHS, prefix, 'thumb'
+        )
+
+    updates['derivatives'] = ladders
+    # update() skips auto_now; conditional GET validators rely on it
+    updates['updated_at'] = timezone.now()
+    Scene.objects.filter(pk=scene.pk).update(**updates)
+    changelog.record(Scene, [scene.pk], 'update')
+    mark_tour_changed()
+    for field, value in updates.items():
+        if field != 'thumbnail':
+            setattr(scene, field, value)
+    scene.set_loaded_media()
+    logger.info("Processed %s for scene %s", ', '.join(sorted(changed)), scene.slug)
+
+
+def multires_for(scene, request=None):
+    """Pannellum multires block for ``scene`` or ``None`` if not generated yet."""
+    if not scene.tiles_path:
+        return None
+    base_url = default_storage.url(scene.tiles_path)
+    if request is not None:
+        base_url = request.build_absolute_uri(base_url)
+    return tiles.multires_config(
+        base_url,
+        scene.tile_resolution,
+        scene.tile_max_level,
+        scene.cube_resolution,
+    )
@@ -0,0 +1,83 @@
+"""
+Pembuatan scene & hotspot secara massal (bulk) untuk import tour dan seed.
+
+``bulk_create`` tidak memanggil ``Scene.save``, jadi langkah yang biasanya
+dilakukan di sana (slug, MediaBlob + reference count, metadata panorama, job
+media) dikerjakan di sini untuk seluruh batch sekaligus.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils.text import slugify
+
+from . import changelog
+from .cache import mark_tour_changed
+from .models import Hotspot, MediaBlob, Scene
+
+
+def create_tour(scenes, hotspots=()):
+    """
+    Insert unsaved ``scenes`` and ``hotspots`` in one transaction.
+
+    ``scenes`` must already point at stored files. ``hotspots`` are dicts of
+    Hotspot fields where ``from_scene``/``to_scene`` are slugs and may refer
+    to new or existing scenes. Scenes whose slug already exists are skipped.
+    Returns ``(created_scenes, created_hotspots)``.
+    """
+    from .jobs import enqueue_created_scenes
+
+    for scene in scenes:
+        if not scene.slug:
+            scene.slug = slugify(scene.title)
+    existing = set(Scene.objects.filter(
+        slug__in=[scene.slug for scene in scenes]
+    ).values_list('slug', flat=True))
+    scenes = [scene for scene in scenes if scene.slug not in existing]
+
+    blobs = {
+        blob.name: blob
+        for blob in MediaBlob.objects.filter(name__in=[scene.panorama_image.name for scene in scenes])
+    }
+    for scene in scenes:
+        blob = blobs.get(scene.panorama_image.name)
+        if blob is None:
+            continue
+        scene.panorama_blob = blob
+        scene.panorama_width = blob.width
+        scene.panorama_height = blob.height
+        scene.panorama_size = blob.size
+        scene.panorama_format = blob.format
+        scene.panorama_sha256 = blob.sha256
+
+    with transaction.atomic():
+        created = Scene.objects.bulk_create(scenes)
+        for blob_id, count in Counter(s.panorama_blob_id for s in created if s.panorama_blob_id).items():
+            MediaBlob.objects.filter(pk=blob_id).update(ref_count=F('ref_count') + count)
+
+        slugs = {hotspot['from_scene'] for hotspot in hotspots}
+        slugs |= {hotspot['to_scene'] for hotspot in hotspots if hotspot.get('to_scene')}
+        by_slug = Scene.objects.in_bulk(slugs, field_name='slug')
+        new_ids = {scene.pk for scene in created}
+
+        new_hotspots = []
+        for spec in hotspots:
+            from_scene = by_slug.get(spec['from_scene'])
+            # Hotspots of skipped (already imported) scenes are left alone
+            if from_scene is None or from_scene.pk not in new_ids:
+                continue
+            fields = dict(spec, from_scene=from_scene, to_scene=None)
+            if spec.get('to_scene'):
+                if spec['to_scene'] not in by_slug:
+                    raise ValueError(f"Hotspot {spec['from_scene']} -> {spec['to_scene']}: scene tujuan tidak ditemukan")
+                fields['to_scene'] = by_slug[spec['to_scene']]
+            new_hotspots.append(Hotspot(**fields))
+        created_hotspots = Hotspot.objects.bulk_create(new_hotspots)
+
+        enqueue_created_scenes(created)
+        # bulk_create sends no post_save, so the change log and cache are
+        # updated here
+        changelog.record(Scene, [scene.pk for scene in created], 'create')
+        changelog.record(Hotspot, [hotspot.pk for hotspot in created_hotspots], 'create')
+        mark_tour_changed()
+    return created, created_hotspots
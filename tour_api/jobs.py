@@ -0,0 +1,205 @@
+"""
+Antrian job media berbasis database (tanpa Redis/Celery).
+
+Job dibuat saat upload (``enqueue_*``) dan dijalankan oleh
+``manage.py run_media_worker``. Klaim job memakai UPDATE bersyarat pada
+status sehingga aman dijalankan di SQLite maupun PostgreSQL dengan lebih dari
+satu worker.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .metadata import ImageTooLarge
+from .models import MediaJob, Scene
+
+logger = logging.getLogger(__name__)
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2x base, 4x base ... capped."""
+    base = getattr(settings, 'TOUR_MEDIA_RETRY_BASE', 30)
+    cap = getattr(settings, 'TOUR_MEDIA_RETRY_MAX', 3600)
+    return timedelta(seconds=min(cap, base * 2 ** max(0, attempts - 1)))
+
+
+def enqueue(kind, scene=None, **payload):
+    """Create a pending job (or run it inline when TOUR_MEDIA_JOBS_EAGER)."""
+    job = MediaJob.objects.create(kind=kind, scene=scene, payload=payload)
+    if getattr(settings, 'TOUR_MEDIA_JOBS_EAGER', False):
+        execute(job)
+    return job
+
+
+def enqueue_scene_media(scene, changed):
+    """Queue media processing for ``scene``, merging with a pending job."""
+    pending = MediaJob.objects.filter(
+        kind='process_scene', scene=scene, status='pending'
+    ).first()
+    if pending is not None:
+        merged = set(pending.payload.get('changed', [])) | set(changed)
+        pending.payload = {'changed': sorted(merged)}
+        pending.save(update_fields=['payload', 'updated_at'])
+        return pending
+    return enqueue('process_scene', scene=scene, changed=sorted(changed))
+
+
+def enqueue_created_scenes(scenes):
+    """
+    Queue processing for scenes inserted with ``bulk_create`` (which skips
+    ``Scene.save`` and therefore its enqueue step).
+    """
+    created = MediaJob.objects.bulk_create([
+        MediaJob(
+            kind='process_scene',
+            scene=scene,
+            payload={'changed': sorted(field for field in Scene.MEDIA_FIELDS if getattr(scene, field))},
+        )
+        for scene in scenes if scene.panorama_image
+    ])
+    if getattr(settings, 'TOUR_MEDIA_JOBS_EAGER', False):
+        for job in created:
+            execute(job)
+    return created
+
+
+def enqueue_bundle_build():
+    """
+    Queue a rebuild of the static tour bundle, debounced: changes made while
+    a build is still pending are picked up by that build.
+
+    Eager mode debounces too: it builds inline at most once per
+    ``TOUR_BUNDLE_REBUILD_DELAY``; a change inside that window leaves the
+    job pending until the next change after it (or the worker) runs it.
+    """
+    if not getattr(settings, 'TOUR_BUNDLE_AUTO_REBUILD', True) or not _bundle_writable():
+        return None
+    now = timezone.now()
+    delay = timedelta(seconds=getattr(settings, 'TOUR_BUNDLE_REBUILD_DELAY', 30))
+    eager = getattr(settings, 'TOUR_MEDIA_JOBS_EAGER', False)
+    job = MediaJob.objects.filter(kind='build_bundle', status='pending').first()
+    if job is None:
+        recent = MediaJob.objects.filter(kind='build_bundle', status='done', updated_at__gt=now - delay)
+        job = MediaJob.objects.create(kind='build_bundle', run_after=now + delay)
+        if eager and not recent.exists():
+            execute(job)
+    elif eager and job.run_after <= now:
+        execute(job)
+    return job
+
+
+def _process_scene(job):
+    from .imaging import process_scene_media
+
+    scene = Scene.objects.get(pk=job.scene_id)
+    process_scene_media(scene, set(job.payload.get('changed', Scene.MEDIA_FIELDS)))
+
+
+def _purge_blob(job):
+    from .blobs import purge
+
+    purge(job.payload['blob_id'])
+
+
+def _bundle_writable():
+    from .bundle import writable
+
+    if writable():
+        return True
+    logger.info(
+        "STATIC_ROOT is read-only, tour bundle rebuild skipped; the deploy-time "
+        "bundle stays current.json and clients catch up through /api/changes/"
+    )
+    return False
+
+
+def _build_bundle(job):
+    from .bundle import build
+
+    # Queued before STATIC_ROOT became read-only (e.g. copied database)
+    if _bundle_writable():
+        build()
+
+
+HANDLERS = {
+    'process_scene': _process_scene,
+    'purge_blob': _purge_blob,
+    'build_bundle': _build_bundle,
+}
+
+
+def claim(limit):
+    """Atomically mark up to ``limit`` due jobs as running and return them."""
+    now = timezone.now()
+    candidates = MediaJob.objects.filter(
+        status='pending', run_after__lte=now
+    ).values_list('pk', flat=True)[:limit * 2]
+
+    claimed = []
+    for pk in candidates:
+        updated = MediaJob.objects.filter(pk=pk, status='pending').update(
+            status='running', locked_at=now, attempts=F('attempts') + 1
+        )
+        if updated:
+            claimed.append(MediaJob.objects.get(pk=pk))
+            if len(claimed) == limit:
+                break
+    return claimed
+
+
+def release_stale(timeout):
+    """Return jobs stuck in 'running' (crashed worker) to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=timeout)
+    return MediaJob.objects.filter(status='running', locked_at__lt=cutoff).update(
+        status='pending', locked_at=None
+    )
+
+
+def run(job_id):
+    """
+    Execute one job by id. Returns ``None`` on success or the formatted
+    traceback on failure, so it can be called from a worker process.
+    """
+    job = MediaJob.objects.select_related('scene').get(pk=job_id)
+    try:
+        HANDLERS[job.kind](job)
+    except ImageTooLarge:
+        # Retrying cannot help, fail on this attempt
+        MediaJob.objects.filter(pk=job_id).update(max_attempts=F('attempts'))
+        return traceback.format_exc()
+    except Exception:
+        return traceback.format_exc()
+    return None
+
+
+def finish(job, error=None):
+    """Record the outcome of a claimed job, scheduling a retry on failure."""
+    job.locked_at = None
+    if error is not None:
+        job.refresh_from_db(fields=['max_attempts'])
+    if error is None:
+        job.status = 'done'
+        job.last_error = ''
+    elif job.attempts >= job.max_attempts:
+        job.status = 'failed'
+        job.last_error = error
+        logger.error("Media job %s failed permanently:\n%s", job.pk, error)
+    else:
+        job.status = 'pending'
+        job.last_error = error
+        job.run_after = timezone.now() + retry_delay(job.attempts)
+        logger.warning("Media job %s failed (attempt %s), retrying", job.pk, job.attempts)
+    job.save(update_fields=['status', 'last_error', 'run_after', 'locked_at', 'updated_at'])
+
+
+def execute(job):
+    """Claim-less inline execution used in eager mode."""
+    job.status = 'running'
+    job.attempts += 1
+    job.locked_at = timezone.now()
+    job.save(update_fields=['status', 'attempts', 'locked_at', 'updated_at'])
+    finish(job, run(job.pk))
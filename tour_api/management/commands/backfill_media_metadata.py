@@ -0,0 +1,81 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from tour_api import changelog
+from tour_api.cache import mark_tour_changed
+from tour_api.imaging import memory_limit
+from tour_api.metadata import scan
+from tour_api.models import MediaBlob, Scene
+
+
+def _backfill(scene):
+    try:
+        values = scan(scene.panorama_image, limit=memory_limit())
+        Scene.objects.filter(pk=scene.pk).update(updated_at=timezone.now(), **values)
+        changelog.record(Scene, [scene.pk], 'update')
+        if scene.panorama_blob_id:
+            MediaBlob.objects.filter(pk=scene.panorama_blob_id, width__isnull=True).update(
+                width=values['panorama_width'],
+                height=values['panorama_height'],
+                format=values['panorama_format'],
+            )
+        return values
+    finally:
+        # Each thread has its own connection
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Fills panorama metadata columns (size, dimensions, hash, dominant colour) for existing scenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=8,
+            help='Number of scenes read from storage concurrently',
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Recompute metadata for every scene, not only missing ones',
+        )
+
+    def handle(self, *args, **options):
+        scenes = Scene.objects.exclude(panorama_image='')
+        if not options['force']:
+            scenes = scenes.filter(Q(panorama_width__isnull=True) | Q(dominant_color=''))
+        scenes = list(scenes.only('id', 'slug', 'panorama_image', 'panorama_blob'))
+        if not scenes:
+            self.stdout.write(self.style.SUCCESS('All scenes already have metadata.'))
+            return
+
+        self.stdout.write(f'Backfilling metadata for {len(scenes)} scenes...')
+        started = time.monotonic()
+        failed = 0
+        # Mostly storage I/O (and Pillow decoding, which releases the GIL)
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            futures = {executor.submit(_backfill, scene): scene for scene in scenes}
+            for future in as_completed(futures):
+                scene = futures[future]
+                try:
+                    values = future.result()
+                except Exception as exc:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(f'  ✗ {scene.slug}: {exc}'))
+                    continue
+                self.stdout.write(
+                    f"  ✓ {scene.slug}: {values['panorama_width']}x{values['panorama_height']} "
+                    f"{values['panorama_format']} {values.get('dominant_color', '')}"
+                )
+
+        mark_tour_changed()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {len(scenes) - failed} updated, {failed} failed in {elapsed:.1f}s'
+        ))
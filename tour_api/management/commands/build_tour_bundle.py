@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from tour_api import bundle
+
+
+class Command(BaseCommand):
+    help = 'Writes the full tour (list + details + Pannellum config) as a content-hashed static bundle'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--skip-unavailable',
+            action='store_true',
+            help='Exit successfully when the database cannot be read (e.g. during a build without DB access)',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            pointer = bundle.build()
+        except DatabaseError as exc:
+            if not options['skip_unavailable']:
+                raise CommandError(f'Database tidak bisa dibaca: {exc}')
+            self.stdout.write(self.style.WARNING(f'Bundle skipped, database unavailable: {exc}'))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Bundle {pointer['path']} ({pointer['size']} bytes) written to {bundle.bundle_root()}"
+        ))
@@ -0,0 +1,25 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tour_api import uploads
+
+
+class Command(BaseCommand):
+    help = 'Deletes abandoned chunked upload sessions, their parts and blobs no scene uses'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=None,
+            help='Idle seconds before a session counts as abandoned (default: TOUR_UPLOAD_EXPIRY)',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = None
+        if options['older_than'] is not None:
+            cutoff = timezone.now() - timedelta(seconds=options['older_than'])
+        sessions, purged = uploads.expire_sessions(cutoff)
+        self.stdout.write(self.style.SUCCESS(f'Removed {sessions} upload session(s) and {purged} unused blob(s)'))
@@ -0,0 +1,242 @@
+import csv
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.text import slugify
+
+from tour_api import blobs
+from tour_api.importer import create_tour
+from tour_api.metadata import prepare_panorama
+from tour_api.models import Hotspot, MediaBlob, Scene
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, CSV manifests work without it
+    yaml = None
+
+SCENE_FIELDS = (
+    'slug', 'title', 'description', 'building', 'floor', 'floor_description', 'order',
+    'location', 'published_date', 'author', 'is_active', 'is_featured',
+    'initial_pitch', 'initial_yaw', 'initial_fov',
+)
+HOTSPOT_FIELDS = ('hotspot_type', 'pitch', 'yaw', 'text', 'info_description')
+# Short manifest keys -> Hotspot fields
+HOTSPOT_ALIASES = {'from': 'from_scene', 'to': 'to_scene', 'type': 'hotspot_type', 'description': 'info_description'}
+
+
+def _convert(model, row, names):
+    """Keep known, non-empty columns and convert them with the model fields."""
+    values = {}
+    for name in names:
+        value = row.get(name)
+        if value is None or value == '':
+            continue
+        values[name] = model._meta.get_field(name).to_python(value)
+    return values
+
+
+class Command(BaseCommand):
+    help = 'Imports scenes and hotspots from a manifest (YAML/CSV) and a directory of panoramas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Directory containing the panorama files')
+        parser.add_argument(
+            '--manifest',
+            required=True,
+            help='tour.yaml or tour.csv (paths inside are relative to the directory)',
+        )
+        parser.add_argument(
+            '--hotspots',
+            help='Hotspot CSV (from,to,type,text,pitch,yaw,description) for CSV manifests',
+        )
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=getattr(settings, 'TOUR_MEDIA_WORKERS', None) or os.cpu_count() or 1,
+            help='Worker processes for hashing/validating panoramas and for --process',
+        )
+        parser.add_argument(
+            '--process',
+            action='store_true',
+            help='Run the queued media jobs (tiles, derivatives) right after importing',
+        )
+
+    def handle(self, *args, **options):
+        directory = options['directory']
+        if not os.path.isdir(directory):
+            raise CommandError(f'Directory not found: {directory}')
+        started = time.monotonic()
+
+        rows, hotspots = self.load_manifest(options['manifest'], options['hotspots'])
+        for row in rows:
+            row['slug'] = row.get('slug') or slugify(row.get('title', ''))
+            if not row['slug'] or not row.get('panorama'):
+                raise CommandError(f'Each scene needs a title/slug and a panorama: {row}')
+
+        # Check hotspot targets before anything is written to storage
+        targets = {spec['to_scene'] for spec in hotspots if spec['to_scene']}
+        known = {row['slug'] for row in rows}
+        known |= set(Scene.objects.filter(slug__in=targets - known).values_list('slug', flat=True))
+        if targets - known:
+            raise CommandError(f'Hotspot target scene(s) not found: {sorted(targets - known)}')
+
+        existing = set(Scene.objects.filter(
+            slug__in=[row['slug'] for row in rows]
+        ).values_list('slug', flat=True))
+        rows = [row for row in rows if row['slug'] not in existing]
+        if existing:
+            self.stdout.write(self.style.WARNING(f'Skipping {len(existing)} existing scene(s)'))
+        if not rows:
+            self.stdout.write(self.style.SUCCESS('Nothing to import.'))
+            return
+
+        scenes = []
+        for row in rows:
+            try:
+                scene = Scene(**_convert(Scene, row, SCENE_FIELDS))
+            except ValidationError as exc:
+                raise CommandError(f"Invalid scene {row['slug']}: {exc.messages[0]}")
+            if not scene.title:
+                scene.title = row['slug'].replace('-', ' ').title()
+            if not scene.published_date:
+                scene.published_date = timezone.now().date()
+            scenes.append(scene)
+
+        paths = sorted({os.path.join(directory, row['panorama']) for row in rows})
+        thumbnails = [os.path.join(directory, row['thumbnail']) for row in rows if row.get('thumbnail')]
+        missing = [path for path in paths + thumbnails if not os.path.isfile(path)]
+        if missing:
+            raise CommandError('File(s) not found:\n  ' + '\n  '.join(missing))
+
+        prepared, errors = self.prepare(paths, max(1, options['processes']))
+        if errors:
+            raise CommandError('Invalid panorama(s), nothing imported:\n  ' + '\n  '.join(errors))
+        prepare_seconds = time.monotonic() - started
+        total_bytes = sum(info['size'] for info in prepared.values())
+
+        known_digests = set(MediaBlob.objects.filter(
+            sha256__in=[info['sha256'] for info in prepared.values()]
+        ).values_list('sha256', flat=True))
+        new_blobs, thumbnail_names = [], []
+        try:
+            for row, scene in zip(rows, scenes):
+                path = os.path.join(directory, row['panorama'])
+                info = prepared[path]
+                with open(path, 'rb') as file:
+                    blob = blobs.store(
+                        File(file), os.path.basename(path),
+                        digest=info['sha256'], size=info['size'], header=info['header'],
+                    )
+                if blob.sha256 not in known_digests:
+                    known_digests.add(blob.sha256)
+                    new_blobs.append(blob.pk)
+                scene.panorama_image = blob.name
+                scene.dominant_color = info['dominant_color']
+                if row.get('thumbnail'):
+                    with open(os.path.join(directory, row['thumbnail']), 'rb') as file:
+                        scene.thumbnail = default_storage.save(
+                            f"thumbnails/{os.path.basename(row['thumbnail'])}", File(file)
+                        )
+                    thumbnail_names.append(scene.thumbnail.name)
+
+            try:
+                created, created_hotspots = create_tour(scenes, hotspots)
+            except ValueError as exc:
+                raise CommandError(str(exc))
+        except BaseException:
+            # Nothing was imported, so remove what this run stored
+            self.discard(new_blobs, thumbnail_names)
+            raise
+
+        elapsed = time.monotonic() - started
+        megabytes = total_bytes / (1024 * 1024)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(created)} scenes and {len(created_hotspots)} hotspots in {elapsed:.1f}s '
+            f'({len(created) / elapsed:.1f} scenes/s; {megabytes:.1f} MB inspected at '
+            f'{megabytes / max(prepare_seconds, 0.001):.1f} MB/s with {options["processes"]} process(es))'
+        ))
+
+        if options['process']:
+            call_command('run_media_worker', once=True, processes=options['processes'])
+        elif not getattr(settings, 'TOUR_MEDIA_JOBS_EAGER', False):
+            self.stdout.write('Media jobs queued, run `python manage.py run_media_worker` to process them.')
+
+    def discard(self, blob_ids, thumbnail_names):
+        """Delete the blobs and thumbnails stored by a failed import."""
+        for name in thumbnail_names:
+            default_storage.delete(name)
+        for blob_id in blob_ids:
+            # Kept if something else started using it meanwhile
+            blobs.purge(blob_id)
+        if blob_ids or thumbnail_names:
+            self.stderr.write(f'Import failed, removed {len(blob_ids)} panorama(s) and {len(thumbnail_names)} thumbnail(s)')
+
+    def prepare(self, paths, processes):
+        """Hash and validate every panorama on a process pool."""
+        prepared, errors = {}, []
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+        ) as executor:
+            limit = getattr(settings, 'TOUR_MEDIA_MEMORY_LIMIT', 0)
+            futures = {path: executor.submit(prepare_panorama, path, limit) for path in paths}
+            for path, future in futures.items():
+                try:
+                    prepared[path] = future.result()
+                except Exception as exc:
+                    errors.append(str(exc))
+        return prepared, errors
+
+    def load_manifest(self, manifest, hotspots_csv):
+        """Return ``(scene rows, hotspot specs)`` from a YAML or CSV manifest."""
+        if not os.path.isfile(manifest):
+            raise CommandError(f'Manifest not found: {manifest}')
+
+        if manifest.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise CommandError('YAML manifests need PyYAML (pip install pyyaml), or use CSV')
+            with open(manifest, encoding='utf-8') as file:
+                data = yaml.safe_load(file) or {}
+            defaults = data.get('defaults') or {}
+            rows, hotspot_rows = [], []
+            for entry in data.get('scenes') or []:
+                row = {**defaults, **entry}
+                row['slug'] = row.get('slug') or slugify(row.get('title', ''))
+                for hotspot in row.pop('hotspots', None) or []:
+                    hotspot_rows.append({'from': row['slug'], **hotspot})
+                rows.append(row)
+        else:
+            with open(manifest, newline='', encoding='utf-8') as file:
+                rows = list(csv.DictReader(file))
+            hotspot_rows = []
+            if hotspots_csv:
+                with open(hotspots_csv, newline='', encoding='utf-8') as file:
+                    hotspot_rows = list(csv.DictReader(file))
+
+        hotspots = []
+        for hotspot in hotspot_rows:
+            hotspot = {HOTSPOT_ALIASES.get(key, key): value for key, value in hotspot.items()}
+            if not hotspot.get('from_scene'):
+                raise CommandError(f'Hotspot without a source scene: {hotspot}')
+            if any(hotspot.get(name) in (None, '') for name in ('text', 'pitch', 'yaw')):
+                raise CommandError(f'Hotspot needs text, pitch and yaw: {hotspot}')
+            try:
+                spec = _convert(Hotspot, hotspot, HOTSPOT_FIELDS)
+            except ValidationError as exc:
+                raise CommandError(f'Invalid hotspot {hotspot}: {exc.messages[0]}')
+            spec.setdefault('hotspot_type', 'scene' if hotspot.get('to_scene') else 'info')
+            spec['from_scene'] = hotspot['from_scene']
+            spec['to_scene'] = hotspot.get('to_scene') or None
+            if spec['hotspot_type'] == 'scene' and not spec['to_scene']:
+                raise CommandError(f'Scene hotspot without a target: {hotspot}')
+            hotspots.append(spec)
+        return rows, hotspots
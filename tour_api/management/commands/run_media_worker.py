@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# NOTE: this module is imported by spawned worker processes before
+# django.setup(), so tour_api models must only be imported lazily.
+
+
+def _init_worker():
+    import django
+    django.setup()
+
+
+def _run_job(job_id):
+    from tour_api import jobs
+    try:
+        return jobs.run(job_id)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Runs queued media jobs (tiles, placeholders, derivatives) on a process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=getattr(settings, 'TOUR_MEDIA_WORKERS', None) or os.cpu_count() or 1,
+            help='Number of worker processes',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait between queue polls when idle',
+        )
+        parser.add_argument(
+            '--stale-after',
+            type=int,
+            default=getattr(settings, 'TOUR_MEDIA_JOB_TIMEOUT', 1800),
+            help='Requeue running jobs locked for longer than this (seconds)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit when the queue is empty instead of polling forever',
+        )
+
+    def handle(self, *args, **options):
+        from tour_api import jobs
+
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+        self.stdout.write(self.style.SUCCESS(f'Media worker started with {processes} process(es)'))
+
+        # Children open their own DB connections
+        connections.close_all()
+        pool = self._make_pool(processes)
+        running = {}
+        last_stale_check = 0
+
+        try:
+            while True:
+                if time.monotonic() - last_stale_check > 60:
+                    released = jobs.release_stale(options['stale_after'])
+                    if released:
+                        self.stdout.write(self.style.WARNING(f'Requeued {released} stale job(s)'))
+                    last_stale_check = time.monotonic()
+
+                free = processes - len(running)
+                if free > 0:
+                    for job in jobs.claim(free):
+                        self.stdout.write(f'Running {job}')
+                        try:
+                            running[pool.submit(_run_job, job.pk)] = job
+                        except BrokenProcessPool as exc:
+                            jobs.finish(job, repr(exc))
+                            pool.shutdown(wait=False, cancel_futures=True)
+                            pool = self._make_pool(processes)
+
+                if not running:
+                    if options['once']:
+                        break
+                    time.sleep(poll_interval)
+                    continue
+
+                done, _ = wait(running, timeout=poll_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._finish(running.pop(future), future)
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping media worker...'))
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            for future, job in running.items():
+                self._finish(job, future)
+
+    def _make_pool(self, processes):
+        return ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            max_tasks_per_child=50,
+        )
+
+    def _finish(self, job, future):
+        from tour_api import jobs
+
+        if future.cancelled():
+            error = 'Worker stopped before the job started'
+        else:
+            try:
+                error = future.result()
+            except Exception as exc:  # worker process died
+                error = repr(exc)
+        jobs.finish(job, error)
+        if error is None:
+            self.stdout.write(self.style.SUCCESS(f'Done {job}'))
+        else:
+            self.stdout.write(self.style.ERROR(f'Failed {job}: {error.strip().splitlines()[-1]}'))
@@ -1,6 +1,9 @@
 from django.core.management.base import BaseCommand
-from tour_api.models import Scene, Hotspot
+from tour_api import blobs
+from tour_api.importer import create_tour
+from tour_api.models import Scene
 from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from datetime import date
 import requests
 from io import BytesIO
@@ -72,7 +75,8 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.ERROR(f"Failed to download images for {loc_data['title']}"))
                 continue
             
-            scene = Scene(
+            blob = blobs.store(ContentFile(panorama_image.getvalue()), f"{loc_data['slug']}-pano.jpg")
+            scenes.append(Scene(
                 title=loc_data['title'],
                 slug=loc_data['slug'],
                 building=loc_data['building'],
@@ -85,49 +89,44 @@ class Command(BaseCommand):
                 initial_yaw=loc_data.get('initial_yaw', 0),
                 initial_fov=90,
                 is_active=True,
-                is_featured=(idx == 1)
-            )
-            
-            scene.panorama_image.save(
-                f"{loc_data['slug']}-pano.jpg",
-                ContentFile(panorama_image.getvalue()),
-                save=False
-            )
-            scene.thumbnail.save(
-                f"{loc_data['slug']}-thumb.jpg",
-                ContentFile(thumbnail_image.getvalue()),
-                save=False
-            )
-            
-            scene.save()
-            scenes.append(scene)
+                is_featured=(idx == 1),
+                panorama_image=blob.name,
+                thumbnail=default_storage.save(
+                    f"thumbnails/{loc_data['slug']}-thumb.jpg",
+                    ContentFile(thumbnail_image.getvalue())
+                ),
+            ))
 
+        hotspots = []
         if len(scenes) >= 2:
-            self.stdout.write("Linking scenes...")
-            Hotspot.objects.create(
-                from_scene=scenes[0],
-                to_scene=scenes[1],
-                hotspot_type='scene',
-                text='Ke Gedung MBZ',
-                pitch=0,
-                yaw=45,
-            )
-            Hotspot.objects.create(
-                from_scene=scenes[1],
-                to_scene=scenes[0],
-                hotspot_type='scene',
-                text='Ke Gedung Utama',
-                pitch=0,
-                yaw=-45,
-            )
+            hotspots += [
+                {
+                    'from_scene': scenes[0].slug,
+                    'to_scene': scenes[1].slug,
+                    'hotspot_type': 'scene',
+                    'text': 'Ke Gedung MBZ',
+                    'pitch': 0,
+                    'yaw': 45,
+                },
+                {
+                    'from_scene': scenes[1].slug,
+                    'to_scene': scenes[0].slug,
+                    'hotspot_type': 'scene',
+                    'text': 'Ke Gedung Utama',
+                    'pitch': 0,
+                    'yaw': -45,
+                },
+            ]
             for scene in scenes:
-                Hotspot.objects.create(
-                    from_scene=scene,
-                    hotspot_type='info',
-                    text='ℹ️ Info Gedung',
-                    info_description=f"Tentang {scene.building}",
-                    pitch=10,
-                    yaw=0,
-                )
+                hotspots.append({
+                    'from_scene': scene.slug,
+                    'hotspot_type': 'info',
+                    'text': 'ℹ️ Info Gedung',
+                    'info_description': f"Tentang {scene.building}",
+                    'pitch': 10,
+                    'yaw': 0,
+                })
         
-        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(scenes)} scenes!'))
+        self.stdout.write("Saving scenes and hotspots...")
+        created, _ = create_tour(scenes, hotspots)
+        self.stdout.write(self.style.SUCCESS(f'Successfully created {len(created)} scenes!'))
@@ -0,0 +1,190 @@
+"""
+Metadata gambar panorama yang disimpan sebagai kolom di database.
+
+Dibaca sekali saat upload/pemrosesan sehingga serializer dan validasi admin
+tidak perlu membuka file dari storage (yang di S3 berarti request jaringan).
+"""
+import hashlib
+import math
+
+from PIL import Image
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Peak bytes per pixel while processing a panorama: Pillow stores RGB as 4
+# bytes per pixel, and encoding a full-size WebP derivative needs ~6 more
+# (the numpy copy for tile projection, 3, comes after the image is freed).
+# Measured with scripts/benchmark_media_memory.py.
+WORKING_BYTES_PER_PIXEL = 10
+# Scales libjpeg can decode at directly (Image.draft); other formats can only
+# be decoded in full
+JPEG_REDUCTIONS = (1, 2, 4, 8)
+
+# Equirectangular panoramas must be 2:1 (allow small rounding differences)
+PANORAMA_RATIO = 2.0
+PANORAMA_RATIO_TOLERANCE = 0.02
+
+
+def read_header(file):
+    """
+    Return ``(width, height, format)`` by parsing only the image header.
+    Returns ``(None, None, '')`` if the file is not a readable image.
+    """
+    try:
+        file.seek(0)
+        with Image.open(file) as image:
+            width, height = image.size
+            image_format = image.format or ''
+    except Exception:
+        return None, None, ''
+    finally:
+        file.seek(0)
+    return width, height, image_format
+
+
+class ImageTooLarge(ValueError):
+    """Image cannot be decoded within the configured memory limit."""
+
+
+def reduction_for(width, height, limit, bytes_per_pixel=WORKING_BYTES_PER_PIXEL):
+    """
+    Smallest JPEG decode reduction that keeps ``width`` x ``height`` within
+    ``limit`` bytes, or ``None`` if even 1/8 scale does not fit.
+    """
+    for reduction in JPEG_REDUCTIONS:
+        pixels = math.ceil(width / reduction) * math.ceil(height / reduction)
+        if not limit or pixels * bytes_per_pixel <= limit:
+            return reduction
+    return None
+
+
+def decode_reduction(width, height, image_format, limit, bytes_per_pixel=WORKING_BYTES_PER_PIXEL):
+    """
+    Scale divisor that keeps processing the image within ``limit`` bytes, or
+    ``None`` if it cannot be processed at all.
+
+    JPEGs are decoded at the reduced scale directly. Other formats have no
+    partial decode (strip/tile decoding is not implemented), so they must fit
+    at full size.
+    """
+    reduction = reduction_for(width, height, limit, bytes_per_pixel)
+    if reduction is None or reduction == 1 or image_format == 'JPEG':
+        return reduction
+    return None
+
+
+def check_decodable(width, height, image_format, limit, bytes_per_pixel=WORKING_BYTES_PER_PIXEL):
+    """Raise ``ImageTooLarge`` if ``open_bounded`` would refuse this image."""
+    if decode_reduction(width, height, image_format, limit, bytes_per_pixel) is None:
+        raise ImageTooLarge(
+            f"Gambar {width}x{height} ({image_format}) butuh sekitar "
+            f"{width * height * bytes_per_pixel // (1024 * 1024)} MB untuk diproses, "
+            f"melebihi batas {limit // (1024 * 1024)} MB (TOUR_MEDIA_MEMORY_LIMIT). "
+            f"Gunakan JPEG atau perkecil resolusinya."
+        )
+
+
+def open_bounded(file, limit, bytes_per_pixel=WORKING_BYTES_PER_PIXEL):
+    """
+    Open an image so that processing it stays within ``limit`` bytes.
+
+    Returns ``(image, original_size)``, unloaded: call ``load()`` (or any
+    pixel operation) to decode. JPEGs are decoded at a reduced scale
+    (``Image.draft``); other formats over the limit raise ``ImageTooLarge``
+    from the header alone, before anything is decoded.
+    """
+    image = Image.open(file)
+    original_size = width, height = image.size
+    try:
+        check_decodable(width, height, image.format, limit, bytes_per_pixel)
+    except ImageTooLarge:
+        image.close()
+        raise
+    reduction = decode_reduction(width, height, image.format, limit, bytes_per_pixel)
+    if reduction > 1:
+        image.draft('RGB', (math.ceil(width / reduction), math.ceil(height / reduction)))
+    return image, original_size
+
+
+def is_equirectangular(width, height):
+    if not width or not height:
+        return False
+    return abs(width / height - PANORAMA_RATIO) <= PANORAMA_RATIO * PANORAMA_RATIO_TOLERANCE
+
+
+def dominant_color(image):
+    """Most common colour of ``image`` as ``#rrggbb``."""
+    sample = image.resize((64, 32), Image.BILINEAR).convert('RGB')
+    quantized = sample.quantize(colors=8, method=Image.Quantize.FASTOCTREE)
+    palette = quantized.getpalette()
+    _, index = max(quantized.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def _color_within(file, width, height, limit):
+    """Dominant colour from a small decode, ``''`` if it would exceed ``limit``."""
+    with Image.open(file) as image:
+        if image.format == 'JPEG':
+            # JPEG can decode at 1/8 scale, plenty for a single colour
+            image.draft('RGB', (width // 8, height // 8))
+        elif reduction_for(width, height, limit, bytes_per_pixel=4) != 1:
+            return ''
+        return dominant_color(image)
+
+
+def scan(field_file, with_color=True, limit=None):
+    """
+    Read every metadata column for a stored panorama in one pass over the
+    file. Returns a dict of ``Scene`` field values.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    field_file.open('rb')
+    try:
+        for chunk in iter(lambda: field_file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+        width, height, image_format = read_header(field_file)
+        values = {
+            'panorama_width': width,
+            'panorama_height': height,
+            'panorama_size': size,
+            'panorama_format': image_format,
+            'panorama_sha256': digest.hexdigest(),
+        }
+        if with_color and width:
+            values['dominant_color'] = _color_within(field_file, width, height, limit)
+    finally:
+        field_file.close()
+    return values
+
+
+def prepare_panorama(path, limit=None):
+    """
+    Hash and inspect a local panorama file (used by ``import_tour`` worker
+    processes, so no Django models or storage here).
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            size += len(chunk)
+        width, height, image_format = read_header(file)
+        if not width:
+            raise ValueError(f"{path}: bukan file gambar yang valid")
+        if not is_equirectangular(width, height):
+            raise ValueError(f"{path}: panorama harus rasio 2:1 (diterima {width}x{height})")
+        if limit:
+            try:
+                check_decodable(width, height, image_format, limit)
+            except ImageTooLarge as exc:
+                raise ValueError(f"{path}: {exc}") from None
+        color = _color_within(file, width, height, limit)
+    return {
+        'sha256': digest.hexdigest(),
+        'size': size,
+        'header': (width, height, image_format),
+        'dominant_color': color,
+    }
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0004_make_description_optional'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scene',
+            name='cube_resolution',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='tile_max_level',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='tile_resolution',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='tiles_path',
+            field=models.CharField(blank=True, editable=False, help_text='Lokasi tile pyramid cube-map di storage', max_length=255),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0005_scene_multires_tiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scene',
+            name='blurhash',
+            field=models.CharField(blank=True, editable=False, help_text='Blurhash panorama untuk placeholder', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='lqip',
+            field=models.TextField(blank=True, editable=False, help_text='Preview equirectangular ~64px sebagai data URI'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0006_scene_placeholders'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scene',
+            name='derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='Versi responsif (WebP/JPEG per lebar) thumbnail dan panorama'),
+        ),
+        migrations.AlterField(
+            model_name='scene',
+            name='thumbnail',
+            field=models.ImageField(blank=True, help_text='Thumbnail untuk galeri (landscape 16:9 recommended). Kosongkan untuk dibuat otomatis dari panorama.', upload_to='thumbnails/'),
+        ),
+    ]
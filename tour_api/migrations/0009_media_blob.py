@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0008_media_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('name', models.CharField(help_text='Path file di storage', max_length=255)),
+                ('size', models.PositiveBigIntegerField(help_text='Ukuran file (bytes)')),
+                ('ref_count', models.PositiveIntegerField(default=0, help_text='Jumlah scene yang memakai file ini')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Media Blob',
+                'verbose_name_plural': 'Media Blobs',
+            },
+        ),
+        migrations.AlterField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('process_scene', 'Proses media scene'), ('purge_blob', 'Hapus media blob')], default='process_scene', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_blob',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='scenes', to='tour_api.mediablob'),
+        ),
+    ]
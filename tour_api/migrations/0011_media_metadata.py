@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0010_upload_session'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mediablob',
+            name='format',
+            field=models.CharField(blank=True, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='mediablob',
+            name='height',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mediablob',
+            name='width',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='dominant_color',
+            field=models.CharField(blank=True, editable=False, help_text='Warna dominan panorama (#rrggbb)', max_length=7),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_format',
+            field=models.CharField(blank=True, editable=False, max_length=10),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_height',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_sha256',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_size',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, help_text='Ukuran file panorama (bytes)', null=True),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='panorama_width',
+            field=models.PositiveIntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
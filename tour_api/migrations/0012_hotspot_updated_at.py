@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0011_media_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hotspot',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='hotspot',
+            index=models.Index(fields=['updated_at'], name='tour_api_ho_updated_da3fde_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scene',
+            index=models.Index(fields=['updated_at'], name='tour_api_sc_updated_34d29b_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0012_hotspot_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PannellumSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(help_text='Validator tour saat snapshot dibangun', max_length=255)),
+                ('content', models.BinaryField()),
+                ('content_gzip', models.BinaryField()),
+                ('rebuilt_scenes', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Pannellum Snapshot',
+                'verbose_name_plural': 'Pannellum Snapshots',
+            },
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='pannellum_fragment',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='scene',
+            name='pannellum_fragment_token',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0013_pannellum_snapshot'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mediajob',
+            name='kind',
+            field=models.CharField(choices=[('process_scene', 'Proses media scene'), ('purge_blob', 'Hapus media blob'), ('build_bundle', 'Bangun bundle tour')], default='process_scene', max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:45
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    """One ``create`` entry per existing scene and hotspot so ``since=0`` is a full sync"""
+    ChangeLogEntry = apps.get_model('tour_api', 'ChangeLogEntry')
+    for model_name, model in (('scene', apps.get_model('tour_api', 'Scene')), ('hotspot', apps.get_model('tour_api', 'Hotspot'))):
+        ChangeLogEntry.objects.bulk_create(
+            (
+                ChangeLogEntry(model=model_name, object_id=pk, action='create')
+                for pk in model.objects.order_by('pk').values_list('pk', flat=True).iterator()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0014_mediajob_build_bundle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(choices=[('scene', 'Scene'), ('hotspot', 'Hotspot')], max_length=10)),
+                ('object_id', models.BigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Dibuat'), ('update', 'Diubah'), ('delete', 'Dihapus')], max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Change Log Entry',
+                'verbose_name_plural': 'Change Log Entries',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['model', 'object_id'], name='tour_api_ch_model_3a27c4_idx')],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
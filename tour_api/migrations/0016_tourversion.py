@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:20
+
+from django.db import migrations, models
+
+
+def create_version(apps, schema_editor):
+    """The single row ``tour_api.cache`` bumps on every change"""
+    TourVersion = apps.get_model('tour_api', 'TourVersion')
+    TourVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tour_api', '0015_changelog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TourVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Tour Version',
+                'verbose_name_plural': 'Tour Version',
+            },
+        ),
+        migrations.RunPython(create_version, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,40 @@
+import logging
+import math
+import uuid
+
+from django.conf import settings
 from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
 
+logger = logging.getLogger(__name__)
+
+class MediaBlob(models.Model):
+    """File panorama unik yang disimpan berdasarkan hash SHA-256 isinya"""
+    
+    sha256 = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255, help_text="Path file di storage")
+    size = models.PositiveBigIntegerField(help_text="Ukuran file (bytes)")
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    format = models.CharField(max_length=10, blank=True)
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Jumlah scene yang memakai file ini"
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Media Blob"
+        verbose_name_plural = "Media Blobs"
+    
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.ref_count} scene)"
+
+
 class Scene(models.Model):
     """Model untuk setiap lokasi 360° di kampus UNU Yogyakarta dengan support multi-floor navigation"""
     
@@ -60,10 +93,71 @@ class Scene(models.Model):
         upload_to='panoramas/', 
         help_text="Foto 360° dalam format equirectangular (2:1 ratio)"
     )
+    panorama_blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='scenes'
+    )
     thumbnail = models.ImageField(
         upload_to='thumbnails/',
-        help_text="Thumbnail untuk galeri (landscape 16:9 recommended)"
+        blank=True,
+        help_text="Thumbnail untuk galeri (landscape 16:9 recommended). Kosongkan untuk dibuat otomatis dari panorama."
+    )
+    derivatives = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        help_text="Versi responsif (WebP/JPEG per lebar) thumbnail dan panorama"
+    )
+    
+    # Panorama metadata (diisi saat upload, dibaca tanpa membuka file)
+    panorama_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    panorama_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    panorama_size = models.PositiveBigIntegerField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Ukuran file panorama (bytes)"
+    )
+    panorama_format = models.CharField(max_length=10, blank=True, editable=False)
+    panorama_sha256 = models.CharField(max_length=64, blank=True, editable=False)
+    dominant_color = models.CharField(
+        max_length=7,
+        blank=True,
+        editable=False,
+        help_text="Warna dominan panorama (#rrggbb)"
+    )
+    
+    # Placeholder (LQIP) - generated otomatis dari panorama_image
+    blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        editable=False,
+        help_text="Blurhash panorama untuk placeholder"
+    )
+    lqip = models.TextField(
+        blank=True,
+        editable=False,
+        help_text="Preview equirectangular ~64px sebagai data URI"
+    )
+    
+    # Multires tiles (generated otomatis dari panorama_image)
+    tiles_path = models.CharField(
+        max_length=255,
+        blank=True,
+        editable=False,
+        help_text="Lokasi tile pyramid cube-map di storage"
     )
+    tile_resolution = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    tile_max_level = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    cube_resolution = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    
+    # Materialized Pannellum entry (lihat tour_api.snapshot)
+    pannellum_fragment = models.TextField(blank=True, editable=False)
+    pannellum_fragment_token = models.CharField(max_length=255, blank=True, editable=False)
     
     # Metadata
     author = models.CharField(
@@ -107,12 +201,99 @@ class Scene(models.Model):
         indexes = [
             models.Index(fields=['building', 'floor']),
             models.Index(fields=['is_active', 'is_featured']),
+            # MAX(updated_at) validator for conditional GET (tour_api.conditional)
+            models.Index(fields=['updated_at']),
         ]
     
+    MEDIA_FIELDS = ('panorama_image', 'thumbnail')
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_media = {
+            name: instance.__dict__[name]
+            for name in cls.MEDIA_FIELDS if name in instance.__dict__
+        }
+        return instance
+    
+    def set_loaded_media(self):
+        """Remember current image names as the persisted state"""
+        self._loaded_media = {
+            name: getattr(self, name).name
+            for name in self.MEDIA_FIELDS if name in self.__dict__
+        }
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        loaded = getattr(self, '_loaded_media', {})
+        for name in self.MEDIA_FIELDS:
+            if (fields is None or name in fields) and name in self.__dict__:
+                loaded[name] = getattr(self, name).name
+        self._loaded_media = loaded
+    
+    def changed_media(self):
+        """Names of image fields that differ from the values loaded from the DB"""
+        if self._state.adding:
+            return {name for name in self.MEDIA_FIELDS if getattr(self, name)}
+        loaded = getattr(self, '_loaded_media', {})
+        return {
+            name for name in self.MEDIA_FIELDS
+            # Deferred fields that were never assigned are not in __dict__
+            if name in self.__dict__ and getattr(self, name).name != loaded.get(name)
+        }
+    
+    def _store_panorama_blob(self):
+        """Store a new panorama under its content hash, reusing identical files"""
+        from . import blobs
+        
+        panorama = self.panorama_image
+        if panorama and not panorama._committed:
+            blob = blobs.store(panorama.file, panorama.name)
+            panorama.name = blob.name
+            panorama._committed = True
+        elif panorama:
+            # Existing storage path assigned directly (e.g. seed commands)
+            blob = MediaBlob.objects.filter(name=panorama.name).first()
+        else:
+            blob = None
+        self.panorama_blob = blob
+        
+        # Metadata known from the blob; the media job fills in the rest
+        self.dominant_color = ''
+        if blob is not None:
+            self.panorama_width = blob.width
+            self.panorama_height = blob.height
+            self.panorama_size = blob.size
+            self.panorama_format = blob.format
+            self.panorama_sha256 = blob.sha256
+        else:
+            self.panorama_width = self.panorama_height = self.panorama_size = None
+            self.panorama_format = self.panorama_sha256 = ''
+    
     def save(self, *args, **kwargs):
+        from . import blobs
+        
         if not self.slug:
             self.slug = slugify(self.title)
+        changed = self.changed_media()
+        previous_blob_id = self.panorama_blob_id
+        if 'panorama_image' in changed:
+            self._store_panorama_blob()
+            # Re-uploading identical content keeps the same name
+            changed = self.changed_media()
         super().save(*args, **kwargs)
+        self.set_loaded_media()
+        
+        if self.panorama_blob_id != previous_blob_id:
+            if self.panorama_blob_id:
+                blobs.acquire(self.panorama_blob_id)
+            if previous_blob_id:
+                blobs.release(previous_blob_id)
+        
+        if changed and self.panorama_image:
+            # Heavy image work runs in the media worker, not in the request
+            from .jobs import enqueue_scene_media
+            enqueue_scene_media(self, changed)
     
     def __str__(self):
         """Human-readable string with floor info"""
@@ -179,11 +360,15 @@ class Hotspot(models.Model):
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['from_scene', 'hotspot_type']
         verbose_name = "Hotspot"
         verbose_name_plural = "Hotspots"
+        indexes = [
+            models.Index(fields=['updated_at']),
+        ]
     
     def __str__(self):
         if self.hotspot_type == 'scene' and self.to_scene:
@@ -196,3 +381,187 @@ class Hotspot(models.Model):
             raise ValidationError({
                 'to_scene': 'Scene link hotspot harus memiliki tujuan scene'
             })
+
+
+class MediaJob(models.Model):
+    """Antrian job pemrosesan media, dijalankan oleh `manage.py run_media_worker`"""
+    
+    KIND_CHOICES = [
+        ('process_scene', 'Proses media scene'),
+        ('purge_blob', 'Hapus media blob'),
+        ('build_bundle', 'Bangun bundle tour'),
+    ]
+    STATUS_CHOICES = [
+        ('pending', 'Menunggu'),
+        ('running', 'Diproses'),
+        ('done', 'Selesai'),
+        ('failed', 'Gagal'),
+    ]
+    
+    scene = models.ForeignKey(
+        Scene,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='media_jobs'
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, default='process_scene')
+    payload = models.JSONField(default=dict, blank=True)
+    
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['run_after', 'id']
+        verbose_name = "Media Job"
+        verbose_name_plural = "Media Jobs"
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+    
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.status})"
+
+
+class UploadSession(models.Model):
+    """Sesi upload panorama bertahap (chunked & resumable) dari admin"""
+    
+    STATUS_CHOICES = [
+        ('uploading', 'Uploading'),
+        ('complete', 'Complete'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField(help_text="Ukuran total file (bytes)")
+    chunk_size = models.PositiveIntegerField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='uploading')
+    blob = models.ForeignKey(
+        MediaBlob,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='upload_sessions'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True
+    )
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Upload Session"
+        verbose_name_plural = "Upload Sessions"
+    
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+    
+    @property
+    def total_chunks(self):
+        return max(1, math.ceil(self.size / self.chunk_size))
+    
+    def received_chunks(self):
+        return list(self.chunks.order_by('index').values_list('index', flat=True))
+    
+    def missing_chunks(self):
+        received = set(self.received_chunks())
+        return [index for index in range(self.total_chunks) if index not in received]
+
+
+class UploadChunk(models.Model):
+    """Satu potongan file yang sudah diterima dan diverifikasi checksum-nya"""
+    
+    session = models.ForeignKey(UploadSession, on_delete=models.CASCADE, related_name='chunks')
+    index = models.PositiveIntegerField()
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveIntegerField()
+    
+    class Meta:
+        ordering = ['session', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['session', 'index'], name='unique_upload_chunk'),
+        ]
+    
+    def __str__(self):
+        return f"{self.session_id} #{self.index}"
+
+
+class PannellumSnapshot(models.Model):
+    """Config Pannellum multi-scene yang sudah di-serialize (dan di-gzip), lihat tour_api.snapshot"""
+    
+    token = models.CharField(max_length=255, help_text="Validator tour saat snapshot dibangun")
+    content = models.BinaryField()
+    content_gzip = models.BinaryField()
+    rebuilt_scenes = models.PositiveIntegerField(default=0)
+    
+    # Timestamps
+    built_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Pannellum Snapshot"
+        verbose_name_plural = "Pannellum Snapshots"
+    
+    def __str__(self):
+        return f"Pannellum snapshot {self.built_at:%d %b %Y %H:%M}"
+
+
+class ChangeLogEntry(models.Model):
+    """Jejak perubahan Scene/Hotspot (termasuk tombstone hapus) untuk /api/changes/, lihat tour_api.changelog"""
+    
+    MODEL_CHOICES = [
+        ('scene', 'Scene'),
+        ('hotspot', 'Hotspot'),
+    ]
+    ACTION_CHOICES = [
+        ('create', 'Dibuat'),
+        ('update', 'Diubah'),
+        ('delete', 'Dihapus'),
+    ]
+    
+    # The auto-increment id is the change token clients sync from
+    model = models.CharField(max_length=10, choices=MODEL_CHOICES)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    
+    # Timestamps
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log Entries"
+        indexes = [
+            models.Index(fields=['model', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"#{self.pk} {self.model} {self.object_id} {self.action}"
+
+
+class TourVersion(models.Model):
+    """Versi global konten tour (satu baris), dinaikkan setiap Scene/Hotspot berubah, lihat tour_api.cache"""
+    
+    version = models.PositiveBigIntegerField(default=1)
+    
+    # Timestamps
+    changed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Tour Version"
+        verbose_name_plural = "Tour Version"
+    
+    def __str__(self):
+        return f"Tour version {self.version}"
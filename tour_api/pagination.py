@@ -0,0 +1,230 @@
+"""
+Pagination opt-in dan streaming untuk listing API.
+
+Tanpa ``?cursor=`` / ``?page_size=`` respons tetap array penuh seperti
+sebelumnya (kontrak frontend). Cursor memakai keyset pada ``Meta.ordering``
+model (relasi di-expand ke ordering model tujuannya, ditambah ``pk`` sebagai
+tie-breaker), jadi stabil walaupun ada insert di tengah paging. NULL
+diurutkan seperti default database (paling besar di PostgreSQL, paling kecil
+di SQLite/MySQL), jadi urutan halaman sama dengan listing tanpa pagination.
+
+``?stream=1`` mengirim array JSON yang dibangun dari
+``queryset.iterator(chunk_size=...)`` sehingga memori tetap datar.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import F, Q
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from .renderers import TourJSONRenderer
+
+
+def _is_nullable(model, path):
+    nullable = False
+    for name in path.split('__'):
+        # get_field() also resolves attnames such as ``from_scene_id``
+        field = model._meta.get_field(name)
+        nullable = nullable or field.null
+        if field.is_relation:
+            model = field.related_model
+    return nullable
+
+
+def keyset_ordering(model, ordering=None, prefix=''):
+    """
+    ``[(path, descending, nullable)]`` for ``ordering`` (default: the
+    model's), relations expanded to the related model's ordering plus its
+    id, ending with the primary key.
+    """
+    keys = []
+    for name in ordering if ordering is not None else model._meta.ordering:
+        descending = name.startswith('-')
+        name = name.lstrip('-')
+        field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+        if field.is_relation and field.many_to_one:
+            for path, desc, _ in keyset_ordering(field.related_model, prefix=f'{prefix}{name}__'):
+                keys.append((path, desc != descending, None))
+            keys.append((f'{prefix}{field.attname}', descending, None))
+        else:
+            keys.append((f'{prefix}{field.attname}', descending, None))
+    if not prefix:
+        pk = model._meta.pk.attname
+        keys = [key for key in keys if key[0] != pk] + [(pk, False, None)]
+        # Several relation paths can repeat the same column
+        seen = set()
+        keys = [key for key in keys if not (key[0] in seen or seen.add(key[0]))]
+        keys = [(path, desc, _is_nullable(model, path)) for path, desc, _ in keys]
+    return keys
+
+
+def _value(item, path):
+    if isinstance(item, dict):
+        return item[path]
+    for name in path.split('__'):
+        item = getattr(item, name)
+    return item
+
+
+class TourCursorPagination(BasePagination):
+    """
+    Keyset cursor pagination, active only when the request asks for it.
+
+    Response: ``{"next": url, "previous": url, "results": [...]}``.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'TOUR_API_PAGE_SIZE', 100)
+        self.max_page_size = getattr(settings, 'TOUR_API_MAX_PAGE_SIZE', 1000)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(1, size), self.max_page_size)
+
+    def encode_cursor(self, position, reverse=False):
+        raw = json.dumps({'p': position, 'r': reverse}, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            position, reverse = data['p'], bool(data.get('r'))
+        except (binascii.Error, ValueError, TypeError, KeyError):
+            raise NotFound('Cursor tidak valid')
+        if not isinstance(position, list) or len(position) != len(self.keys):
+            raise NotFound('Cursor tidak valid')
+        return position, reverse
+
+    def _nulls_after(self, descending):
+        # NULL sorts above every value on some backends, below on others
+        return self.nulls_largest != descending
+
+    def _after(self, position, keys):
+        """Rows strictly after ``position`` in ``keys`` order (NULLs where the database puts them)."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (path, descending, nullable), value in zip(keys, position):
+            nulls_after = self._nulls_after(descending)
+            if value is None:
+                later = Q(pk__in=[]) if nulls_after else Q(**{f'{path}__isnull': False})
+                same = Q(**{f'{path}__isnull': True})
+            else:
+                later = Q(**{f'{path}__{"lt" if descending else "gt"}': value})
+                if nullable and nulls_after:
+                    later |= Q(**{f'{path}__isnull': True})
+                same = Q(**{path: value})
+            condition |= equal & later
+            equal &= same
+        return condition
+
+    def _order_by(self, keys):
+        orders = []
+        for path, descending, _ in keys:
+            # Explicit, so a reversed page mirrors the forward one exactly
+            nulls = {'nulls_last': True} if self._nulls_after(descending) else {'nulls_first': True}
+            orders.append(F(path).desc(**nulls) if descending else F(path).asc(**nulls))
+        return orders
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.keys = keyset_ordering(queryset.model)
+        self.nulls_largest = connections[queryset.db].features.nulls_order_largest
+        position, reverse = self.decode_cursor(request)
+        size = self.get_page_size(request)
+
+        keys = [(path, not desc if reverse else desc, nullable) for path, desc, nullable in self.keys]
+        queryset = queryset.order_by(*self._order_by(keys))
+        if position is not None:
+            queryset = queryset.filter(self._after(position, keys))
+        page = list(queryset[:size + 1])
+        has_more = len(page) > size
+        page = page[:size]
+        if reverse:
+            page.reverse()
+
+        def position_of(item):
+            return [_value(item, path) for path, _, _ in self.keys]
+
+        if reverse:
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, position is not None
+        self.next_cursor = self.previous_cursor = None
+        if page:
+            if has_next:
+                self.next_cursor = self.encode_cursor(position_of(page[-1]))
+            if has_previous:
+                self.previous_cursor = self.encode_cursor(position_of(page[0]), reverse=True)
+        elif position is not None:
+            # Past the end: let the client step back from where it was
+            self.previous_cursor = self.encode_cursor(position, reverse=not reverse)
+        return page
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.next_cursor),
+            'previous': self._link(self.previous_cursor),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+def wants_stream(request):
+    return request.query_params.get('stream') in ('1', 'true') and request.accepted_renderer.format == 'json'
+
+
+def stream_json_array(items, represent):
+    """
+    ``StreamingHttpResponse`` with the same bytes JSONRenderer would produce
+    for ``[represent(item) for item in items]``, rendered one item at a time.
+    """
+    renderer = TourJSONRenderer()
+
+    def chunks():
+        yield b'['
+        for index, item in enumerate(items):
+            yield (b',' if index else b'') + renderer.render(represent(item))
+        yield b']'
+
+    return StreamingHttpResponse(chunks(), content_type='application/json')
+
+
+def stream_chunk_size():
+    return getattr(settings, 'TOUR_API_STREAM_CHUNK_SIZE', 2000)
+
@@ -0,0 +1,24 @@
+"""
+Parser body request MessagePack (``Content-Type: application/msgpack``).
+
+Pasangan ``tour_api.renderers.MessagePackRenderer``; didaftarkan di
+``REST_FRAMEWORK`` hanya bila paket ``msgpack`` terpasang.
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, MessagePackParser is only registered when installed
+    msgpack = None
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack-serialized request data."""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.UnpackException) as exc:
+            raise ParseError(f'MessagePack parse error - {str(exc) or type(exc).__name__}')
@@ -0,0 +1,102 @@
+"""
+Placeholder ringan (LQIP) untuk scene: blurhash + preview JPEG inline.
+
+Keduanya cukup kecil untuk dikirim langsung di response API sehingga client
+bisa menampilkan sesuatu sebelum thumbnail/panorama selesai di-download.
+"""
+import base64
+import io
+import math
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+BLURHASH_CHARACTERS = (
+    "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    "abcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+)
+
+# Equirectangular images are 2:1, so use twice as many horizontal components.
+BLURHASH_COMPONENTS = (6, 3)
+BLURHASH_SAMPLE_SIZE = (64, 32)
+
+LQIP_WIDTH = 64
+LQIP_QUALITY = 40
+
+
+def _encode83(value, length):
+    result = ''
+    for i in range(1, length + 1):
+        digit = (int(value) // 83 ** (length - i)) % 83
+        result += BLURHASH_CHARACTERS[digit]
+    return result
+
+
+def _srgb_to_linear(values):
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value):
+    v = max(0.0, min(1.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * math.pow(v, 1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(math.pow(abs(value), exponent), value)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """Encode a PIL image as a blurhash string."""
+    x_components, y_components = components
+    sample = image.resize(BLURHASH_SAMPLE_SIZE, Image.BILINEAR).convert('RGB')
+    pixels = _srgb_to_linear(np.asarray(sample, dtype=np.float64))
+    height, width = pixels.shape[:2]
+
+    factors = []
+    for j in range(y_components):
+        basis_y = np.cos(np.pi * j * np.arange(height) / height)
+        for i in range(x_components):
+            basis_x = np.cos(np.pi * i * np.arange(width) / width)
+            basis = np.outer(basis_y, basis_x)
+            normalisation = 1 if i == 0 and j == 0 else 2
+            factor = (pixels * basis[..., None]).sum(axis=(0, 1)) * normalisation / (width * height)
+            factors.append(tuple(factor))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_max = max(abs(v) for factor in ac for v in factor)
+        quantised_max = int(max(0, min(82, math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _encode83(0, 1)
+
+    r, g, b = (_linear_to_srgb(v) for v in dc)
+    result += _encode83((r << 16) + (g << 8) + b, 4)
+
+    for factor in ac:
+        quantised = [
+            int(max(0, min(18, math.floor(_sign_pow(v / max_value, 0.5) * 9 + 9.5))))
+            for v in factor
+        ]
+        result += _encode83(quantised[0] * 19 * 19 + quantised[1] * 19 + quantised[2], 2)
+
+    return result
+
+
+def lqip_data_uri(image, width=LQIP_WIDTH, quality=LQIP_QUALITY):
+    """Tiny blurred JPEG preview of ``image`` as a ``data:`` URI."""
+    height = max(1, round(image.height * width / image.width))
+    preview = image.resize((width, height), Image.BILINEAR).convert('RGB')
+    preview = preview.filter(ImageFilter.GaussianBlur(1))
+
+    buffer = io.BytesIO()
+    preview.save(buffer, 'JPEG', quality=quality, optimize=True)
+    encoded = base64.b64encode(buffer.getvalue()).decode('ascii')
+    return f"data:image/jpeg;base64,{encoded}"
@@ -0,0 +1,103 @@
+"""
+Renderer JSON cepat untuk API tour.
+
+``TourJSONRenderer`` memakai orjson bila terpasang dan menghasilkan bytes
+yang sama persis dengan ``rest_framework.renderers.JSONRenderer``. Bagian
+yang formatnya berbeda di orjson ditangani di sini:
+
+- float yang oleh ``repr()`` Python ditulis dengan eksponen (< 1e-4 atau
+  >= 1e16) -> seluruh dokumen dirender ulang dengan stdlib ``json``;
+- U+2028/U+2029 di-escape seperti DRF;
+- tipe lain (``Decimal``, lazy string, queryset, ...) lewat
+  ``JSONEncoder.default`` milik DRF.
+
+Tanpa orjson, atau untuk output ber-indent (browsable API), renderer DRF
+biasa dipakai. Beda satu-satunya: NaN/Infinity menjadi ``null`` alih-alih
+error.
+
+``CompactJSONRenderer`` mengirim data yang sama dalam format kolom
+(``?format=compact``), lihat tour_api.compact. ``MessagePackRenderer``
+mengirimnya sebagai MessagePack (``application/msgpack``) dengan float
+tetap double biner.
+"""
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the stdlib renderer is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, MessagePackRenderer is only registered when installed
+    msgpack = None
+
+from . import compact
+
+# Floats orjson may format differently from float.__repr__ are those in
+# exponent notation ("1e16" vs "1e+16") or below 1e-4 ("0.00001" vs
+# "1e-05"). With digits deleted and number punctuation mapped to ",", every
+# exponent contains ",e,". C-level byte scans instead of a regex; text
+# inside strings can match too, which only costs a stdlib render.
+NUMBER_PUNCTUATION = bytes.maketrans(b'.-:[]}', b',,,,,,')
+DIGITS = b'0123456789'
+
+
+class TourJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` with the same output, encoded by orjson when available."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+            or not (self.compact and not self.ensure_ascii and self.strict)
+            or self.encoder_class is not JSONEncoder
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z,
+            )
+        except (orjson.JSONEncodeError, TypeError):
+            # e.g. integers over 64 bits
+            return super().render(data, accepted_media_type, renderer_context)
+        # Shorter than ret (no digits) and still holds any U+2028/U+2029
+        stripped = ret.translate(NUMBER_PUNCTUATION, DIGITS)
+        if b',e,' in stripped or b'0.0000' in ret:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same escaping as JSONRenderer (both are valid JSON but break JS)
+        if b'\xe2\x80' in stripped:
+            ret = ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+        return ret
+
+
+class CompactJSONRenderer(TourJSONRenderer):
+    """Columnar form of the same data, see ``tour_api.compact``."""
+    media_type = 'application/vnd.unutour.compact+json'
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return super().render(compact.encode(data), accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """The same data as ``TourJSONRenderer``, packed as MessagePack."""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Dates, Decimal, lazy strings, ... become what the JSON output holds;
+        # floats are packed as float64
+        return msgpack.packb(data, default=JSONEncoder().default, use_bin_type=True)
@@ -1,5 +1,15 @@
+import os
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Scene, Hotspot
+from . import changelog
+from .cache import mark_tour_changed
+from .models import Scene, Hotspot, UploadSession
+from .imaging import multires_for
+from .derivatives import srcset_map
 
 
 class HotspotSerializer(serializers.ModelSerializer):
@@ -38,9 +48,199 @@ class HotspotSerializer(serializers.ModelSerializer):
         return data
 
 
-class SceneListSerializer(serializers.ModelSerializer):
+class _BulkSceneField(serializers.PrimaryKeyRelatedField):
+    """``PrimaryKeyRelatedField`` resolved from ``context['scenes']``, loaded once per bulk request"""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return self.context['scenes'][int(data)]
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except KeyError:
+            self.fail('does_not_exist', pk_value=data)
+
+
+class HotspotBulkItemSerializer(HotspotSerializer):
+    """One create/update of a bulk request; ``from_scene`` comes from the request"""
+    to_scene = _BulkSceneField(queryset=Scene.objects.all(), allow_null=True, required=False)
+
+    class Meta(HotspotSerializer.Meta):
+        fields = [name for name in HotspotSerializer.Meta.fields if name != 'from_scene']
+
+
+class HotspotBulkSerializer(serializers.Serializer):
+    """
+    Create/update/delete operations on the hotspots of one scene.
+
+    Every operation is validated before anything is written (referenced
+    scenes and hotspots are loaded in one query each); errors are reported
+    per operation index. ``save()`` applies all of them in one transaction.
+    """
+    OPERATIONS = ('create', 'update', 'delete')
+
+    from_scene = serializers.PrimaryKeyRelatedField(queryset=Scene.objects.all())
+    operations = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_operations(self, operations):
+        max_operations = settings.TOUR_API_HOTSPOT_BULK_MAX_OPERATIONS
+        if len(operations) > max_operations:
+            raise serializers.ValidationError(f"Maksimal {max_operations} operasi per request")
+        return operations
+
+    def validate(self, attrs):
+        scene, operations = attrs['from_scene'], attrs['operations']
+        ids = [_int_or_none(operation.get('id')) for operation in operations]
+        existing = scene.hotspots.in_bulk([pk for pk in ids if pk is not None])
+        targets = [_int_or_none(operation.get('to_scene')) for operation in operations]
+        context = dict(self.context, scenes=Scene.objects.in_bulk([pk for pk in targets if pk is not None]))
+
+        errors, plan, seen = {}, [], set()
+        for index, (operation, pk) in enumerate(zip(operations, ids)):
+            kind = operation.get('op')
+            data = {name: value for name, value in operation.items() if name not in ('op', 'id')}
+            if kind not in self.OPERATIONS:
+                errors[index] = {'op': [f"Harus salah satu dari: {', '.join(self.OPERATIONS)}"]}
+                continue
+            if kind == 'create':
+                instance, item = None, HotspotBulkItemSerializer(data=data, context=context)
+            elif pk not in existing:
+                errors[index] = {'id': [f"Hotspot {operation.get('id')} tidak ditemukan di scene ini"]}
+                continue
+            elif pk in seen:
+                errors[index] = {'id': [f"Hotspot {pk} muncul di lebih dari satu operasi"]}
+                continue
+            else:
+                seen.add(pk)
+                instance = existing[pk]
+                if kind == 'delete':
+                    plan.append((kind, instance, None))
+                    continue
+                item = HotspotBulkItemSerializer(instance, data=data, partial=True, context=context)
+
+            if item.is_valid():
+                plan.append((kind, instance, item.validated_data))
+            else:
+                errors[index] = item.errors
+
+        if errors:
+            raise serializers.ValidationError({'operations': errors})
+        attrs['plan'] = plan
+        return attrs
+
+    def create(self, validated_data):
+        scene, plan = validated_data['from_scene'], validated_data['plan']
+        now = timezone.now()
+        created = [Hotspot(from_scene=scene, **data) for kind, _, data in plan if kind == 'create']
+        updated, fields = [], {'updated_at'}
+        for kind, instance, data in plan:
+            if kind == 'update':
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                # bulk_update skips auto_now
+                instance.updated_at = now
+                updated.append(instance)
+                fields.update(data)
+        deleted = [instance.pk for kind, instance, _ in plan if kind == 'delete']
+
+        with transaction.atomic():
+            created = Hotspot.objects.bulk_create(created)
+            if updated:
+                Hotspot.objects.bulk_update(updated, sorted(fields))
+            # bulk_create/bulk_update send no post_save: log the changes, touch
+            # the scene and invalidate the cache here (see tour_api.signals)
+            changelog.record(Hotspot, [hotspot.pk for hotspot in created], 'create')
+            changelog.record(Hotspot, [hotspot.pk for hotspot in updated], 'update')
+            Scene.objects.filter(pk=scene.pk).update(updated_at=now)
+            mark_tour_changed()
+            if deleted:
+                Hotspot.objects.filter(pk__in=deleted).delete()
+        return {'from_scene': scene, 'created': created, 'updated': updated, 'deleted': deleted}
+
+
+def _int_or_none(value):
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _names(params, key):
+    return [name.strip() for name in params.get(key, '').split(',') if name.strip()]
+
+
+def requested_fields(params, default_fields, expandable=(), resource_fields=()):
+    """
+    Output fields asked for with ``?fields=``, ``?include=`` and
+    ``?exclude=`` (comma separated), or ``None`` when none is given.
+    ``expandable`` fields are only returned when included explicitly.
+    Names in ``resource_fields`` (other representations of the same
+    resource) are accepted and ignored; any other unknown name is an error.
+    """
+    if not any(key in params for key in ('fields', 'include', 'exclude')):
+        return None
+
+    known = list(default_fields) + [name for name in expandable if name not in default_fields]
+    valid = set(known).union(resource_fields)
+    requested = {key: _names(params, key) for key in ('fields', 'include', 'exclude')}
+    unknown = {
+        key: [f"Field tidak dikenal: {name}" for name in names if name not in valid]
+        for key, names in requested.items()
+    }
+    unknown = {key: errors for key, errors in unknown.items() if errors}
+    if unknown:
+        raise serializers.ValidationError(unknown)
+
+    selected = set(requested['fields'] if 'fields' in params else default_fields)
+    selected = selected.union(requested['include']).difference(requested['exclude'])
+    # Serializer field order, whatever order they were asked in
+    return [name for name in known if name in selected]
+
+
+class SparseFieldsMixin:
+    """
+    Serializer yang bisa dibatasi ke sebagian field (``fields=[...]``).
+
+    ``extra_columns`` memetakan field turunan ke kolom model yang dibacanya,
+    dipakai ``columns_for`` untuk ``QuerySet.only()``. ``optional_fields``
+    hanya dikirim bila diminta.
+    """
+    extra_columns = {}
+    optional_fields = []
+    
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None:
+            fields = self.default_fields()
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+    
+    @classmethod
+    def default_fields(cls):
+        return [name for name in cls.Meta.fields if name not in cls.optional_fields]
+    
+    @classmethod
+    def columns_for(cls, fields):
+        """Model columns needed to render ``fields`` (relations excluded)."""
+        model = cls.Meta.model
+        concrete = {field.name for field in model._meta.concrete_fields}
+        serializer_fields = cls(fields=cls.Meta.fields).fields
+        columns = []
+        for name in fields:
+            if name in cls.extra_columns:
+                columns.extend(cls.extra_columns[name])
+            elif serializer_fields[name].source in concrete:
+                columns.append(serializer_fields[name].source)
+        return list(dict.fromkeys(columns))
+
+
+class SceneListSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer untuk list view - dipakai di galeri thumbnail dengan floor info"""
     location_label = serializers.ReadOnlyField()
+    thumbnail_srcset = serializers.SerializerMethodField()
     
     class Meta:
         model = Scene
@@ -49,24 +249,44 @@ class SceneListSerializer(serializers.ModelSerializer):
             'slug', 
             'title', 
             'thumbnail',
+            'thumbnail_srcset',
             'building',
             'floor',
             'floor_description',
             'location_label',
             'location',
             'published_date',
-            'is_featured'
+            'is_featured',
+            'dominant_color',
+            'blurhash',
+            'lqip'
         ]
+    
+    extra_columns = {
+        'thumbnail_srcset': ['derivatives'],
+        'location_label': ['building', 'floor'],
+    }
+    
+    def get_thumbnail_srcset(self, obj):
+        """Responsive thumbnail URLs: {format: {"320w": url, ...}}"""
+        return srcset_map(obj.derivatives.get('thumbnail'), self.context.get('request'))
 
 
-class SceneDetailSerializer(serializers.ModelSerializer):
+class SceneDetailSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """Serializer untuk detail view - data lengkap untuk viewer"""
+    # Hotspot types that lead to another scene
+    NAVIGATION_TYPES = ('scene', 'floor')
+    
     hotspots = HotspotSerializer(many=True, read_only=True)
     location_label = serializers.ReadOnlyField()
     
     # URL fields (akan otomatis resolve ke full URL)
     panorama_image = serializers.ImageField(use_url=True)
     thumbnail = serializers.ImageField(use_url=True)
+    thumbnail_srcset = serializers.SerializerMethodField()
+    panorama_srcset = serializers.SerializerMethodField()
+    multires = serializers.SerializerMethodField()
+    neighbors = serializers.SerializerMethodField()
     
     class Meta:
         model = Scene
@@ -83,14 +303,75 @@ class SceneDetailSerializer(serializers.ModelSerializer):
             'published_date', 
             'author',
             'panorama_image', 
+            'panorama_srcset',
+            'panorama_width',
+            'panorama_height',
+            'panorama_size',
+            'panorama_format',
+            'panorama_sha256',
             'thumbnail', 
+            'thumbnail_srcset',
             'initial_pitch',
             'initial_yaw',
             'initial_fov',
+            'multires',
+            'dominant_color',
+            'blurhash',
+            'lqip',
             'is_featured',
             'hotspots',
-            'created_at'
+            'created_at',
+            'neighbors'
         ]
+    
+    optional_fields = ['neighbors']
+    extra_columns = {
+        'thumbnail_srcset': ['derivatives'],
+        'panorama_srcset': ['derivatives'],
+        'location_label': ['building', 'floor'],
+        'multires': ['tiles_path', 'tile_resolution', 'tile_max_level', 'cube_resolution'],
+    }
+    
+    def get_thumbnail_srcset(self, obj):
+        """Responsive thumbnail URLs: {format: {"320w": url, ...}}"""
+        return srcset_map(obj.derivatives.get('thumbnail'), self.context.get('request'))
+    
+    def get_panorama_srcset(self, obj):
+        """Panorama variants (2k/4k/8k): {format: {"2048w": url, ...}}"""
+        return srcset_map(obj.derivatives.get('panorama'), self.context.get('request'))
+    
+    def get_multires(self, obj):
+        """Tile pyramid info (null until processing has finished)"""
+        return multires_for(obj, self.context.get('request'))
+    
+    def get_neighbors(self, obj):
+        """
+        Scenes reachable through navigation hotspots (once each, hotspot
+        order) with what the viewer needs to warm them up.
+        """
+        request = self.context.get('request')
+        neighbors = {}
+        for hotspot in obj.hotspots.all():
+            target = hotspot.to_scene
+            if (hotspot.hotspot_type not in self.NAVIGATION_TYPES or target is None
+                    or not target.is_active or target.pk in neighbors):
+                continue
+            panorama = target.panorama_image.url if target.panorama_image else None
+            if panorama and request is not None:
+                panorama = request.build_absolute_uri(panorama)
+            neighbors[target.pk] = {
+                'slug': target.slug,
+                'title': target.title,
+                'panorama': panorama,
+                'panorama_srcset': srcset_map(target.derivatives.get('panorama'), request),
+                'dominant_color': target.dominant_color,
+                'blurhash': target.blurhash,
+                'lqip': target.lqip,
+                'initial_pitch': target.initial_pitch,
+                'initial_yaw': target.initial_yaw,
+                'initial_fov': target.initial_fov,
+            }
+        return list(neighbors.values())
 
 
 class PannellumConfigSerializer(serializers.Serializer):
@@ -146,6 +427,17 @@ class PannellumConfigSerializer(serializers.Serializer):
                 "hotSpots": []
             }
             
+            # Inline placeholder shown while the panorama loads
+            if scene.lqip:
+                scene_config["preview"] = scene.lqip
+                scene_config["blurhash"] = scene.blurhash
+            
+            # Use the tile pyramid when available; panorama stays as fallback
+            multires = multires_for(scene)
+            if multires:
+                scene_config["type"] = "multires"
+                scene_config["multiRes"] = multires
+            
             # Add hotspots
             for hotspot in scene.hotspots.all():
                 hotspot_config = {
@@ -165,3 +457,48 @@ class PannellumConfigSerializer(serializers.Serializer):
             config["scenes"][scene.slug] = scene_config
         
         return config
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    """Serializer untuk sesi upload panorama bertahap"""
+    total_chunks = serializers.ReadOnlyField()
+    received = serializers.SerializerMethodField()
+    blob_name = serializers.CharField(source='blob.name', read_only=True, allow_null=True)
+    blob_url = serializers.SerializerMethodField()
+    
+    ALLOWED_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.tif', '.tiff')
+    
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id',
+            'filename',
+            'size',
+            'chunk_size',
+            'total_chunks',
+            'received',
+            'status',
+            'blob_name',
+            'blob_url',
+        ]
+        read_only_fields = ['id', 'chunk_size', 'status']
+    
+    def get_received(self, obj):
+        return obj.received_chunks()
+    
+    def get_blob_url(self, obj):
+        return default_storage.url(obj.blob.name) if obj.blob else None
+    
+    def validate_filename(self, value):
+        if os.path.splitext(value)[1].lower() not in self.ALLOWED_EXTENSIONS:
+            raise serializers.ValidationError('Format file panorama tidak didukung')
+        return os.path.basename(value)
+    
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError('Ukuran file tidak valid')
+        if value > settings.TOUR_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(
+                f'Ukuran file maksimal {settings.TOUR_UPLOAD_MAX_SIZE // (1024 * 1024)} MB'
+            )
+        return value
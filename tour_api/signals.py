@@ -0,0 +1,62 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import changelog
+from .cache import mark_tour_changed
+from .models import Hotspot, Scene
+
+
+@receiver(post_delete, sender=Scene)
+def release_panorama_blob(sender, instance, **kwargs):
+    """Drop the deleted scene's reference to its content-addressed panorama"""
+    if instance.panorama_blob_id:
+        from .blobs import release
+        release(instance.panorama_blob_id)
+
+
+@receiver(post_save, sender=Scene)
+@receiver(post_delete, sender=Scene)
+@receiver(post_save, sender=Hotspot)
+@receiver(post_delete, sender=Hotspot)
+def invalidate_tour_cache(sender, **kwargs):
+    """Bump the tour version once the transaction commits (see tour_api.cache)"""
+    mark_tour_changed()
+
+
+@receiver(post_save, sender=Scene)
+@receiver(post_save, sender=Hotspot)
+def log_saved(sender, instance, created, **kwargs):
+    """Change log entry in the same transaction as the write (see tour_api.changelog)"""
+    changelog.record(sender, [instance.pk], 'create' if created else 'update')
+
+
+@receiver(pre_save, sender=Scene)
+def remember_link_text(sender, instance, **kwargs):
+    """Slug and title before the save (see log_linking_hotspots)"""
+    instance._saved_link_text = None
+    if not instance._state.adding:
+        instance._saved_link_text = Scene.objects.filter(pk=instance.pk).values_list('slug', 'title').first()
+
+
+@receiver(post_save, sender=Scene)
+def log_linking_hotspots(sender, instance, created, **kwargs):
+    """Hotspots embed their target's slug and title: log them when those change"""
+    saved = getattr(instance, '_saved_link_text', None)
+    if created or saved is None or saved == (instance.slug, instance.title):
+        return
+    changelog.record(Hotspot, Hotspot.objects.filter(to_scene=instance).values_list('pk', flat=True), 'update')
+
+
+@receiver(post_delete, sender=Scene)
+@receiver(post_delete, sender=Hotspot)
+def log_deleted(sender, instance, **kwargs):
+    """Tombstone so synced clients drop the record; cascaded hotspots get their own"""
+    changelog.record(sender, [instance.pk], 'delete')
+
+
+@receiver(post_save, sender=Hotspot)
+@receiver(post_delete, sender=Hotspot)
+def touch_hotspot_scene(sender, instance, **kwargs):
+    """Advance the parent scene's updated_at so its Last-Modified moves, also on delete"""
+    Scene.objects.filter(pk=instance.from_scene_id).update(updated_at=timezone.now())
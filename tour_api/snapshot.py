@@ -0,0 +1,171 @@
+"""
+Snapshot config Pannellum yang dimaterialisasi.
+
+Setiap scene menyimpan entry JSON-nya sendiri (``Scene.pannellum_fragment``)
+bersama token dari ``updated_at`` scene, hotspot dan scene tujuan hotspot.
+Dokumen lengkap disimpan di ``PannellumSnapshot`` (JSON + gzip) dengan token
+validator tour (lihat tour_api.conditional), lalu endpoint cukup mengirim
+bytes tersimpan.
+
+Snapshot ditulis hanya oleh ``rebuild()``: dari hook setelah commit perubahan
+tour (``tour_api.cache.mark_tour_changed``) dan saat build bundle, di bawah
+row lock, jadi request GET tidak pernah menulis ke database. Hanya entry
+scene yang tokennya berbeda yang di-serialize ulang; sisanya digabung apa
+adanya. Bila snapshot tersimpan belum cocok dengan token (mis. sebelum hook
+selesai, atau prefix media berubah), ``get_snapshot()`` menyusun dokumen di
+memori tanpa menyimpannya.
+
+Token dibaca sebelum data, jadi perubahan di tengah rebuild paling buruk
+menyebabkan rebuild berikutnya, bukan snapshot basi.
+"""
+import gzip
+import hashlib
+
+from django.db import transaction
+from django.db.models import Count, Max
+
+from . import fastpath
+from .conditional import tour_validators
+from .models import PannellumSnapshot, Scene
+from .renderers import TourJSONRenderer
+
+SNAPSHOT_ID = 1
+# Changed scenes are re-serialized in batches of this many ids
+REBUILD_BATCH_SIZE = 500
+GZIP_LEVEL = 6
+
+
+def _render(data):
+    # Same bytes as the API's JSON renderer, so fragments concatenate into
+    # exactly what rendering the whole document would produce
+    return TourJSONRenderer().render(data)
+
+
+def _digest(*parts):
+    return hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def _fragment_token(row, media_prefix):
+    return _digest(
+        row['updated_at'].isoformat(),
+        row['hotspot_count'],
+        row['hotspot_updated'] and row['hotspot_updated'].isoformat(),
+        row['target_updated'] and row['target_updated'].isoformat(),
+        media_prefix,
+    )
+
+
+def _active_scenes():
+    return Scene.objects.filter(is_active=True)
+
+
+def _refresh_fragments(rows, media_prefix, save=True):
+    """Re-serialize the entries of ``rows`` whose token changed; returns their count."""
+    tokens = {row['id']: _fragment_token(row, media_prefix) for row in rows}
+    stale = [row['id'] for row in rows if row['pannellum_fragment_token'] != tokens[row['id']]]
+    if not stale:
+        return 0
+
+    if len(stale) == len(rows):
+        batches = [_active_scenes()]
+    else:
+        batches = [
+            _active_scenes().filter(pk__in=stale[start:start + REBUILD_BATCH_SIZE])
+            for start in range(0, len(stale), REBUILD_BATCH_SIZE)
+        ]
+    fragments = {}
+    for queryset in batches:
+        for row, scene_config in fastpath.pannellum_scenes(queryset):
+            fragments[row['id']] = _render(scene_config).decode()
+
+    if save:
+        Scene.objects.bulk_update(
+            [
+                Scene(pk=pk, pannellum_fragment=fragment, pannellum_fragment_token=tokens[pk])
+                for pk, fragment in fragments.items()
+            ],
+            ['pannellum_fragment', 'pannellum_fragment_token'],
+            batch_size=REBUILD_BATCH_SIZE,
+        )
+    for row in rows:
+        if row['id'] in fragments:
+            row['pannellum_fragment'] = fragments[row['id']]
+    # Scenes deleted/deactivated since ``rows`` was read have no entry
+    stale = set(stale) - set(fragments)
+    rows[:] = [row for row in rows if row['id'] not in stale]
+    return len(fragments)
+
+
+def _token(tour_token=None):
+    if tour_token is None:
+        tour_token, _ = tour_validators()
+    return _digest(tour_token, fastpath.MediaURL().prefix or '')
+
+
+def _build(token, save):
+    """Unsaved snapshot for ``token``; ``save`` stores the refreshed fragments."""
+    media_prefix = fastpath.MediaURL().prefix or ''
+    rows = list(_active_scenes().annotate(
+        hotspot_count=Count('hotspots', distinct=True),
+        hotspot_updated=Max('hotspots__updated_at'),
+        target_updated=Max('hotspots__to_scene__updated_at'),
+    ).values(
+        'id', 'slug', 'is_featured', 'updated_at', 'hotspot_count', 'hotspot_updated',
+        'target_updated', 'pannellum_fragment', 'pannellum_fragment_token',
+    # Meta.ordering is not applied to GROUP BY queries
+    ).order_by(*Scene._meta.ordering))
+    rebuilt = _refresh_fragments(rows, media_prefix, save)
+
+    if rows:
+        first_scene = next((row for row in rows if row['is_featured']), rows[0])
+        content = b''.join([
+            b'{"default":',
+            _render(fastpath.pannellum_default(first_scene['slug'])),
+            b',"scenes":{',
+            b','.join(
+                _render(row['slug']) + b':' + row['pannellum_fragment'].encode()
+                for row in rows
+            ),
+            b'}}',
+        ])
+    else:
+        content = _render({})
+
+    return PannellumSnapshot(
+        pk=SNAPSHOT_ID,
+        token=token,
+        content=content,
+        content_gzip=gzip.compress(content, GZIP_LEVEL, mtime=0) if save else None,
+        rebuilt_scenes=rebuilt,
+    )
+
+
+def rebuild():
+    """
+    Store the snapshot of the current tour unless it is already stored.
+    Concurrent calls serialize on the snapshot row.
+    """
+    with transaction.atomic():
+        PannellumSnapshot.objects.get_or_create(pk=SNAPSHOT_ID, defaults={'token': '', 'content': b''})
+        stored = PannellumSnapshot.objects.select_for_update().get(pk=SNAPSHOT_ID)
+        # Read under the lock: a rebuild that waited sees the one before it
+        token = _token()
+        if stored.token == token:
+            return stored
+        snapshot = _build(token, save=True)
+        snapshot.save()
+    return snapshot
+
+
+def get_snapshot(tour_token=None):
+    """
+    Current snapshot without writing: the stored one, or (until
+    ``rebuild()`` has stored it) one assembled in memory with
+    ``content_gzip=None``. Pass the token of ``tour_validators()`` when the
+    caller already computed it.
+    """
+    token = _token(tour_token)
+    snapshot = PannellumSnapshot.objects.filter(pk=SNAPSHOT_ID, token=token).first()
+    if snapshot is None:
+        snapshot = _build(token, save=False)
+    return snapshot
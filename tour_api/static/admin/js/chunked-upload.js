@@ -0,0 +1,144 @@
+// Chunked & resumable panorama upload for the Scene admin form
+(function () {
+    'use strict';
+
+    const MAX_RETRIES = 3;
+
+    document.addEventListener('DOMContentLoaded', function () {
+        const fileInput = document.getElementById('id_panorama_image');
+        const uploadInput = document.getElementById('id_panorama_upload');
+        if (!fileInput || !uploadInput || typeof UPLOAD_API === 'undefined') {
+            return;
+        }
+
+        const status = document.createElement('div');
+        status.className = 'chunked-upload-status help';
+        fileInput.parentNode.appendChild(status);
+
+        fileInput.addEventListener('change', function () {
+            const file = fileInput.files[0];
+            if (file) {
+                uploadFile(file, fileInput, uploadInput, status);
+            }
+        });
+    });
+
+    function storageKey(file) {
+        return `unutour-upload:${file.name}:${file.size}:${file.lastModified}`;
+    }
+
+    function request(method, url, body, headers) {
+        return fetch(url, {
+            method: method,
+            headers: Object.assign({ 'X-CSRFToken': UPLOAD_CSRF_TOKEN }, headers || {}),
+            body: body,
+            credentials: 'same-origin'
+        }).then(response => {
+            if (!response.ok) {
+                return response.json().catch(() => ({})).then(err => {
+                    const error = new Error(err.detail || `HTTP ${response.status}`);
+                    error.status = response.status;
+                    throw error;
+                });
+            }
+            return response.json();
+        });
+    }
+
+    async function sha256Hex(buffer) {
+        const digest = await crypto.subtle.digest('SHA-256', buffer);
+        return Array.from(new Uint8Array(digest))
+            .map(b => b.toString(16).padStart(2, '0'))
+            .join('');
+    }
+
+    async function openSession(file) {
+        const saved = localStorage.getItem(storageKey(file));
+        if (saved) {
+            try {
+                const session = await request('GET', `${UPLOAD_API}${saved}/`);
+                if (session.status === 'uploading' || session.status === 'complete') {
+                    return session;
+                }
+            } catch (e) {
+                console.log('Previous upload session not found, starting over');
+            }
+        }
+        const session = await request(
+            'POST',
+            UPLOAD_API,
+            JSON.stringify({ filename: file.name, size: file.size }),
+            { 'Content-Type': 'application/json' }
+        );
+        localStorage.setItem(storageKey(file), session.id);
+        return session;
+    }
+
+    async function sendChunk(session, file, index) {
+        const start = index * session.chunk_size;
+        const buffer = await file.slice(start, start + session.chunk_size).arrayBuffer();
+        const checksum = await sha256Hex(buffer);
+
+        for (let attempt = 1; ; attempt++) {
+            try {
+                return await request(
+                    'PUT',
+                    `${UPLOAD_API}${session.id}/chunks/${index}/`,
+                    buffer,
+                    { 'Content-Type': 'application/octet-stream', 'X-Chunk-SHA256': checksum }
+                );
+            } catch (error) {
+                if (attempt >= MAX_RETRIES || (error.status && error.status < 500)) {
+                    throw error;
+                }
+                await new Promise(resolve => setTimeout(resolve, 1000 * 2 ** attempt));
+            }
+        }
+    }
+
+    function setSubmitting(disabled) {
+        document.querySelectorAll('.submit-row input[type="submit"]').forEach(button => {
+            button.disabled = disabled;
+        });
+    }
+
+    async function uploadFile(file, fileInput, uploadInput, status) {
+        setSubmitting(true);
+        uploadInput.value = '';
+        try {
+            const session = await openSession(file);
+            const received = new Set(session.received);
+            let done = received.size;
+
+            if (session.status !== 'complete') {
+                if (done > 0) {
+                    status.textContent = `Melanjutkan upload dari chunk ${done}/${session.total_chunks}...`;
+                }
+                for (let index = 0; index < session.total_chunks; index++) {
+                    if (received.has(index)) {
+                        continue;
+                    }
+                    await sendChunk(session, file, index);
+                    done++;
+                    const percent = Math.round((done / session.total_chunks) * 100);
+                    status.textContent = `Mengupload panorama... ${percent}% (${done}/${session.total_chunks} chunk)`;
+                }
+                status.textContent = 'Menyusun file di storage...';
+                await request('POST', `${UPLOAD_API}${session.id}/complete/`);
+            }
+
+            uploadInput.value = session.id;
+            // The file is already stored, don't send it again with the form
+            fileInput.value = '';
+            localStorage.removeItem(storageKey(file));
+            status.textContent = `✓ Upload selesai: ${file.name}`;
+        } catch (error) {
+            console.error('Chunked upload failed:', error);
+            status.textContent = 'Upload terputus: ' + error.message +
+                '. Pilih file yang sama lagi untuk melanjutkan.';
+        } finally {
+            setSubmitting(false);
+        }
+    }
+
+})();
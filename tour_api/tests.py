@@ -1,3 +1,1436 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone as django_timezone
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from . import compact, compression, jobs, metadata, renderers, snapshot, uploads
+from .cache import current_version, mark_tour_changed
+from .models import Hotspot, MediaBlob, MediaJob, PannellumSnapshot, Scene, UploadSession
+from .renderers import MessagePackRenderer, TourJSONRenderer
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional, its tests are skipped without it
+    msgpack = None
+
+if msgpack is not None:
+    from .parsers import MessagePackParser
+
+
+def create_tour():
+    """Three scenes linked by navigation hotspots plus one info hotspot."""
+    scenes = [
+        Scene.objects.create(
+            title=f'Gedung {name}',
+            slug=f'gedung-{name.lower()}',
+            building='Gedung Utama',
+            floor=floor,
+            panorama_image=f'panoramas/{name.lower()}.jpg',
+            initial_yaw=12.5,
+            is_featured=name == 'A',
+            published_date=date(2024, 1, 1),
+        )
+        for name, floor in (('A', 1), ('B', 2), ('C', None))
+    ]
+    for index, scene in enumerate(scenes):
+        Hotspot.objects.create(
+            from_scene=scene,
+            to_scene=scenes[(index + 1) % len(scenes)],
+            hotspot_type='scene',
+            pitch=-3.25,
+            yaw=90.0 * index,
+            text='Lanjut',
+        )
+    Hotspot.objects.create(
+        from_scene=scenes[0],
+        hotspot_type='info',
+        pitch=0.1,
+        yaw=1e-5,
+        text='Informasi',
+        info_description='Ruang rektorat — lantai 1',
+    )
+    return scenes
+
+
+def use_temporary_media(testcase):
+    """Point MEDIA_ROOT (and default storage) at a directory removed after the test."""
+    directory = tempfile.TemporaryDirectory()
+    testcase.addCleanup(directory.cleanup)
+    media = override_settings(MEDIA_ROOT=directory.name, TOUR_MEDIA_SENDFILE='')
+    media.enable()
+    testcase.addCleanup(media.disable)
+    return directory.name
+
+
+def panorama_bytes(size=(64, 32), color=(40, 90, 160), image_format='JPEG'):
+    from PIL import Image
+
+    file = io.BytesIO()
+    Image.new('RGB', size, color).save(file, image_format)
+    return file.getvalue()
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, TOUR_MEDIA_JOBS_EAGER=False)
+class TourAPITestCase(TestCase):
+    """Tour API tests against a small tour; responses are fetched fresh."""
+
+    @classmethod
+    def setUpTestData(cls):
+        # Run the post-commit hooks (tour version bump) the writes schedule
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.scenes = create_tour()
+
+    def setUp(self):
+        cache.clear()
+
+    def get_json(self, url, params=None):
+        response = self.client.get(url, {**(params or {}), 'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+
+PAYLOAD_URLS = ['/api/scenes/', '/api/scenes/gedung-a/', '/api/scenes/pannellum/']
+
+
+@skipUnless(msgpack, 'msgpack is not installed')
+class MessagePackTests(TourAPITestCase):
+
+    def test_renderer_parser_round_trip(self):
+        for url in PAYLOAD_URLS:
+            with self.subTest(url=url):
+                data = self.get_json(url)
+                packed = MessagePackRenderer().render(data)
+                self.assertEqual(MessagePackParser().parse(io.BytesIO(packed)), data)
+
+    def test_format_query_parameter(self):
+        for url in PAYLOAD_URLS:
+            with self.subTest(url=url):
+                response = self.client.get(url, {'format': 'msgpack'})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'application/msgpack')
+                self.assertEqual(msgpack.unpackb(response.content, raw=False), self.get_json(url))
+
+    def test_accept_header(self):
+        response = self.client.get('/api/scenes/gedung-a/', HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content, raw=False), self.get_json('/api/scenes/gedung-a/'))
+        self.assertIn('Accept', response['Vary'])
+
+    def test_etag_differs_from_json(self):
+        packed = self.client.get('/api/scenes/', {'format': 'msgpack'})
+        plain = self.client.get('/api/scenes/', {'format': 'json'})
+        self.assertNotEqual(packed['ETag'], plain['ETag'])
+
+    def test_floats_stay_doubles(self):
+        packed = self.client.get('/api/scenes/pannellum/', {'format': 'msgpack'}).content
+        hotspots = msgpack.unpackb(packed, raw=False)['scenes']['gedung-a']['hotSpots']
+        self.assertIn(1e-5, [hotspot['yaw'] for hotspot in hotspots])
+
+    def test_parse_error(self):
+        from rest_framework.exceptions import ParseError
+
+        with self.assertRaisesMessage(ParseError, 'MessagePack parse error'):
+            MessagePackParser().parse(io.BytesIO(b'\xc1'))
+
+
+RENDERER_SAMPLES = {
+    'decimal': {'price': Decimal('12.50'), 'exact': Decimal('0.1'), 'whole': Decimal('3')},
+    'datetime': [
+        datetime(2024, 8, 17, 10, 30, 15, 123456, tzinfo=timezone.utc),
+        datetime(2024, 8, 17, 10, 30, tzinfo=timezone(timedelta(hours=7))),
+        datetime(2024, 8, 17, 10, 30),
+        date(2024, 8, 17),
+        time(7, 45, 1),
+    ],
+    'uuid': {'id': uuid.UUID('12345678-1234-5678-1234-567812345678')},
+    'lazy': {'label': gettext_lazy('Gedung Rektorat'), 'items': [gettext_lazy('Lantai')]},
+    'indonesian': {
+        'title': 'Ruang Sidang — Lantai 2',
+        'description': 'Gedung “Utama” Universitas Nahdlatul Ulama Yogyakarta: ±120 kursi, café, 25°C',
+        'separators': 'baris\u2028paragraf\u2029',
+        'escapes': 'kutip " garis \\ tab \t <tag> &',
+    },
+    'floats': [0.1, -3.25, 1e-5, 0.00001234, 1e16, 1.5e300, 123456789.125, 0.0, -0.0],
+    'integers': [0, -1, 2 ** 53, 2 ** 64, -(2 ** 63)],
+    'nested': {'scenes': [{'id': 1, 'hotspots': [], 'floor': None, 'active': True}], 1: 'key'},
+}
+
+
+class TourJSONRendererTests(SimpleTestCase):
+    """Output must stay byte-identical to DRF's JSONRenderer."""
+
+    def assert_same_as_drf(self, data):
+        self.assertEqual(TourJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_matches_json_renderer(self):
+        for name, data in RENDERER_SAMPLES.items():
+            with self.subTest(name):
+                self.assert_same_as_drf(data)
+
+    def test_matches_json_renderer_combined(self):
+        self.assert_same_as_drf(RENDERER_SAMPLES)
+
+    def test_indented_output(self):
+        context = {'indent': 4}
+        self.assertEqual(
+            TourJSONRenderer().render(RENDERER_SAMPLES, 'application/json', context),
+            JSONRenderer().render(RENDERER_SAMPLES, 'application/json', context),
+        )
+
+    def test_none_renders_empty(self):
+        self.assertEqual(TourJSONRenderer().render(None), b'')
+
+    @skipUnless(renderers.orjson, 'orjson is not installed')
+    def test_nan_becomes_null_with_orjson(self):
+        # The one documented difference: DRF refuses NaN in strict mode
+        self.assertEqual(TourJSONRenderer().render({'yaw': float('nan')}), b'{"yaw":null}')
+
+    def test_fallback_without_orjson(self):
+        with mock.patch.object(renderers, 'orjson', None):
+            for name, data in RENDERER_SAMPLES.items():
+                with self.subTest(name):
+                    self.assert_same_as_drf(data)
+            with self.assertRaises(ValueError):
+                TourJSONRenderer().render({'yaw': float('nan')})
+
+    @skipUnless(renderers.orjson, 'orjson is not installed')
+    def test_fast_path_is_used(self):
+        with mock.patch.object(renderers.orjson, 'dumps', wraps=renderers.orjson.dumps) as dumps:
+            TourJSONRenderer().render(RENDERER_SAMPLES['indonesian'])
+        dumps.assert_called_once()
+
+
+class CompactFormatTests(SimpleTestCase):
+    """``decode(encode(x)) == x`` for the cases docs/API_COMPACT_FORMAT.md singles out."""
+
+    def assert_round_trip(self, data):
+        # Through JSON as well: that is what clients receive
+        document = json.loads(json.dumps(compact.encode(data)))
+        self.assertEqual(compact.decode(document), data)
+        return document
+
+    def test_literal_type_key(self):
+        data = {
+            '$t': 'rows',
+            'n': 1,
+            'items': [{'$t': 'map', 'v': 1}, {'$t': 'obj'}, {'$t': None, 'x': 2}],
+            'pair': [{'$t': 'rows'}, {'$s': [0], 'rows': [1], 'v': []}],
+        }
+        document = self.assert_round_trip(data)
+        self.assertEqual(document['data']['$t'], 'obj')
+
+    def test_sparse_columns(self):
+        hotspots = [
+            {'pitch': 0.0, 'yaw': 90.5, 'type': 'scene', 'sceneId': 'lobby'},
+            {'pitch': 10.0, 'yaw': 180.0, 'type': 'info'},
+            {'pitch': -12.0, 'yaw': 45.0, 'type': 'scene', 'sceneId': 'aula'},
+            {'text': 'Hanya di baris terakhir'},
+        ]
+        document = self.assert_round_trip(hotspots)
+        table = document['data']
+        self.assertEqual(table['$t'], 'rows')
+        scene_ids = table['data'][table['cols'].index('sceneId')]
+        self.assertEqual(scene_ids['rows'], [0, 2])
+        self.assertEqual(
+            [list(row) for row in compact.decode(document)],
+            [list(row) for row in hotspots],
+        )
+
+    def test_none_in_string_columns(self):
+        rows = [{'building': 'Gedung A'}, {'building': None}, {'building': 'Gedung A'}, {'building': 'Gedung B'}]
+        document = self.assert_round_trip(rows)
+        column = document['data']['data'][0]
+        self.assertIn(None, column['$s'])
+        self.assertEqual(document['strings'], ['Gedung A', 'Gedung B'])
+
+    def test_all_none_column(self):
+        self.assert_round_trip([{'floor': None}, {'floor': None}, {'floor': None}])
+
+    def test_small_maps_stay_objects(self):
+        for size in range(compact.MIN_TABLE_ROWS):
+            scenes = {f'scene-{index}': {'title': 'Lobby', 'floor': index} for index in range(size)}
+            with self.subTest(size=size):
+                document = self.assert_round_trip({'scenes': scenes})
+                self.assertNotIn('$t', document['data']['scenes'])
+
+    def test_map_tables(self):
+        scenes = {f'scene-{index}': {'title': 'Lobby', 'hotSpots': []} for index in range(compact.MIN_TABLE_ROWS)}
+        document = self.assert_round_trip({'scenes': scenes})
+        self.assertEqual(document['data']['scenes']['$t'], 'map')
+
+    def test_nested_tables_and_scalars(self):
+        self.assert_round_trip({
+            'default': {'firstScene': 'lobby', 'autoLoad': True},
+            'scenes': [
+                {'slug': f's{index}', 'hotspots': [{'yaw': float(yaw), 'text': 'Lanjut'} for yaw in range(index)]}
+                for index in range(5)
+            ],
+            'empty': [], 'numbers': [1, 2.5, None, 'x'], 'flag': False,
+        })
+        for value in (None, 0, 'teks', [], {}):
+            self.assert_round_trip(value)
+
+    def test_unknown_version(self):
+        with self.assertRaises(ValueError):
+            compact.decode({'$compact': 2, 'strings': [], 'data': None})
+
+
+class CompactResponseTests(TourAPITestCase):
+
+    def test_endpoints_decode_to_json(self):
+        requests = [(url, {}) for url in PAYLOAD_URLS]
+        requests.append(('/api/scenes/batch/', {'slugs': 'gedung-a,gedung-b'}))
+        for url, params in requests:
+            with self.subTest(url=url):
+                response = self.client.get(url, params, HTTP_ACCEPT=renderers.CompactJSONRenderer.media_type)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response['Content-Type'].startswith(renderers.CompactJSONRenderer.media_type))
+                self.assertEqual(compact.decode(json.loads(response.content)), self.get_json(url, params))
+
+
+class FastPathTests(TourAPITestCase):
+    """The fast path must render byte for byte what the serializers render."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        with cls.captureOnCommitCallbacks(execute=True):
+            Scene.objects.filter(slug='gedung-a').update(
+                thumbnail='derivatives/a/thumbnail.jpg',
+                derivatives={'thumbnail': {'webp': {'320': 'derivatives/a/thumb 320.webp'}}},
+                tiles_path='tiles/a', tile_resolution=512, tile_max_level=2, cube_resolution=1024,
+                lqip='data:image/jpeg;base64,AAAA', blurhash='LEHV6nWB2yk8', dominant_color='#285aa0',
+            )
+            Scene.objects.filter(slug='gedung-c').update(building='Taman', author='Humas')
+            mark_tour_changed()
+
+    def setUp(self):
+        from django.test import RequestFactory
+
+        super().setUp()
+        self.queryset = Scene.objects.filter(is_active=True).prefetch_related('hotspots', 'hotspots__to_scene')
+        self.request = RequestFactory().get('/api/scenes/')
+
+    def assert_same_json(self, fast, slow):
+        self.assertEqual(TourJSONRenderer().render(fast), TourJSONRenderer().render(slow))
+
+    def test_scene_list(self):
+        from . import fastpath
+        from .serializers import SceneListSerializer
+
+        for request in (None, self.request):
+            with self.subTest(request=request):
+                self.assert_same_json(
+                    fastpath.scene_list(self.queryset, request),
+                    SceneListSerializer(self.queryset, many=True, context={'request': request}).data,
+                )
+
+    def test_scene_list_fieldset(self):
+        from . import fastpath
+        from .serializers import SceneListSerializer
+
+        fields = ['slug', 'thumbnail_srcset', 'location_label', 'published_date']
+        slow = SceneListSerializer(self.queryset, many=True, fields=fields, context={'request': self.request}).data
+        self.assert_same_json(fastpath.scene_list(self.queryset, self.request, fields), slow)
+
+    def test_pannellum_config(self):
+        from . import fastpath
+        from .serializers import PannellumConfigSerializer
+
+        self.assert_same_json(
+            fastpath.pannellum_config(self.queryset),
+            PannellumConfigSerializer(self.queryset).data,
+        )
+        self.assertEqual(fastpath.pannellum_config(Scene.objects.none()), {})
+
+
+class BatchDetailTests(TourAPITestCase):
+    url = '/api/scenes/batch/'
+
+    def test_partial_errors(self):
+        Scene.objects.filter(slug='gedung-c').update(is_active=False)
+        data = self.get_json(self.url, {'slugs': 'gedung-b, tidak-ada,gedung-a,gedung-c,gedung-b'})
+        self.assertEqual(list(data['results']), ['gedung-a', 'gedung-b'])
+        for slug, detail in data['results'].items():
+            self.assertEqual(detail, self.get_json(f'/api/scenes/{slug}/'))
+        self.assertEqual(data['errors'], {
+            'gedung-c': 'Scene not found: gedung-c',
+            'tidak-ada': 'Scene not found: tidak-ada',
+        })
+
+        response = self.client.post(
+            f'{self.url}?format=json', {'slugs': ['gedung-a', 'gedung-b', 'tidak-ada']}, content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        posted = json.loads(response.content)
+        self.assertEqual(posted['results'], data['results'])
+        self.assertEqual(list(posted['errors']), ['tidak-ada'])
+
+    def test_query_count_does_not_grow_with_slugs(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        def queries(slugs):
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.get_json(self.url, {'slugs': slugs})
+            return len(context.captured_queries)
+
+        self.assertEqual(queries('gedung-a'), queries('gedung-a,gedung-b,gedung-c'))
+
+    @override_settings(TOUR_API_BATCH_MAX_SLUGS=2)
+    def test_rejected_requests(self):
+        for params in ({}, {'slugs': ' , '}, {'slugs': 'gedung-a,gedung-b,gedung-c'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, {**params, 'format': 'json'})
+                self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'{self.url}?format=json', {'slugs': 'gedung-a'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        response = self.client.post(f'{self.url}?format=json', {'slugs': [1]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+class NeighborPreloadTests(TourAPITestCase):
+    url = '/api/scenes/gedung-a/'
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        a, b, c = cls.scenes
+        with cls.captureOnCommitCallbacks(execute=True):
+            closed = Scene.objects.create(
+                title='Gedung D', slug='gedung-d', panorama_image='panoramas/d.jpg',
+                published_date=date(2024, 1, 1), is_active=False,
+            )
+            # Floor hotspots sort before scene hotspots, so Gedung C comes first
+            Hotspot.objects.create(from_scene=a, to_scene=c, hotspot_type='floor', text='Naik', pitch=0, yaw=0)
+            Hotspot.objects.create(from_scene=a, to_scene=b, hotspot_type='scene', text='Lagi', pitch=0, yaw=0)
+            Hotspot.objects.create(from_scene=a, to_scene=closed, hotspot_type='scene', text='Tutup', pitch=0, yaw=0)
+
+    def link(self, *names):
+        return ', '.join(f'<http://testserver/media/panoramas/{name}.jpg>; rel=preload; as=image' for name in names)
+
+    def test_neighbors_and_preload_links(self):
+        plain = self.client.get(self.url, {'format': 'json'})
+        self.assertNotIn('neighbors', json.loads(plain.content))
+        self.assertFalse(plain.has_header('Link'))
+
+        for _ in range(2):  # the second response comes from the cache
+            response = self.client.get(self.url, {'format': 'json', 'neighbors': '1'})
+            neighbors = json.loads(response.content)['neighbors']
+            self.assertEqual([neighbor['slug'] for neighbor in neighbors], ['gedung-c', 'gedung-b'])
+            self.assertEqual(neighbors[0]['panorama'], 'http://testserver/media/panoramas/c.jpg')
+            self.assertEqual(response['Link'], self.link('c', 'b'))
+
+        featured = self.client.get('/api/scenes/featured/', {'format': 'json', 'neighbors': 'true'})
+        self.assertEqual(featured['Link'], self.link('c', 'b'))
+
+    def test_sparse_fields_with_neighbors(self):
+        data = self.get_json(self.url, {'fields': 'slug', 'neighbors': '1'})
+        self.assertEqual(list(data), ['slug', 'neighbors'])
+
+    def test_preload_limit(self):
+        with override_settings(TOUR_API_PRELOAD_NEIGHBORS=1):
+            response = self.client.get(self.url, {'format': 'json', 'neighbors': '1'})
+            self.assertEqual(response['Link'], self.link('c'))
+            self.assertEqual(len(json.loads(response.content)['neighbors']), 2)
+        with override_settings(TOUR_API_PRELOAD_NEIGHBORS=0):
+            response = self.client.get(self.url, {'format': 'json', 'neighbors': '1'})
+            self.assertFalse(response.has_header('Link'))
+
+
+class TourVersionTests(TourAPITestCase):
+
+    def test_bumped_once_per_transaction(self):
+        version, _ = current_version()
+        with self.captureOnCommitCallbacks(execute=True):
+            for scene in self.scenes:
+                scene.save()
+            Hotspot.objects.filter(from_scene=self.scenes[0]).first().save()
+        self.assertEqual(current_version()[0], version + 1)
+
+    def test_cached_list_follows_saves(self):
+        self.assertNotIn('Rektorat', [scene['title'] for scene in self.get_json('/api/scenes/')])
+        with self.captureOnCommitCallbacks(execute=True):
+            # QuerySet.update bypasses the signals
+            Scene.objects.filter(slug='gedung-a').update(title='Rektorat')
+            mark_tour_changed()
+        titles = [scene['title'] for scene in self.get_json('/api/scenes/')]
+        self.assertIn('Rektorat', titles)
+
+    def test_failing_hook_is_logged(self):
+        scene = self.scenes[1]
+        scene.title = 'Perpustakaan'
+        # Robust hooks are logged under their name instead of failing the request
+        with mock.patch.object(snapshot, 'rebuild', side_effect=RuntimeError('gagal')):
+            with self.assertLogs('django.test', 'ERROR') as logs, self.captureOnCommitCallbacks(execute=True):
+                scene.save()
+        self.assertIn('_tour_changed', logs.output[0])
+        self.assertEqual(Scene.objects.get(pk=scene.pk).title, 'Perpustakaan')
+
+    def test_validators_cost_one_query(self):
+        from .conditional import tour_validators
+
+        with self.assertNumQueries(1):
+            token, last_modified = tour_validators()
+        self.assertEqual(token, f'v{current_version()[0]}')
+        self.assertIsNotNone(last_modified)
+
+
+class ConditionalGetTests(TourAPITestCase):
+    urls = ['/api/scenes/', '/api/scenes/gedung-a/', '/api/scenes/gedung-c/', '/api/scenes/pannellum/']
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, {'format': 'json'}, HTTP_IF_NONE_MATCH=etag)
+
+    def test_not_modified_until_saved(self):
+        etags = {url: self.client.get(url, {'format': 'json'})['ETag'] for url in self.urls}
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.revalidate(url, etag)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+                self.assertEqual(response['ETag'], etag)
+
+        scene = self.scenes[1]
+        scene.title = 'Perpustakaan'
+        with self.captureOnCommitCallbacks(execute=True):
+            scene.save()
+        # Gedung A shows Gedung B as a hotspot target, Gedung C does not
+        self.assertEqual(self.revalidate('/api/scenes/gedung-c/', etags['/api/scenes/gedung-c/']).status_code, 304)
+        for url in ('/api/scenes/', '/api/scenes/gedung-a/', '/api/scenes/pannellum/'):
+            with self.subTest(url=url):
+                response = self.revalidate(url, etags[url])
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etags[url])
+                self.assertIn('Perpustakaan', response.content.decode())
+
+    def test_if_modified_since(self):
+        response = self.client.get('/api/scenes/', {'format': 'json'})
+        self.assertIn('no-cache', response['Cache-Control'])
+        repeated = self.client.get(
+            '/api/scenes/', {'format': 'json'}, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'],
+        )
+        self.assertEqual(repeated.status_code, 304)
+
+
+class PannellumSnapshotTests(TourAPITestCase):
+    url = '/api/scenes/pannellum/'
+
+    def test_rebuilt_after_commit(self):
+        self.assertEqual(PannellumSnapshot.objects.get().token, snapshot._token())
+        scene = self.scenes[1]
+        scene.title = 'Perpustakaan'
+        with self.captureOnCommitCallbacks(execute=True):
+            scene.save()
+        stored = PannellumSnapshot.objects.get()
+        self.assertEqual(stored.token, snapshot._token())
+        # Gedung B and Gedung A, whose hotspot targets it
+        self.assertEqual(stored.rebuilt_scenes, 2)
+        self.assertEqual(json.loads(bytes(stored.content))['scenes']['gedung-b']['title'], 'Perpustakaan')
+        self.assertEqual(self.get_json(self.url)['scenes']['gedung-b']['title'], 'Perpustakaan')
+
+    def test_get_does_not_write(self):
+        expected = self.get_json(self.url)
+        PannellumSnapshot.objects.all().delete()
+        Scene.objects.update(pannellum_fragment_token='')
+        self.assertEqual(self.get_json(self.url), expected)
+        self.assertFalse(PannellumSnapshot.objects.exists())
+        self.assertFalse(Scene.objects.exclude(pannellum_fragment_token='').exists())
+
+    def test_etag_per_encoding(self):
+        identity = self.client.get(self.url, {'format': 'json'}, HTTP_ACCEPT_ENCODING='identity')
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertFalse(identity['ETag'].startswith('W/'))
+        gzipped = self.client.get(self.url, {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzipped['ETag'], f"W/{identity['ETag']}")
+        self.assertEqual(gzip.decompress(gzipped.content), identity.content)
+        revalidated = self.client.get(
+            self.url, {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzipped['ETag'],
+        )
+        self.assertEqual(revalidated.status_code, 304)
+
+    @skipUnless(compression.brotli, 'Brotli is not installed')
+    @override_settings(TOUR_API_COMPRESS_MIN_SIZE=0)
+    def test_brotli_through_middleware(self):
+        response = self.client.get(self.url, {'format': 'json'}, HTTP_ACCEPT_ENCODING='gzip, br')
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        self.assertEqual(json.loads(compression.brotli.decompress(response.content)), self.get_json(self.url))
+
+
+class EncodingNegotiationTests(SimpleTestCase):
+
+    def test_choose_encoding(self):
+        best = 'br' if compression.brotli is not None else 'gzip'
+        cases = {
+            '': None,
+            'identity': None,
+            'gzip': 'gzip',
+            'gzip, deflate, br': best,
+            '*': best,
+            'br;q=0.5, gzip;q=0.8': 'gzip',
+            'BR;q=1.0, GZIP;q=0.9': best,
+            '*;q=0.1, gzip;q=0': 'br' if compression.brotli is not None else None,
+            'br;q=0, gzip;q=0': None,
+        }
+        for header, expected in cases.items():
+            with self.subTest(header=header):
+                self.assertEqual(compression.choose_encoding(header), expected)
+        self.assertEqual(compression.choose_encoding('br, gzip', available=['gzip']), 'gzip')
+        self.assertIsNone(compression.choose_encoding('br, gzip', available=[]))
+
+
+@override_settings(TOUR_API_COMPRESS_MIN_SIZE=0)
+class CompressionMiddlewareTests(TourAPITestCase):
+    url = '/api/scenes/'
+
+    def get(self, **headers):
+        return self.client.get(self.url, {'format': 'json'}, **headers)
+
+    def test_gzip_with_weak_etag(self):
+        identity = self.get()
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertIn('Accept-Encoding', identity['Vary'])
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Length'], str(len(response.content)))
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+        self.assertEqual(response['ETag'], f"W/{identity['ETag']}")
+        self.assertEqual(self.get(HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_compressed_once_per_etag(self):
+        first = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        with mock.patch.object(compression, 'compress') as compress:
+            second = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        compress.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+    @override_settings(TOUR_API_COMPRESS_MIN_SIZE=10 ** 6)
+    def test_small_responses_stay_identity(self):
+        response = self.get(HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertFalse(response['ETag'].startswith('W/'))
+
+
+class CursorPaginationTests(TourAPITestCase):
+
+    def add_scene(self, name, floor):
+        return Scene.objects.create(
+            title=f'Gedung {name}', slug=f'gedung-{name}', building='Aula', floor=floor,
+            panorama_image=f'panoramas/{name}.jpg', published_date=date(2024, 1, 1),
+        )
+
+    def follow(self, link):
+        # Links keep the query string, format=json included
+        response = self.client.get(link)
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def walk(self, url, key):
+        page = self.get_json(url, {'page_size': 2})
+        pages = [[item[key] for item in page['results']]]
+        while page['next'] is not None:
+            page = self.follow(page['next'])
+            pages.append([item[key] for item in page['results']])
+        return pages, page
+
+    def test_pages_match_unpaginated_order(self):
+        self.add_scene('d', floor=None)
+        self.add_scene('e', floor=3)
+        for url, key in (('/api/scenes/', 'slug'), ('/api/hotspots/', 'id')):
+            with self.subTest(url=url):
+                expected = [item[key] for item in self.get_json(url)]
+                pages, last = self.walk(url, key)
+                self.assertEqual([item for page in pages for item in page], expected)
+                self.assertTrue(all(pages))
+
+                # And back again from the last page
+                backward, page = [], last
+                while page['previous'] is not None:
+                    page = self.follow(page['previous'])
+                    backward[:0] = [item[key] for item in page['results']]
+                self.assertEqual(backward + pages[-1], expected)
+
+    def test_stable_across_inserts(self):
+        first = self.get_json('/api/scenes/', {'page_size': 2})
+        self.add_scene('0', floor=None)
+        rest = self.follow(first['next'])
+        seen = [scene['slug'] for scene in first['results'] + rest['results']]
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(set(seen) - {'gedung-0'}, {'gedung-a', 'gedung-b', 'gedung-c'})
+
+
+class SparseFieldsTests(TourAPITestCase):
+
+    def test_fields_include_exclude(self):
+        scenes = self.get_json('/api/scenes/', {'fields': 'slug,title,floor'})
+        self.assertEqual([list(scene) for scene in scenes], [['slug', 'title', 'floor']] * 3)
+        scenes = self.get_json('/api/scenes/', {'fields': 'slug', 'include': 'hotspots'})
+        self.assertEqual(list(scenes[0]), ['slug', 'hotspots'])
+        scene = self.get_json('/api/scenes/gedung-a/', {'exclude': 'hotspots,description'})
+        self.assertNotIn('hotspots', scene)
+        self.assertNotIn('description', scene)
+        self.assertIn('title', scene)
+
+    def test_other_representation_is_a_no_op(self):
+        # description exists on the detail representation only
+        self.assertEqual(self.get_json('/api/scenes/', {'exclude': 'description'}), self.get_json('/api/scenes/'))
+        scenes = self.get_json('/api/scenes/', {'fields': 'slug,description'})
+        self.assertEqual(list(scenes[0]), ['slug'])
+
+    def test_unknown_fields_are_rejected(self):
+        for key in ('fields', 'include', 'exclude'):
+            for url in ('/api/scenes/', '/api/scenes/gedung-a/'):
+                with self.subTest(key=key, url=url):
+                    response = self.client.get(url, {key: 'slug,bogus', 'format': 'json'})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(json.loads(response.content)['errors'], {key: ['Field tidak dikenal: bogus']})
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, TOUR_MEDIA_JOBS_EAGER=False, TOUR_TILE_SIZE=32)
+class MediaProcessingTests(TestCase):
+
+    def setUp(self):
+        use_temporary_media(self)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.scene = Scene.objects.create(
+                title='Aula', slug='aula', published_date=date(2024, 1, 1),
+                panorama_image=SimpleUploadedFile('aula.jpg', panorama_bytes((400, 200))),
+            )
+
+    def process(self):
+        from . import imaging
+
+        with self.captureOnCommitCallbacks(execute=True):
+            imaging.process_scene_media(self.scene)
+        return Scene.objects.get(pk=self.scene.pk)
+
+    def get_pannellum(self):
+        response = self.client.get('/api/scenes/pannellum/', {'format': 'json'})
+        self.assertEqual(response.status_code, 200)
+        return json.loads(response.content)
+
+    def test_tile_pyramid(self):
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        scene = self.process()
+        # 400 / pi = 127px faces, rounded down to 2 levels of 32px tiles
+        self.assertEqual((scene.tile_resolution, scene.tile_max_level, scene.cube_resolution), (32, 2, 64))
+        tiles = {level: default_storage.listdir(f'{scene.tiles_path}/{level}')[1] for level in (1, 2)}
+        self.assertEqual(len(tiles[1]), 6)
+        self.assertEqual(len(tiles[2]), 6 * 4)
+        with default_storage.open(f'{scene.tiles_path}/2/r1_1.jpg') as file:
+            self.assertEqual(Image.open(file).size, (32, 32))
+
+        config = self.get_pannellum()['scenes']['aula']
+        self.assertEqual(config['type'], 'multires')
+        self.assertTrue(config['multiRes'].pop('basePath').endswith(default_storage.url(scene.tiles_path)))
+        self.assertEqual(config['multiRes'], {
+            'path': '/%l/%s%y_%x',
+            'extension': 'jpg',
+            'tileResolution': 32,
+            'maxLevel': 2,
+            'cubeResolution': 64,
+        })
+
+    def assert_color_close(self, rgb, expected=(40, 90, 160)):
+        # JPEG compression shifts a flat colour by a few levels
+        for channel, value in zip(rgb, expected):
+            self.assertAlmostEqual(channel, value, delta=4)
+
+    def test_placeholders(self):
+        import base64
+
+        from PIL import Image
+
+        from . import placeholders
+
+        scene = self.process()
+        # Size flag, AC maximum, DC colour, then one pair per AC component of 6 x 3
+        self.assertEqual(len(scene.blurhash), 1 + 1 + 4 + 2 * (6 * 3 - 1))
+        self.assertEqual(scene.blurhash[0], placeholders.BLURHASH_CHARACTERS[(6 - 1) + (3 - 1) * 9])
+        dc = 0
+        for character in scene.blurhash[2:6]:
+            dc = dc * 83 + placeholders.BLURHASH_CHARACTERS.index(character)
+        self.assert_color_close((dc >> 16, (dc >> 8) & 255, dc & 255))
+        self.assert_color_close(bytes.fromhex(scene.dominant_color[1:]))
+
+        prefix = 'data:image/jpeg;base64,'
+        self.assertTrue(scene.lqip.startswith(prefix))
+        preview = Image.open(io.BytesIO(base64.b64decode(scene.lqip[len(prefix):])))
+        self.assertEqual((preview.format, preview.size), ('JPEG', (64, 32)))
+
+        response = self.client.get('/api/scenes/aula/', {'format': 'json'})
+        detail = json.loads(response.content)
+        for field in ('blurhash', 'lqip', 'dominant_color'):
+            self.assertEqual(detail[field], getattr(scene, field))
+        config = self.get_pannellum()['scenes']['aula']
+        self.assertEqual((config['preview'], config['blurhash']), (scene.lqip, scene.blurhash))
+
+    @override_settings(TOUR_TILE_SIZE=512, TOUR_DERIVATIVE_FORMATS=('webp', 'jpeg'))
+    def test_derivative_ladder(self):
+        from django.core.files.base import ContentFile
+        from django.core.files.storage import default_storage
+        from PIL import Image
+
+        name = default_storage.save('panoramas/aula-besar.jpg', ContentFile(panorama_bytes((1400, 700))))
+        Scene.objects.filter(pk=self.scene.pk).update(panorama_image=name)
+        self.scene.refresh_from_db()
+        scene = self.process()
+
+        # 700px wide 16:9 centre crop; the 1280 step and every panorama width would upscale
+        self.assertTrue(scene.derivatives['thumbnail_auto'])
+        self.assertEqual(scene.derivatives['panorama'], {})
+        ladder = scene.derivatives['thumbnail']
+        self.assertEqual({name: list(sizes) for name, sizes in ladder.items()}, {
+            'webp': ['320', '640'],
+            'jpeg': ['320', '640'],
+        })
+        for format_name, pil_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+            with default_storage.open(ladder[format_name]['640']) as file:
+                image = Image.open(file)
+                self.assertEqual((image.format, image.size), (pil_format, (640, 360)))
+        with scene.thumbnail.open() as file:
+            self.assertEqual(Image.open(file).size, (700, 394))
+
+        detail = json.loads(self.client.get('/api/scenes/aula/', {'format': 'json'}).content)
+        self.assertEqual(list(detail['thumbnail_srcset']['webp']), ['320w', '640w'])
+        self.assertTrue(detail['thumbnail_srcset']['webp']['640w'].endswith(default_storage.url(ladder['webp']['640'])))
+        self.assertEqual(detail['panorama_srcset'], {})
+
+
+class BoundedDecodeTests(SimpleTestCase):
+
+    def image_file(self, image_format, size=(400, 200)):
+        from PIL import Image
+
+        file = io.BytesIO()
+        Image.new('RGB', size, (40, 90, 160)).save(file, image_format)
+        file.seek(0)
+        return file
+
+    def test_jpeg_is_drafted(self):
+        limit = 100 * 50 * metadata.WORKING_BYTES_PER_PIXEL
+        image, original_size = metadata.open_bounded(self.image_file('JPEG'), limit)
+        image.load()
+        self.assertEqual(original_size, (400, 200))
+        self.assertEqual(image.size, (100, 50))
+
+    def test_other_formats_refused_before_decoding(self):
+        from PIL import Image
+
+        # Half of the full-size budget: enough for a 1/2 scale JPEG decode
+        limit = 400 * 200 * metadata.WORKING_BYTES_PER_PIXEL // 2
+        file = self.image_file('PNG')
+        with mock.patch.object(Image.Image, 'load') as load, self.assertRaises(metadata.ImageTooLarge):
+            metadata.open_bounded(file, limit)
+        load.assert_not_called()
+        image, _ = metadata.open_bounded(self.image_file('PNG', (100, 50)), limit)
+        self.assertEqual(image.size, (100, 50))
+
+
+class ServeMediaTests(SimpleTestCase):
+    sha = 'ab' * 32
+    tile = f'tiles/{sha}-0123456789ab/1/f0_0.jpg'
+    legacy_tile = f'tiles/{sha}/1/f0_0.jpg'
+    body = bytes(range(256)) * 4
+
+    def setUp(self):
+        from django.test import RequestFactory
+
+        root = use_temporary_media(self)
+        for name in (self.tile, self.legacy_tile):
+            path = os.path.join(root, name)
+            os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as file:
+                file.write(self.body)
+        self.factory = RequestFactory()
+
+    def get(self, path, **headers):
+        from unu_tour.media import serve_media
+
+        return serve_media(self.factory.get(f'/media/{path}', **headers), path)
+
+    def test_range(self):
+        response = self.get(self.tile, HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.body)}')
+        self.assertEqual(b''.join(response.streaming_content), self.body[10:20])
+        suffix = self.get(self.tile, HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), self.body[-5:])
+        self.assertEqual(self.get(self.tile, HTTP_RANGE='bytes=5000-').status_code, 416)
+
+    def test_if_range_with_stale_etag_sends_everything(self):
+        response = self.get(self.tile, HTTP_RANGE='bytes=10-19', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.body)
+
+    def test_if_none_match(self):
+        etag = self.get(self.tile)['ETag']
+        response = self.get(self.tile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(self.get(self.tile, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_only_versioned_derived_paths_are_immutable(self):
+        self.assertIn('immutable', self.get(self.tile)['Cache-Control'])
+        self.assertNotIn('immutable', self.get(self.legacy_tile)['Cache-Control'])
+
+    def test_derived_prefixes_of_every_version(self):
+        from django.core.files.storage import default_storage
+
+        from . import blobs
+
+        names = sorted(blobs.derived_prefixes(self.sha))
+        self.assertEqual(names, [f'tiles/{self.sha}', f'tiles/{self.sha}-0123456789ab'])
+        blobs.delete_tree(names[1])
+        self.assertFalse(default_storage.exists(self.tile))
+        self.assertTrue(default_storage.exists(self.legacy_tile))
+
+    def test_output_version_follows_settings(self):
+        from . import imaging
+
+        version = imaging.output_version()
+        with override_settings(TOUR_TILE_SIZE=256):
+            self.assertNotEqual(imaging.output_version(), version)
+        with override_settings(TOUR_DERIVATIVE_FORMATS=('webp',)):
+            self.assertNotEqual(imaging.output_version(), version)
+        self.assertEqual(imaging.output_version(), version)
+
+
+@override_settings(TOUR_MEDIA_RETRY_BASE=30, TOUR_MEDIA_RETRY_MAX=3600)
+class MediaJobTests(TestCase):
+
+    def job(self, **fields):
+        return MediaJob.objects.create(kind='purge_blob', payload={'blob_id': 0}, **fields)
+
+    def test_claim_due_jobs_once(self):
+        due = [self.job(), self.job()]
+        self.job(run_after=django_timezone.now() + timedelta(hours=1))
+        claimed = jobs.claim(5)
+        self.assertEqual(sorted(job.pk for job in claimed), [job.pk for job in due])
+        self.assertTrue(all(job.status == 'running' and job.attempts == 1 for job in claimed))
+        self.assertEqual(jobs.claim(5), [])
+
+    def test_release_stale(self):
+        job = self.job()
+        jobs.claim(1)
+        MediaJob.objects.filter(pk=job.pk).update(locked_at=django_timezone.now() - timedelta(hours=1))
+        self.assertEqual(jobs.release_stale(60), 1)
+        self.assertEqual(MediaJob.objects.get(pk=job.pk).status, 'pending')
+        self.assertEqual(jobs.claim(1)[0].pk, job.pk)
+
+    def test_failure_retries_then_fails(self):
+        job = self.job(max_attempts=2)
+        failing = mock.patch.dict(jobs.HANDLERS, {'purge_blob': mock.Mock(side_effect=OSError('storage'))})
+        with failing, self.assertLogs('tour_api.jobs', 'WARNING'):
+            claimed, = jobs.claim(1)
+            jobs.finish(claimed, jobs.run(claimed.pk))
+            job.refresh_from_db()
+            self.assertEqual(job.status, 'pending')
+            self.assertIn('OSError: storage', job.last_error)
+            self.assertGreater(job.run_after, django_timezone.now() + timedelta(seconds=20))
+
+            MediaJob.objects.filter(pk=job.pk).update(run_after=django_timezone.now())
+            claimed, = jobs.claim(1)
+            jobs.finish(claimed, jobs.run(claimed.pk))
+            job.refresh_from_db()
+            self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_image_too_large_is_not_retried(self):
+        job = self.job()
+        failing = mock.patch.dict(jobs.HANDLERS, {'purge_blob': mock.Mock(side_effect=metadata.ImageTooLarge('besar'))})
+        with failing, self.assertLogs('tour_api.jobs', 'ERROR'):
+            claimed, = jobs.claim(1)
+            jobs.finish(claimed, jobs.run(claimed.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+
+@override_settings(TOUR_MEDIA_JOBS_EAGER=True, TOUR_BUNDLE_AUTO_REBUILD=True, TOUR_BUNDLE_REBUILD_DELAY=30)
+class BundleRebuildDebounceTests(TestCase):
+
+    def setUp(self):
+        self.build = mock.Mock()
+        for patcher in (
+            mock.patch.dict(jobs.HANDLERS, {'build_bundle': self.build}),
+            mock.patch.object(jobs, '_bundle_writable', return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_eager_builds_once_per_delay(self):
+        for _ in range(5):
+            jobs.enqueue_bundle_build()
+        self.assertEqual(self.build.call_count, 1)
+        self.assertEqual(MediaJob.objects.filter(kind='build_bundle', status='pending').count(), 1)
+
+        # Once the pending job is due, the next change runs it
+        MediaJob.objects.filter(status='pending').update(run_after=django_timezone.now())
+        jobs.enqueue_bundle_build()
+        self.assertEqual(self.build.call_count, 2)
+        self.assertFalse(MediaJob.objects.filter(status='pending').exists())
+
+    @override_settings(TOUR_MEDIA_JOBS_EAGER=False)
+    def test_one_build_per_transaction(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            scenes = create_tour()
+        with mock.patch.object(jobs, 'enqueue_bundle_build') as enqueue:
+            with self.captureOnCommitCallbacks(execute=True):
+                for scene in scenes:
+                    scene.save()
+        enqueue.assert_called_once()
+
+
+@override_settings(TOUR_MEDIA_JOBS_EAGER=False, TOUR_UPLOAD_EXPIRY=3600)
+class MediaBlobTests(TestCase):
+
+    def setUp(self):
+        use_temporary_media(self)
+
+    def add_scene(self, name, content):
+        return Scene.objects.create(
+            title=name, slug=name, published_date=date(2024, 1, 1),
+            panorama_image=SimpleUploadedFile(f'{name}.jpg', content),
+        )
+
+    def test_identical_uploads_share_one_blob(self):
+        from django.core.files.storage import default_storage
+
+        first, second = self.add_scene('a', panorama_bytes()), self.add_scene('b', panorama_bytes())
+        other = self.add_scene('c', panorama_bytes(color=(200, 10, 10)))
+        self.assertEqual(first.panorama_blob_id, second.panorama_blob_id)
+        self.assertNotEqual(first.panorama_blob_id, other.panorama_blob_id)
+        blob = MediaBlob.objects.get(pk=first.panorama_blob_id)
+        self.assertEqual(blob.ref_count, 2)
+        self.assertEqual(first.panorama_image.name, blob.name)
+        self.assertEqual(default_storage.listdir(os.path.dirname(blob.name))[1], [os.path.basename(blob.name)])
+
+    def test_purged_after_last_reference(self):
+        from django.core.files.storage import default_storage
+        from django.core.files.base import ContentFile
+
+        first, second = self.add_scene('a', panorama_bytes()), self.add_scene('b', panorama_bytes())
+        blob = MediaBlob.objects.get(pk=first.panorama_blob_id)
+        tile = default_storage.save(f'tiles/{blob.sha256}-0123456789ab/1/f0_0.jpg', ContentFile(b'tile'))
+
+        first.delete()
+        self.assertEqual(MediaBlob.objects.get(pk=blob.pk).ref_count, 1)
+        self.assertFalse(MediaJob.objects.filter(kind='purge_blob').exists())
+        second.delete()
+        self.assertEqual(MediaBlob.objects.get(pk=blob.pk).ref_count, 0)
+        job = MediaJob.objects.get(kind='purge_blob')
+
+        self.assertIsNone(jobs.run(job.pk))
+        self.assertFalse(MediaBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(default_storage.exists(blob.name))
+        self.assertFalse(default_storage.exists(tile))
+
+    def test_purge_keeps_blob_of_live_upload(self):
+        from . import blobs
+
+        scene = self.add_scene('a', panorama_bytes())
+        blob = MediaBlob.objects.get(pk=scene.panorama_blob_id)
+        # Re-uploaded by a session that has not been saved on a scene yet
+        session = UploadSession.objects.create(
+            filename='a.jpg', size=blob.size, chunk_size=blob.size, status='complete', blob=blob,
+        )
+        scene.delete()
+        self.assertFalse(blobs.purge(blob.pk))
+        self.assertTrue(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+        UploadSession.objects.filter(pk=session.pk).update(updated_at=django_timezone.now() - timedelta(hours=2))
+        self.assertEqual(uploads.expire_sessions(), (1, 1))
+        self.assertFalse(MediaBlob.objects.filter(pk=blob.pk).exists())
+
+
+@override_settings(TOUR_MEDIA_JOBS_EAGER=False, TOUR_UPLOAD_EXPIRY=3600)
+class ChunkedUploadTests(TestCase):
+    chunk_size = 64 * 1024
+
+    def setUp(self):
+        use_temporary_media(self)
+        from PIL import Image
+
+        # Noise, so the PNG spans several chunks
+        file = io.BytesIO()
+        Image.effect_noise((400, 200), 64).convert('RGB').save(file, 'PNG')
+        self.data = file.getvalue()
+        self.session = UploadSession.objects.create(
+            filename='pano.png', size=len(self.data), chunk_size=self.chunk_size,
+        )
+
+    def chunk(self, index):
+        return self.data[index * self.chunk_size:(index + 1) * self.chunk_size]
+
+    def send(self, index, checksum=None):
+        chunk = self.chunk(index)
+        return uploads.store_chunk(self.session, index, chunk, checksum or hashlib.sha256(chunk).hexdigest())
+
+    def test_out_of_order_resume_and_complete(self):
+        from django.core.files.storage import default_storage
+
+        total = self.session.total_chunks
+        self.assertGreater(total, 2)
+        for index in reversed(range(1, total)):
+            self.send(index)
+        # A resuming client asks what is missing
+        self.assertEqual(self.session.missing_chunks(), [0])
+        with self.assertRaises(uploads.ChunkError):
+            uploads.complete(self.session)
+
+        self.send(0)
+        self.send(0)  # resent chunks replace the previous attempt
+        blob = uploads.complete(self.session)
+        self.assertEqual(blob.sha256, hashlib.sha256(self.data).hexdigest())
+        self.assertEqual((blob.width, blob.height, blob.format), (400, 200, 'PNG'))
+        with default_storage.open(blob.name, 'rb') as file:
+            self.assertEqual(file.read(), self.data)
+        self.session.refresh_from_db()
+        self.assertEqual((self.session.status, self.session.blob_id), ('complete', blob.pk))
+        self.assertFalse(self.session.chunks.exists())
+        self.assertEqual(default_storage.listdir(f'uploads/{self.session.pk}')[1], [])
+
+    def test_rejected_chunks(self):
+        with self.assertRaisesMessage(uploads.ChunkError, 'Checksum'):
+            self.send(0, checksum='0' * 64)
+        with self.assertRaisesMessage(uploads.ChunkError, 'Ukuran'):
+            uploads.store_chunk(self.session, 0, b'kurang', '')
+        with self.assertRaisesMessage(uploads.ChunkError, 'rentang'):
+            uploads.store_chunk(self.session, self.session.total_chunks, b'', '')
+        self.assertEqual(self.session.received_chunks(), [])
+
+    def test_abandoned_session_expires(self):
+        from django.core.files.storage import default_storage
+
+        self.send(0)
+        UploadSession.objects.filter(pk=self.session.pk).update(updated_at=django_timezone.now() - timedelta(hours=2))
+        self.assertEqual(uploads.expire_sessions(), (1, 0))
+        self.assertFalse(UploadSession.objects.exists())
+        self.assertFalse(default_storage.exists(uploads.part_name(self.session, 0)))
+
+
+@override_settings(TOUR_API_CHANGES_SETTLE_SECONDS=0, TOUR_API_CHANGES_PAGE_SIZE=500)
+class ChangesFeedTests(TourAPITestCase):
+    url = '/api/changes/'
+
+    def changes(self, since, **params):
+        return self.get_json(self.url, {'since': since, **params})
+
+    def ids(self, section):
+        return sorted(
+            item if isinstance(item, int) else item['id']
+            for items in section.values() for item in items
+        )
+
+    def test_full_sync(self):
+        page = self.changes(0)
+        self.assertFalse(page['has_more'])
+        self.assertEqual(sorted(scene['slug'] for scene in page['scenes']['created']), ['gedung-a', 'gedung-b', 'gedung-c'])
+        self.assertEqual(len(page['hotspots']['created']), 4)
+        self.assertEqual(self.changes(page['next'])['next'], page['next'])
+
+    def test_paging_covers_every_change(self):
+        everything = self.changes(0)
+        scenes, hotspots, since, pages = [], [], 0, 0
+        while True:
+            page = self.changes(since, limit=2)
+            scenes += self.ids(page['scenes'])
+            hotspots += self.ids(page['hotspots'])
+            since, pages = page['next'], pages + 1
+            if not page['has_more']:
+                break
+        self.assertGreater(pages, 2)
+        # A record can come back on a later page (replayed entries), never go missing
+        self.assertEqual(sorted(set(scenes)), self.ids(everything['scenes']))
+        self.assertEqual(sorted(set(hotspots)), self.ids(everything['hotspots']))
+
+    def test_tombstones(self):
+        since = self.changes(0)['next']
+        before = set(Hotspot.objects.values_list('pk', flat=True))
+        Hotspot.objects.get(hotspot_type='info').delete()
+        scene = Scene.objects.get(slug='gedung-c')
+        scene_id = scene.pk
+        # Cascades to the hotspots from and to it
+        scene.delete()
+        page = self.changes(since)
+        self.assertEqual(page['scenes']['deleted'], [scene_id])
+        gone = before - set(Hotspot.objects.values_list('pk', flat=True))
+        self.assertGreater(len(gone), 2)
+        self.assertEqual(sorted(page['hotspots']['deleted']), sorted(gone))
+
+    def test_deactivated_scene_is_deleted(self):
+        since = self.changes(0)['next']
+        scene = self.scenes[1]
+        scene.is_active = False
+        scene.save()
+        self.assertEqual(self.changes(since)['scenes']['deleted'], [scene.pk])
+
+    def test_target_rename_updates_linking_hotspots(self):
+        since = self.changes(0)['next']
+        target = self.scenes[1]
+        target.title = 'Perpustakaan'
+        target.save()
+        page = self.changes(since)
+        linking = [hotspot for hotspot in page['hotspots']['updated'] if hotspot['to_scene'] == target.pk]
+        self.assertEqual(len(linking), 1)
+        self.assertEqual(linking[0]['to_scene_title'], 'Perpustakaan')
+
+        # Saving without renaming logs only the scene
+        since = page['next']
+        target.save()
+        self.assertEqual(self.changes(since)['hotspots']['updated'], [])
+
+    def test_unknown_token_is_gone(self):
+        response = self.client.get(self.url, {'since': 10 ** 9, 'format': 'json'})
+        self.assertEqual(response.status_code, 410)
+        self.assertEqual(self.client.get(self.url, {'since': -1, 'format': 'json'}).status_code, 400)
+
+    def test_settle_window_holds_back_recent_entries(self):
+        from . import changelog
+
+        from .models import ChangeLogEntry
+
+        since = self.changes(0)['next']
+        ChangeLogEntry.objects.update(created_at=django_timezone.now() - timedelta(minutes=5))
+        with override_settings(TOUR_API_CHANGES_SETTLE_SECONDS=60):
+            self.scenes[0].save()
+            page = self.changes(since)
+            self.assertEqual((page['next'], page['scenes']['updated']), (since, []))
+            self.assertEqual(changelog.current_token(), since)
+            # Unsettled, not unknown: no 410 for a token inside the window
+            self.assertGreater(changelog.current_token(settled=False), since)
+        self.assertEqual([scene['slug'] for scene in self.changes(since)['scenes']['updated']], ['gedung-a'])
+
+
+class HotspotBulkTests(TourAPITestCase):
+    url = '/api/hotspots/bulk/'
+
+    def setUp(self):
+        from django.contrib.auth import get_user_model
+
+        super().setUp()
+        self.client.force_login(get_user_model().objects.create_user('editor', password='rahasia'))
+        self.navigation = Hotspot.objects.get(from_scene=self.scenes[0], hotspot_type='scene')
+        self.info = Hotspot.objects.get(from_scene=self.scenes[0], hotspot_type='info')
+
+    def post(self, operations, from_scene=None):
+        return self.client.post(
+            f'{self.url}?format=json',
+            {'from_scene': (from_scene or self.scenes[0]).pk, 'operations': operations},
+            content_type='application/json',
+        )
+
+    def test_applies_every_operation(self):
+        version = current_version()[0]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.post([
+                {'op': 'create', 'hotspot_type': 'scene', 'to_scene': self.scenes[2].pk, 'text': 'Ke C', 'pitch': 1, 'yaw': 2},
+                {'op': 'update', 'id': self.navigation.pk, 'yaw': 45.5},
+                {'op': 'delete', 'id': self.info.pk},
+            ])
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        created = Hotspot.objects.get(text='Ke C')
+        self.assertEqual((data['created'], data['deleted']), ([created.pk], [self.info.pk]))
+        self.assertEqual(sorted(hotspot['id'] for hotspot in data['hotspots']), sorted([self.navigation.pk, created.pk]))
+
+        self.assertEqual(Hotspot.objects.get(pk=self.navigation.pk).yaw, 45.5)
+        self.assertFalse(Hotspot.objects.filter(pk=self.info.pk).exists())
+        self.assertEqual(current_version()[0], version + 1)
+        detail = self.get_json('/api/scenes/gedung-a/')
+        self.assertEqual(sorted(hotspot['text'] for hotspot in detail['hotspots']), ['Ke C', 'Lanjut'])
+
+    def test_errors_per_operation_and_nothing_saved(self):
+        other = Hotspot.objects.get(from_scene=self.scenes[1])
+        response = self.post([
+            {'op': 'update', 'id': self.navigation.pk, 'yaw': 10},
+            {'op': 'update', 'id': 9999, 'yaw': 1},
+            {'op': 'create', 'hotspot_type': 'scene', 'text': 'Tanpa tujuan', 'pitch': 0, 'yaw': 0},
+            {'op': 'move'},
+            {'op': 'delete', 'id': self.navigation.pk},
+            {'op': 'create', 'hotspot_type': 'scene', 'to_scene': 9999, 'text': 'x', 'pitch': 0, 'yaw': 0},
+            {'op': 'delete', 'id': other.pk},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = json.loads(response.content)['errors']['operations']
+        self.assertEqual(sorted(errors, key=int), ['1', '2', '3', '4', '5', '6'])
+        self.assertIn('to_scene', errors['2'])
+        self.assertIn('op', errors['3'])
+        self.assertEqual(errors['6'], {'id': [f'Hotspot {other.pk} tidak ditemukan di scene ini']})
+        self.assertEqual(Hotspot.objects.get(pk=self.navigation.pk).yaw, self.navigation.yaw)
+        self.assertEqual(Hotspot.objects.count(), 4)
+
+    def test_write_failure_rolls_back(self):
+        from . import changelog
+
+        operations = [
+            {'op': 'create', 'hotspot_type': 'info', 'info_description': 'Baru', 'text': 'Baru', 'pitch': 0, 'yaw': 0},
+            {'op': 'update', 'id': self.navigation.pk, 'yaw': 10},
+        ]
+        # The second changelog write (the updates) fails after the insert
+        with mock.patch.object(changelog, 'record', side_effect=[None, RuntimeError('gagal')]):
+            with self.assertRaises(RuntimeError):
+                self.post(operations)
+        self.assertFalse(Hotspot.objects.filter(text='Baru').exists())
+        self.assertEqual(Hotspot.objects.get(pk=self.navigation.pk).yaw, self.navigation.yaw)
+
+    @override_settings(TOUR_API_HOTSPOT_BULK_MAX_OPERATIONS=1)
+    def test_limits_and_permissions(self):
+        response = self.post([{'op': 'delete', 'id': self.info.pk}] * 2)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('operations', json.loads(response.content)['errors'])
+        self.assertEqual(self.post([]).status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.post([{'op': 'delete', 'id': self.info.pk}]).status_code, 403)
+        self.assertTrue(Hotspot.objects.filter(pk=self.info.pk).exists())
+
+
+@override_settings(TOUR_API_CHANGES_SETTLE_SECONDS=0)
+class BundleTests(TourAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        static = override_settings(STATIC_ROOT=directory.name)
+        static.enable()
+        self.addCleanup(static.disable)
+
+    def test_build(self):
+        from . import bundle, changelog
+
+        pointer = bundle.build()
+        path = bundle.bundle_root() / f"tour.{pointer['hash']}.json"
+        self.assertEqual(pointer['path'], f'tour/{path.name}')
+        content = path.read_bytes()
+        self.assertEqual((pointer['size'], pointer['hash']), (len(content), hashlib.sha256(content).hexdigest()[:12]))
+        self.assertEqual(gzip.decompress(path.with_name(path.name + '.gz').read_bytes()), content)
+        if compression.brotli is not None:
+            self.assertEqual(compression.brotli.decompress(path.with_name(path.name + '.br').read_bytes()), content)
+
+        data = json.loads(content)
+        self.assertEqual(data['change_token'], changelog.current_token())
+        self.assertEqual(sorted(scene['slug'] for scene in data['scenes']), ['gedung-a', 'gedung-b', 'gedung-c'])
+        self.assertEqual(set(data['details']), {'gedung-a', 'gedung-b', 'gedung-c'})
+        self.assertEqual(len(data['details']['gedung-a']['hotspots']), 2)
+        self.assertEqual(data['pannellum'], self.get_json('/api/scenes/pannellum/'))
+        self.assertEqual(bundle.build()['hash'], pointer['hash'])
+
+        scene = self.scenes[1]
+        scene.title = 'Perpustakaan'
+        with self.captureOnCommitCallbacks(execute=True):
+            scene.save()
+        rebuilt = bundle.build()
+        self.assertNotEqual(rebuilt['hash'], pointer['hash'])
+        self.assertEqual(bundle.current(), rebuilt)
+        # The previous bundle stays for clients still downloading it
+        self.assertTrue(path.exists())
+
+    def test_pointer_endpoint(self):
+        from . import bundle
+
+        self.assertEqual(self.client.get('/api/bundle/', {'format': 'json'}).status_code, 404)
+        pointer = bundle.build()
+        data = self.get_json('/api/bundle/')
+        self.assertEqual(data['hash'], pointer['hash'])
+        self.assertEqual(data['url'], f"http://testserver/static/tour/tour.{pointer['hash']}.json")
+        revalidated = self.client.get('/api/bundle/', {'format': 'json'}, HTTP_IF_NONE_MATCH=f'"{pointer["hash"]}"')
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_bundle_file(self):
+        from django.http import Http404
+        from django.test import RequestFactory
+
+        from . import bundle
+        from .views import bundle_file
+
+        name = f"tour.{bundle.build()['hash']}.json"
+        content = (bundle.bundle_root() / name).read_bytes()
+        factory = RequestFactory()
+
+        plain = bundle_file(factory.get(f'/static/tour/{name}'), name)
+        self.assertFalse(plain.has_header('Content-Encoding'))
+        self.assertEqual(b''.join(plain.streaming_content), content)
+        self.assertIn('immutable', plain['Cache-Control'])
+
+        gzipped = bundle_file(factory.get(f'/static/tour/{name}', HTTP_ACCEPT_ENCODING='gzip'), name)
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(gzipped.streaming_content)), content)
+        self.assertIn('Accept-Encoding', gzipped['Vary'])
+
+        for missing in ('current.json', 'tour.000000000000.json'):
+            with self.subTest(name=missing), self.assertRaises(Http404):
+                bundle_file(factory.get(f'/static/tour/{missing}'), missing)
+
+
+@override_settings(TOUR_MEDIA_JOBS_EAGER=False)
+class ImportTourTests(TestCase):
+
+    def setUp(self):
+        self.media = use_temporary_media(self)
+        source = tempfile.TemporaryDirectory()
+        self.addCleanup(source.cleanup)
+        self.source = source.name
+        for name, color in (('lobby.jpg', (10, 20, 30)), ('aula.jpg', (200, 100, 50))):
+            with open(os.path.join(self.source, name), 'wb') as file:
+                file.write(panorama_bytes(color=color))
+        with open(os.path.join(self.source, 'lobby-thumb.jpg'), 'wb') as file:
+            file.write(panorama_bytes((32, 18)))
+        self.manifest = os.path.join(self.source, 'tour.csv')
+        with open(self.manifest, 'w', encoding='utf-8') as file:
+            file.write('slug,title,panorama,thumbnail\n')
+            file.write('lobby,Lobby,lobby.jpg,lobby-thumb.jpg\n')
+            file.write('aula,Aula,aula.jpg,\n')
+
+    def run_import(self):
+        from django.core.management import call_command
+
+        call_command('import_tour', self.source, manifest=self.manifest, processes=1, stdout=io.StringIO(), stderr=io.StringIO())
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media)
+            for directory, _, names in os.walk(self.media) for name in names
+        )
+
+    def test_imports(self):
+        self.run_import()
+        self.assertEqual(sorted(Scene.objects.values_list('slug', flat=True)), ['aula', 'lobby'])
+        self.assertEqual(MediaBlob.objects.filter(ref_count=1).count(), 2)
+        self.assertEqual(len(self.stored_files()), 3)
+
+    def test_failed_import_removes_stored_files(self):
+        from django.core.management import CommandError
+
+        # Shared with an existing scene: must survive the failed import
+        existing = Scene.objects.create(
+            title='Lama', slug='lama', published_date=date(2024, 1, 1),
+            panorama_image=SimpleUploadedFile('lama.jpg', panorama_bytes(color=(10, 20, 30))),
+        )
+        before = self.stored_files()
+        target = 'tour_api.management.commands.import_tour.create_tour'
+        with mock.patch(target, side_effect=ValueError('scene tujuan tidak ditemukan')):
+            with self.assertRaisesMessage(CommandError, 'scene tujuan tidak ditemukan'):
+                self.run_import()
+        self.assertEqual(self.stored_files(), before)
+        self.assertEqual(list(MediaBlob.objects.values_list('pk', flat=True)), [existing.panorama_blob_id])
+        self.assertFalse(Scene.objects.exclude(pk=existing.pk).exists())
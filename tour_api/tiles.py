@@ -0,0 +1,174 @@
+"""
+Multi-resolution cube-map tile pyramid untuk Pannellum (type "multires").
+
+Panorama equirectangular diproyeksikan ke 6 sisi kubus, lalu setiap sisi
+dipotong menjadi tile berukuran tetap untuk beberapa level zoom. Layout file
+mengikuti konvensi Pannellum:
+
+    <base>/<level>/<face><row>_<col>.jpg
+
+Level 1 adalah resolusi terendah (satu tile per sisi), level ``max_level``
+adalah resolusi penuh (``cube_resolution`` px per sisi).
+"""
+import io
+import math
+
+import numpy as np
+from PIL import Image
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+TILE_PATH = '/%l/%s%y_%x'
+TILE_EXTENSION = 'jpg'
+TILE_QUALITY = 80
+FACES = ('f', 'r', 'b', 'l', 'u', 'd')
+
+# Face pixels projected per numpy pass; bounds the size of the temporary
+# coordinate arrays regardless of the cube resolution.
+STRIP_PIXELS = 1024 * 1024
+# Source rows copied per pass when converting a PIL image to numpy
+CONVERT_ROWS = 512
+
+
+def tile_size():
+    return getattr(settings, 'TOUR_TILE_SIZE', 512)
+
+
+def plan_pyramid(panorama_width, tile_resolution=None):
+    """
+    Return ``(cube_resolution, max_level)`` for an equirectangular width.
+
+    The cube face is roughly ``width / pi`` (full angular resolution) rounded
+    down to ``tile_resolution * 2**n`` so every level halves cleanly.
+    """
+    tile_resolution = tile_resolution or tile_size()
+    target = max(panorama_width / math.pi, tile_resolution)
+    max_level = int(math.floor(math.log2(target / tile_resolution))) + 1
+    return tile_resolution * 2 ** (max_level - 1), max_level
+
+
+def _face_directions(face, u, v):
+    """Unit-less view vectors (x right, y up, z forward) for face pixels."""
+    one = np.ones_like(u)
+    if face == 'f':
+        return u, -v, one
+    if face == 'r':
+        return one, -v, -u
+    if face == 'b':
+        return -u, -v, -one
+    if face == 'l':
+        return -one, -v, u
+    if face == 'u':
+        return u, one, v
+    return u, -one, -v  # 'd'
+
+
+def project_face(source, face, size):
+    """
+    Project an equirectangular ``source`` (H x W x 3 uint8 array) onto one
+    cube face of ``size`` x ``size`` pixels using bilinear sampling.
+    """
+    height, width = source.shape[:2]
+    out = np.empty((size, size, 3), dtype=np.uint8)
+    coords = (np.arange(size, dtype=np.float32) + 0.5) / size * 2 - 1
+
+    strip_rows = max(1, STRIP_PIXELS // size)
+    for top in range(0, size, strip_rows):
+        rows = coords[top:top + strip_rows]
+        u, v = np.meshgrid(coords, rows)
+        x, y, z = _face_directions(face, u, v)
+
+        lon = np.arctan2(x, z)
+        lat = np.arctan2(y, np.hypot(x, z))
+        sx = (lon / (2 * np.pi) + 0.5) * width - 0.5
+        sy = (0.5 - lat / np.pi) * height - 0.5
+
+        x0 = np.floor(sx).astype(np.int64)
+        y0 = np.clip(np.floor(sy).astype(np.int64), 0, height - 1)
+        fx = (sx - x0)[..., None]
+        fy = np.clip(sy - y0, 0, 1)[..., None]
+        y1 = np.clip(y0 + 1, 0, height - 1)
+        x1 = (x0 + 1) % width
+        x0 %= width
+
+        top_row = source[y0, x0] * (1 - fx) + source[y0, x1] * fx
+        bottom_row = source[y1, x0] * (1 - fx) + source[y1, x1] * fx
+        out[top:top + len(rows)] = np.clip(top_row * (1 - fy) + bottom_row * fy + 0.5, 0, 255)
+
+    return Image.fromarray(out, 'RGB')
+
+
+def image_to_array(image):
+    """
+    Copy a PIL image into an H x W x 3 uint8 array strip by strip, avoiding
+    the extra full-size buffers of ``np.asarray(image)``.
+    """
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    array = np.empty((image.height, image.width, 3), dtype=np.uint8)
+    for top in range(0, image.height, CONVERT_ROWS):
+        bottom = min(image.height, top + CONVERT_ROWS)
+        array[top:bottom] = np.asarray(image.crop((0, top, image.width, bottom)))
+    return array
+
+
+def _save_tile(image, name, quality):
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, optimize=True)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def build_pyramid(source, base_path, tile_resolution=None, quality=TILE_QUALITY):
+    """
+    Generate and store the full tile pyramid for ``source`` (an array from
+    ``image_to_array``, or a PIL image).
+
+    Returns a dict with ``tile_resolution``, ``max_level`` and
+    ``cube_resolution`` describing what was written under ``base_path``.
+    """
+    if isinstance(source, Image.Image):
+        source = image_to_array(source)
+    tile_resolution = tile_resolution or tile_size()
+    cube_resolution, max_level = plan_pyramid(source.shape[1], tile_resolution)
+
+    for face in FACES:
+        face_image = project_face(source, face, cube_resolution)
+        for level in range(max_level, 0, -1):
+            level_size = tile_resolution * 2 ** (level - 1)
+            if face_image.width != level_size:
+                face_image = face_image.resize((level_size, level_size), Image.LANCZOS)
+            tiles = level_size // tile_resolution
+            for row in range(tiles):
+                for col in range(tiles):
+                    box = (
+                        col * tile_resolution,
+                        row * tile_resolution,
+                        (col + 1) * tile_resolution,
+                        (row + 1) * tile_resolution,
+                    )
+                    _save_tile(
+                        face_image.crop(box),
+                        f"{base_path}/{level}/{face}{row}_{col}.{TILE_EXTENSION}",
+                        quality,
+                    )
+
+    return {
+        'tile_resolution': tile_resolution,
+        'max_level': max_level,
+        'cube_resolution': cube_resolution,
+    }
+
+
+def multires_config(base_url, tile_resolution, max_level, cube_resolution):
+    """Pannellum ``multiRes`` block for a stored pyramid."""
+    return {
+        'basePath': base_url,
+        'path': TILE_PATH,
+        'extension': TILE_EXTENSION,
+        'tileResolution': tile_resolution,
+        'maxLevel': max_level,
+        'cubeResolution': cube_resolution,
+    }
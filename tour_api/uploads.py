@@ -0,0 +1,167 @@
+"""
+Upload panorama bertahap (chunked & resumable).
+
+Client membuat ``UploadSession``, mengirim potongan berukuran tetap beserta
+SHA-256 masing-masing, lalu memanggil ``complete``. Potongan disimpan di
+default storage (``uploads/<session>/<index>.part``) sehingga upload bisa
+dilanjutkan dari instance server mana pun, dan dirakit dengan membaca potongan
+secara berurutan langsung ke storage tanpa menampung seluruh file di memori.
+
+Sesi yang tidak disentuh selama ``TOUR_UPLOAD_EXPIRY`` detik dihapus oleh
+``manage.py cleanup_uploads`` beserta potongannya, lalu blob yang tidak
+dipakai scene mana pun ikut dihapus.
+"""
+import hashlib
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from . import blobs
+from .metadata import read_header
+from .models import MediaBlob, UploadChunk, UploadSession
+
+
+class ChunkError(ValueError):
+    """Chunk rejected (bad index, size or checksum)."""
+
+
+def expiry_cutoff():
+    """Sessions idle since before this are abandoned."""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'TOUR_UPLOAD_EXPIRY', 24 * 3600))
+
+
+def part_name(session, index):
+    return f"uploads/{session.pk}/{index:05d}.part"
+
+
+def expected_chunk_size(session, index):
+    if index < 0 or index >= session.total_chunks:
+        raise ChunkError(f"Chunk index {index} di luar rentang 0-{session.total_chunks - 1}")
+    if index == session.total_chunks - 1:
+        return session.size - session.chunk_size * index
+    return session.chunk_size
+
+
+def store_chunk(session, index, data, checksum):
+    """Verify and store one chunk, replacing a previous attempt if any."""
+    expected = expected_chunk_size(session, index)
+    if len(data) != expected:
+        raise ChunkError(f"Ukuran chunk {index} harus {expected} bytes, diterima {len(data)}")
+    digest = hashlib.sha256(data).hexdigest()
+    if checksum and digest != checksum.lower():
+        raise ChunkError(f"Checksum chunk {index} tidak cocok")
+
+    name = part_name(session, index)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    default_storage.save(name, ContentFile(data))
+    UploadChunk.objects.update_or_create(
+        session=session, index=index, defaults={'sha256': digest, 'size': len(data)}
+    )
+    session.save(update_fields=['updated_at'])
+    return digest
+
+
+class ChunkReader(io.RawIOBase):
+    """Read the stored parts of a session back-to-back as one stream."""
+
+    def __init__(self, session):
+        self.names = [part_name(session, index) for index in range(session.total_chunks)]
+        self._position = 0
+        self._current = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset != 0 or whence != io.SEEK_SET:
+            raise io.UnsupportedOperation("ChunkReader can only rewind to the start")
+        self._close_current()
+        self._position = 0
+        return 0
+
+    def readinto(self, buffer):
+        while self._position < len(self.names):
+            if self._current is None:
+                self._current = default_storage.open(self.names[self._position], 'rb')
+            data = self._current.read(len(buffer))
+            if data:
+                buffer[:len(data)] = data
+                return len(data)
+            self._close_current()
+            self._position += 1
+        return 0
+
+    def _close_current(self):
+        if self._current is not None:
+            self._current.close()
+            self._current = None
+
+    def close(self):
+        self._close_current()
+        super().close()
+
+
+def complete(session):
+    """
+    Assemble all chunks into a content-addressed ``MediaBlob`` and remove the
+    parts. Returns the blob.
+    """
+    missing = session.missing_chunks()
+    if missing:
+        raise ChunkError(f"Chunk belum lengkap: {missing[:20]}")
+
+    reader = ChunkReader(session)
+    try:
+        digest, size = blobs.content_hash(reader)
+        if size != session.size:
+            raise ChunkError(f"Ukuran file {size} bytes, seharusnya {session.size}")
+        # Image headers live at the start of the file, the first chunk is enough
+        with default_storage.open(part_name(session, 0), 'rb') as first_chunk:
+            header = read_header(io.BytesIO(first_chunk.read()))
+        content = File(reader, name=session.filename)
+        content.size = size
+        # One transaction: an existing blob stays locked until the session
+        # points at it, so a queued purge sees the session (see blobs.purge)
+        with transaction.atomic():
+            blob = blobs.store(content, session.filename, digest=digest, size=size, header=header)
+            session.blob = blob
+            session.status = 'complete'
+            session.save(update_fields=['blob', 'status', 'updated_at'])
+            session.chunks.all().delete()
+    finally:
+        reader.close()
+
+    for index in range(session.total_chunks):
+        default_storage.delete(part_name(session, index))
+    return blob
+
+
+def expire_sessions(cutoff=None):
+    """
+    Delete sessions idle since ``cutoff`` (default ``expiry_cutoff()``) with
+    their stored parts, then purge the blobs nothing uses any more (theirs
+    and any other unreferenced blob older than ``cutoff``, e.g. from an
+    aborted import). Returns ``(sessions, blobs)`` removed.
+    """
+    cutoff = cutoff or expiry_cutoff()
+    blob_ids = set()
+    sessions = 0
+    for session in UploadSession.objects.filter(updated_at__lt=cutoff).iterator():
+        blobs.delete_tree(f"uploads/{session.pk}")
+        if session.blob_id:
+            blob_ids.add(session.blob_id)
+        session.delete()
+        sessions += 1
+    blob_ids.update(MediaBlob.objects.filter(ref_count=0, created_at__lt=cutoff).values_list('pk', flat=True))
+    purged = sum(1 for blob_id in sorted(blob_ids) if blobs.purge(blob_id))
+    return sessions, purged
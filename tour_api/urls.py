@@ -1,15 +1,18 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SceneViewSet, HotspotViewSet
+from .views import BundleView, ChangesView, SceneViewSet, HotspotViewSet, UploadViewSet
 
 # Create a router and register our viewsets
 router = DefaultRouter()
 router.register(r'scenes', SceneViewSet, basename='scene')
 router.register(r'hotspots', HotspotViewSet, basename='hotspot')
+router.register(r'uploads', UploadViewSet, basename='upload')
 
 app_name = 'tour_api'
 
 urlpatterns = [
+    path('bundle/', BundleView.as_view(), name='bundle'),
+    path('changes/', ChangesView.as_view(), name='changes'),
     path('', include(router.urls)),
 ]
 
@@ -18,13 +21,24 @@ urlpatterns = [
 # GET  /api/scenes/              -> List all scenes
 # GET  /api/scenes/{slug}/       -> Detail of specific scene
 # GET  /api/scenes/featured/     -> Get featured scene (first scene to load)
+# GET  /api/scenes/batch/?slugs= -> Details of several scenes (POST for long lists)
 # GET  /api/scenes/floors/       -> Get all floors with scene count
 # GET  /api/scenes/buildings/    -> Get all buildings with scene count
 # GET  /api/scenes/pannellum/    -> Get full Pannellum config
 #
+# GET  /api/bundle/              -> Hash/URL of the static full-tour bundle
+# GET  /api/changes/?since=      -> Scene/hotspot changes since a change token
+#
 # Hotspots (for admin):
 # GET    /api/hotspots/          -> List all hotspots
 # POST   /api/hotspots/          -> Create new hotspot
 # GET    /api/hotspots/{id}/     -> Get hotspot detail
 # PUT    /api/hotspots/{id}/     -> Update hotspot
 # DELETE /api/hotspots/{id}/     -> Delete hotspot
+# POST   /api/hotspots/bulk/     -> Create/update/delete many hotspots of one scene
+#
+# Chunked panorama upload (admin only):
+# POST   /api/uploads/                      -> Start upload session
+# GET    /api/uploads/{id}/                 -> Session status (received chunks)
+# PUT    /api/uploads/{id}/chunks/{index}/  -> Upload one chunk
+# POST   /api/uploads/{id}/complete/        -> Assemble file in storage
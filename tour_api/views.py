@@ -1,19 +1,36 @@
-from rest_framework import viewsets, status
+import json
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.views.decorators.http import require_safe
+from rest_framework import mixins, viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAdminUser
-from django.db.models import Count
+from rest_framework.views import APIView
+from django.db.models import Count, Prefetch
 from django.shortcuts import get_object_or_404
-from .models import Scene, Hotspot
+from .models import Scene, Hotspot, UploadSession
 from .serializers import (
     SceneListSerializer, 
     SceneDetailSerializer,
-    PannellumConfigSerializer,
-    HotspotSerializer
+    HotspotSerializer,
+    HotspotBulkSerializer,
+    UploadSessionSerializer,
+    requested_fields
 )
+from . import bundle, changelog, fastpath, snapshot, uploads
+from .cache import CachedReadMixin, request_key
+from .compression import choose_encoding
+from .conditional import ConditionalGetMixin, scene_validators
+from .pagination import TourCursorPagination, stream_chunk_size, stream_json_array, wants_stream
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
 
 
-class SceneViewSet(viewsets.ReadOnlyModelViewSet):
+class SceneViewSet(ConditionalGetMixin, CachedReadMixin, viewsets.ReadOnlyModelViewSet):
     """
     Enhanced API ViewSet untuk Virtual Tour Scenes dengan floor navigation
     
@@ -23,12 +40,67 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
     - GET /api/scenes/?building=...  : Filter by building name
     - GET /api/scenes/{slug}/        : Detail 1 scene
     - GET /api/scenes/featured/      : Get featured scene (starting point)
+    - GET /api/scenes/batch/?slugs=a,b : Detail beberapa scene sekaligus
+      (POST {"slugs": [...]} untuk daftar panjang)
     - GET /api/scenes/floors/        : Get list of floors with scene count
     - GET /api/scenes/buildings/     : Get list of buildings with scene count
     - GET /api/scenes/pannellum/     : Get full Pannellum config JSON
+    
+    List: ?page_size=/?cursor= untuk cursor pagination, ?stream=1 untuk
+    array JSON yang di-stream (default tetap array penuh).
+    
+    List, detail, featured & batch: ?fields=slug,title,thumbnail hanya mengirim
+    field tersebut, ?exclude=description membuang field, ?include=hotspots
+    menyertakan hotspot di list. Kolom & prefetch yang tidak diminta tidak
+    di-query. ?neighbors=1 (detail & featured) menambahkan data scene tujuan
+    hotspot navigasi + header ``Link: rel=preload`` untuk panoramanya.
+    
+    ?format=compact: format kolom dengan tabel string (lihat tour_api.compact).
+    ?format=msgpack / Accept: application/msgpack: MessagePack (bila terpasang).
+    
+    Semua endpoint read di-cache per tour version (lihat tour_api.cache) dan mendukung ETag/Last-Modified + 304 (lihat
+    tour_api.conditional).
     """
     queryset = Scene.objects.filter(is_active=True).select_related().prefetch_related('hotspots', 'hotspots__to_scene')
     lookup_field = 'slug'
+    pagination_class = TourCursorPagination
+    # Embedded in list items only with ?include=
+    list_expandable_fields = ['hotspots']
+    fieldset = None
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Parsed up front so unknown field names are a 400 on every action
+        if self.action == 'list':
+            self.fieldset = requested_fields(
+                request.query_params,
+                SceneListSerializer.Meta.fields,
+                self.list_expandable_fields,
+                self.resource_fields(),
+            )
+        elif self.action in ('retrieve', 'featured', 'batch'):
+            self.fieldset = requested_fields(
+                request.query_params,
+                SceneDetailSerializer.default_fields(),
+                SceneDetailSerializer.optional_fields,
+                self.resource_fields(),
+            )
+            if request.query_params.get('neighbors') in ('1', 'true'):
+                fieldset = self.fieldset or SceneDetailSerializer.default_fields()
+                self.fieldset = [name for name in fieldset if name != 'neighbors'] + ['neighbors']
+    
+    @staticmethod
+    def resource_fields():
+        """Every scene field name, in any representation (``?exclude=description`` is fine on the list)"""
+        return (
+            {field.name for field in Scene._meta.concrete_fields}
+            | set(SceneListSerializer.Meta.fields)
+            | set(SceneDetailSerializer.Meta.fields)
+        )
+    
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.fieldset)
+        return super().get_serializer(*args, **kwargs)
     
     def get_serializer_class(self):
         """Use different serializer for list vs detail"""
@@ -50,8 +122,64 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
         if building:
             queryset = queryset.filter(building=building)
         
+        if self.action == 'retrieve':
+            queryset = self.detail_queryset(queryset)
+        
         return queryset
     
+    def detail_queryset(self, queryset):
+        """Load only the columns and prefetches the requested detail fields need"""
+        if self.fieldset is None:
+            return queryset
+        queryset = queryset.only(*SceneDetailSerializer.columns_for(self.fieldset))
+        if 'hotspots' not in self.fieldset and 'neighbors' not in self.fieldset:
+            queryset = queryset.prefetch_related(None)
+        return queryset
+    
+    def get_validators(self, request):
+        if self.action == 'retrieve':
+            return scene_validators(self.kwargs.get(self.lookup_field))
+        return super().get_validators(request)
+    
+    def read_response(self, request, build):
+        """304 from the validators first, then the versioned response cache"""
+        return self.conditional_response(
+            request, lambda: self.preload_neighbors(self.cached_response(request, build))
+        )
+    
+    def preload_neighbors(self, response):
+        """``Link: rel=preload`` for the first neighbour panoramas of a detail response"""
+        neighbors = response.data.get('neighbors') if isinstance(response.data, dict) else None
+        limit = settings.TOUR_API_PRELOAD_NEIGHBORS
+        if response.status_code == status.HTTP_200_OK and neighbors and limit:
+            urls = dict.fromkeys(neighbor['panorama'] for neighbor in neighbors[:limit] if neighbor['panorama'])
+            links = [f'<{url}>; rel=preload; as=image' for url in urls]
+            if links:
+                response['Link'] = ', '.join(links)
+        return response
+    
+    def list(self, request, *args, **kwargs):
+        if wants_stream(request):
+            return self.conditional_response(request, lambda: self._stream(request))
+        return self.read_response(request, lambda: self._list(request))
+    
+    def _list(self, request):
+        # Same JSON as SceneListSerializer, built from .values() rows
+        rows = fastpath.scene_rows(self.filter_queryset(self.get_queryset()), self.fieldset)
+        media_url = fastpath.MediaURL(request)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(list(fastpath.scene_items(page, media_url, self.fieldset)))
+        return Response(list(fastpath.scene_items(rows, media_url, self.fieldset)))
+    
+    def _stream(self, request):
+        rows = fastpath.scene_rows(self.filter_queryset(self.get_queryset()), self.fieldset)
+        media_url = fastpath.MediaURL(request)
+        return stream_json_array(
+            fastpath.scene_items(rows.iterator(chunk_size=stream_chunk_size()), media_url, self.fieldset),
+            lambda item: item,
+        )
+    
     @action(detail=False, methods=['get'])
     def featured(self, request):
         """
@@ -59,11 +187,15 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
         
         GET /api/scenes/featured/
         """
-        scene = self.queryset.filter(is_featured=True).first()
+        return self.read_response(request, lambda: self._featured(request))
+    
+    def _featured(self, request):
+        queryset = self.detail_queryset(self.queryset)
+        scene = queryset.filter(is_featured=True).first()
         
         if not scene:
             # Fallback to first scene if no featured
-            scene = self.queryset.first()
+            scene = queryset.first()
         
         if not scene:
             return Response(
@@ -71,9 +203,65 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        serializer = SceneDetailSerializer(scene, context={'request': request})
+        serializer = SceneDetailSerializer(scene, context={'request': request}, fields=self.fieldset)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['get', 'post'])
+    def batch(self, request):
+        """
+        Detail beberapa scene dalam satu request (mis. preload scene tetangga)
+        
+        GET  /api/scenes/batch/?slugs=gedung-rektorat,lobby
+        POST /api/scenes/batch/  {"slugs": ["gedung-rektorat", "lobby"]}
+        
+        Response (urut slug, jadi cache sama untuk urutan apa pun):
+        {
+            "results": {"gedung-rektorat": {...detail...}},
+            "errors": {"lobby": "Scene not found: lobby"}
+        }
+        """
+        slugs = request.data.get('slugs', []) if request.method == 'POST' else request.query_params.get('slugs', '')
+        if isinstance(slugs, str):
+            slugs = slugs.split(',')
+        if not isinstance(slugs, list) or not all(isinstance(slug, str) for slug in slugs):
+            return Response(
+                {"detail": "slugs harus berupa daftar slug"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        slugs = sorted({slug.strip() for slug in slugs if slug.strip()})
+        if not slugs:
+            return Response(
+                {"detail": "Parameter slugs wajib diisi"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        max_slugs = settings.TOUR_API_BATCH_MAX_SLUGS
+        if len(slugs) > max_slugs:
+            return Response(
+                {"detail": f"Maksimal {max_slugs} slug per request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        key = request_key(request, 'batch', {'slugs': slugs})
+        return self.conditional_response(
+            request, lambda: self.cached_response(request, lambda: self._batch(request, slugs), key=key)
+        )
+    
+    def _batch(self, request, slugs):
+        # One query for the scenes, one for their hotspots joined to to_scene
+        queryset = Scene.objects.filter(is_active=True, slug__in=slugs).prefetch_related(
+            Prefetch('hotspots', queryset=Hotspot.objects.select_related('to_scene'))
+        )
+        scenes = {scene.slug: scene for scene in self.detail_queryset(queryset)}
+        serializer = SceneDetailSerializer(context={'request': request}, fields=self.fieldset)
+        return Response({
+            "results": {
+                slug: serializer.to_representation(scenes[slug]) for slug in slugs if slug in scenes
+            },
+            "errors": {
+                slug: f"Scene not found: {slug}" for slug in slugs if slug not in scenes
+            },
+        })
+    
     @action(detail=False, methods=['get'])
     def floors(self, request):
         """
@@ -88,6 +276,9 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
             {"floor": 2, "floor_description": "Laboratorium", "scene_count": 3}
         ]
         """
+        return self.read_response(request, lambda: self._floors(request))
+    
+    def _floors(self, request):
         building = request.query_params.get('building')
         
         queryset = Scene.objects.filter(is_active=True, floor__isnull=False)
@@ -113,6 +304,9 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
             {"building": "Gedung A", "scene_count": 10}
         ]
         """
+        return self.read_response(request, lambda: self._buildings(request))
+    
+    def _buildings(self, request):
         buildings = Scene.objects.filter(is_active=True).values('building').annotate(
             scene_count=Count('id')
         ).order_by('building')
@@ -138,12 +332,32 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
             }
         }
         """
-        scenes = self.queryset.prefetch_related('hotspots', 'hotspots__to_scene')
-        serializer = PannellumConfigSerializer(scenes)
-        return Response(serializer.data)
+        # The stored snapshot replaces the response cache here
+        return self.conditional_response(request, lambda: self._pannellum(request))
+    
+    def _pannellum(self, request):
+        stored = snapshot.get_snapshot(self.validators[0] if self.validators else None)
+        if request.accepted_renderer.format != 'json':
+            # Browsable API, compact format, MessagePack
+            return Response(json.loads(bytes(stored.content)))
+        
+        # Send the stored gzip bytes when gzip wins the negotiation; otherwise
+        # identity, which CompressionMiddleware compresses (Brotli included)
+        encoding = choose_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding == 'gzip' and stored.content_gzip is not None:
+            response = HttpResponse(bytes(stored.content_gzip), content_type='application/json')
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(bytes(stored.content), content_type='application/json')
+        response['Content-Length'] = str(len(response.content))
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
     
     def retrieve(self, request, *args, **kwargs):
         """Override retrieve to add helpful error messages"""
+        return self.read_response(request, lambda: self._retrieve(request, *args, **kwargs))
+    
+    def _retrieve(self, request, *args, **kwargs):
         try:
             return super().retrieve(request, *args, **kwargs)
         except Exception as e:
@@ -153,7 +367,7 @@ class SceneViewSet(viewsets.ReadOnlyModelViewSet):
             )
 
 
-class HotspotViewSet(viewsets.ModelViewSet):
+class HotspotViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """
     API ViewSet for Hotspot CRUD operations (for admin visual editor)
     
@@ -163,10 +377,16 @@ class HotspotViewSet(viewsets.ModelViewSet):
     - POST /api/hotspots/             : Create new hotspot
     - PUT /api/hotspots/{id}/         : Update hotspot
     - DELETE /api/hotspots/{id}/      : Delete hotspot
+    - POST /api/hotspots/bulk/        : Create/update/delete banyak hotspot satu scene
+    
+    List: ?page_size=/?cursor= untuk cursor pagination, ?stream=1 untuk
+    array JSON yang di-stream (default tetap array penuh).
+    GET mendukung ETag/Last-Modified + 304 (lihat tour_api.conditional).
     """
     queryset = Hotspot.objects.all().select_related('from_scene', 'to_scene')
     serializer_class = HotspotSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = TourCursorPagination
     
     def get_queryset(self):
         """Filter by from_scene if provided"""
@@ -178,6 +398,56 @@ class HotspotViewSet(viewsets.ModelViewSet):
         
         return queryset
     
+    def list(self, request, *args, **kwargs):
+        if wants_stream(request):
+            return self.conditional_response(request, lambda: self._stream(request))
+        return self.conditional_response(request, lambda: super(HotspotViewSet, self).list(request, *args, **kwargs))
+    
+    def _stream(self, request):
+        queryset = self.filter_queryset(self.get_queryset())
+        # One serializer reused for every row
+        serializer = self.get_serializer()
+        return stream_json_array(
+            queryset.iterator(chunk_size=stream_chunk_size()),
+            serializer.to_representation,
+        )
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(request, lambda: super(HotspotViewSet, self).retrieve(request, *args, **kwargs))
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Simpan perubahan banyak hotspot satu scene dalam satu transaksi
+        
+        POST /api/hotspots/bulk/
+        {
+            "from_scene": 12,
+            "operations": [
+                {"op": "create", "hotspot_type": "scene", "to_scene": 4, "text": "Ke Lobby", "pitch": 0, "yaw": 90},
+                {"op": "update", "id": 31, "yaw": 45.5},
+                {"op": "delete", "id": 32}
+            ]
+        }
+        
+        Semua operasi divalidasi dulu; bila ada yang gagal tidak ada yang
+        disimpan dan error dikirim per index operasi ("errors.operations").
+        Response: id hotspot baru (urut operasi create), id yang dihapus dan
+        seluruh hotspot scene setelah perubahan.
+        """
+        serializer = HotspotBulkSerializer(data=request.data, context=self.get_serializer_context())
+        serializer.is_valid(raise_exception=True)
+        result = serializer.save()
+        
+        scene = result['from_scene']
+        hotspots = Hotspot.objects.filter(from_scene=scene).select_related('to_scene')
+        return Response({
+            "from_scene": scene.pk,
+            "created": [hotspot.pk for hotspot in result['created']],
+            "deleted": result['deleted'],
+            "hotspots": HotspotSerializer(hotspots, many=True, context=self.get_serializer_context()).data,
+        })
+    
     def perform_create(self, serializer):
         """Create hotspot with validation"""
         serializer.save()
@@ -186,3 +456,195 @@ class HotspotViewSet(viewsets.ModelViewSet):
         """Update hotspot with validation"""
         serializer.save()
 
+
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet):
+    """
+    Chunked & resumable panorama upload (dipakai form Scene di admin)
+    
+    Endpoints:
+    - POST /api/uploads/                       : Buat sesi {filename, size}
+    - GET  /api/uploads/{id}/                  : Status + daftar chunk yang sudah diterima
+    - PUT  /api/uploads/{id}/chunks/{index}/   : Kirim 1 chunk (raw body, header X-Chunk-SHA256)
+    - POST /api/uploads/{id}/complete/         : Rakit file ke storage
+    """
+    queryset = UploadSession.objects.all()
+    serializer_class = UploadSessionSerializer
+    permission_classes = [IsAdminUser]
+    
+    def perform_create(self, serializer):
+        serializer.save(
+            chunk_size=settings.TOUR_UPLOAD_CHUNK_SIZE,
+            created_by=self.request.user
+        )
+    
+    @action(detail=True, methods=['put'], url_path=r'chunks/(?P<index>\d+)')
+    def chunk(self, request, pk=None, index=None):
+        """Receive one chunk; re-sending an index replaces it"""
+        session = self.get_object()
+        if session.status != 'uploading':
+            return Response(
+                {"detail": "Upload sudah selesai"},
+                status=status.HTTP_409_CONFLICT
+            )
+        
+        # Read the raw stream directly so the body is not parsed or size-capped
+        # by DATA_UPLOAD_MAX_MEMORY_SIZE
+        data = request.stream.read(session.chunk_size + 1) if request.stream else b''
+        try:
+            digest = uploads.store_chunk(
+                session, int(index), data, request.headers.get('X-Chunk-SHA256', '')
+            )
+        except uploads.ChunkError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({
+            "index": int(index),
+            "sha256": digest,
+            "received": len(session.received_chunks()),
+            "total_chunks": session.total_chunks,
+        })
+    
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """Assemble all chunks and store the panorama content-addressed"""
+        session = self.get_object()
+        if session.status == 'uploading':
+            try:
+                uploads.complete(session)
+            except uploads.ChunkError as e:
+                return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(self.get_serializer(session).data)
+
+
+class BundleView(APIView):
+    """
+    Hash bundle tour statis terbaru (tanpa query database)
+    
+    GET /api/bundle/
+    
+    Response:
+    {
+        "hash": "3f2a9c0d1b7e",
+        "url": "https://.../static/tour/tour.3f2a9c0d1b7e.json",
+        "size": 123456,
+        "built_at": "2026-01-01T00:00:00+07:00"
+    }
+    """
+    
+    def get(self, request):
+        pointer = bundle.current()
+        if pointer is None:
+            return Response(
+                {"detail": "Bundle belum dibuat"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        etag = f'"{pointer["hash"]}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response({
+                "hash": pointer['hash'],
+                "url": request.build_absolute_uri(urljoin(settings.STATIC_URL, pointer['path'])),
+                "size": pointer['size'],
+                "built_at": pointer['built_at'],
+            })
+        response['ETag'] = etag
+        patch_cache_control(response, no_cache=True)
+        return response
+
+
+class ChangesView(APIView):
+    """
+    Perubahan Scene & Hotspot sejak token tertentu (sinkronisasi offline)
+    
+    GET /api/changes/?since=120&limit=500
+    
+    Response:
+    {
+        "since": 120,
+        "next": 170,
+        "has_more": false,
+        "scenes": {"created": [...], "updated": [...], "deleted": [12]},
+        "hotspots": {"created": [...], "updated": [...], "deleted": [31, 32]}
+    }
+    
+    Request berikutnya memakai ?since=<next>; has_more=true berarti masih ada
+    halaman lagi. Scene memakai bentuk detail tanpa hotspots (hotspot dikirim
+    di bagian sendiri); scene nonaktif dikirim sebagai deleted. since=0
+    adalah sinkronisasi penuh. Token di atas log (mis. database di-reset)
+    dijawab 410: unduh ulang seluruh tour.
+    """
+    
+    def get(self, request):
+        max_limit = settings.TOUR_API_CHANGES_PAGE_SIZE
+        try:
+            since = int(request.query_params.get('since', 0))
+            limit = int(request.query_params.get('limit', max_limit))
+        except ValueError:
+            since = limit = -1
+        if since < 0 or limit < 1:
+            return Response(
+                {"detail": "since dan limit harus berupa angka (since >= 0, limit >= 1)"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        entries, has_more = changelog.entries_since(since, min(limit, max_limit))
+        if not entries and since > changelog.current_token(settled=False):
+            return Response(
+                {"detail": "Token perubahan tidak dikenal, unduh ulang seluruh tour"},
+                status=status.HTTP_410_GONE
+            )
+        
+        grouped = changelog.group(entries)
+        fields = [name for name in SceneDetailSerializer.default_fields() if name != 'hotspots']
+        scenes = Scene.objects.filter(is_active=True, pk__in=list(grouped['scene'])).only(
+            *SceneDetailSerializer.columns_for(fields)
+        )
+        scene_serializer = SceneDetailSerializer(context={'request': request}, fields=fields)
+        hotspots = Hotspot.objects.filter(pk__in=list(grouped['hotspot'])).select_related('to_scene')
+        hotspot_serializer = HotspotSerializer()
+        
+        return Response({
+            "since": since,
+            "next": entries[-1][0] if entries else since,
+            "has_more": has_more,
+            "scenes": changelog.partition(
+                grouped['scene'], {scene.pk: scene_serializer.to_representation(scene) for scene in scenes}
+            ),
+            "hotspots": changelog.partition(
+                grouped['hotspot'], {hotspot.pk: hotspot_serializer.to_representation(hotspot) for hotspot in hotspots}
+            ),
+        })
+
+
+@require_safe
+def bundle_file(request, name):
+    """
+    Serve a bundle built after the server started (WhiteNoise only knows the
+    files present at startup), pre-compressed when the client accepts it.
+    """
+    if not bundle.NAME_RE.match(name):
+        raise Http404
+    path = bundle.bundle_root() / name
+    siblings = {
+        encoding: path.with_name(name + suffix)
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz'))
+    }
+    encoding = choose_encoding(
+        request.headers.get('Accept-Encoding', ''),
+        available=[encoding for encoding, sibling in siblings.items() if sibling.exists()],
+    )
+    if encoding:
+        path = siblings[encoding]
+    try:
+        file = open(path, 'rb')
+    except FileNotFoundError:
+        raise Http404
+    
+    response = FileResponse(file, content_type='application/json', filename=name)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    response['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
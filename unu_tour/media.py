@@ -0,0 +1,159 @@
+"""
+Serve MEDIA_ROOT tanpa S3 (instalasi on-premise kampus).
+
+Mendukung HTTP Range (seek/resume panorama besar), ETag kuat + 304,
+Cache-Control panjang untuk file content-addressed, dan offload ke web server
+lewat X-Sendfile (Apache/lighttpd) atau X-Accel-Redirect (nginx).
+"""
+import mimetypes
+import os
+import re
+import stat
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_etags
+from django.views.decorators.http import require_safe
+
+RANGE_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+# Names derived from the file content (see tour_api.blobs) never change
+CONTENT_ADDRESSED_RE = re.compile(
+    r'^(?:panoramas/sha256/[0-9a-f]{2}/[0-9a-f]{2}/(?P<sha>[0-9a-f]{64})\.\w+'
+    # Derived media: source hash + output_version() (tour_api.imaging)
+    r'|(?:tiles|derivatives)/[0-9a-f]{64}-[0-9a-f]{12}/.+)$'
+)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def _etag(path, stats):
+    match = CONTENT_ADDRESSED_RE.match(path)
+    if match and match.group('sha'):
+        return f'"{match.group("sha")}"'
+    return f'"{stats.st_mtime_ns:x}-{stats.st_size:x}"'
+
+
+def _cache_control(path):
+    if CONTENT_ADDRESSED_RE.match(path):
+        return IMMUTABLE_CACHE_CONTROL
+    return f"public, max-age={getattr(settings, 'TOUR_MEDIA_MAX_AGE', 86400)}"
+
+
+def _parse_range(header, size):
+    """
+    ``(start, end)`` (inclusive) for a single ``bytes=`` range, ``None`` to
+    serve the whole file, or ``False`` if the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        # Multiple or malformed ranges: a full response is always allowed
+        return None
+    first, last = match.groups()
+    if first == '':
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(full_path, start, length):
+    with open(full_path, 'rb') as file:
+        file.seek(start)
+        while length > 0:
+            data = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def _offload(path, full_path):
+    """
+    Empty response telling the web server to send the file itself; it also
+    takes care of Range and Content-Length.
+    """
+    mode = getattr(settings, 'TOUR_MEDIA_SENDFILE', '')
+    response = HttpResponse()
+    if mode == 'x-accel-redirect':
+        prefix = getattr(settings, 'TOUR_MEDIA_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = quote(prefix.rstrip('/') + '/' + path)
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+@require_safe
+def serve_media(request, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404('File tidak ditemukan')
+    try:
+        stats = os.stat(full_path)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('File tidak ditemukan')
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404('File tidak ditemukan')
+
+    etag = _etag(path, stats)
+    last_modified = int(stats.st_mtime)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(last_modified),
+        'Cache-Control': _cache_control(path),
+        'Accept-Ranges': 'bytes',
+    }
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+
+    content_type, encoding = mimetypes.guess_type(full_path)
+    content_type = content_type or 'application/octet-stream'
+
+    if getattr(settings, 'TOUR_MEDIA_SENDFILE', ''):
+        response = _offload(path, full_path)
+        response['Content-Type'] = content_type
+    else:
+        byte_range = None
+        range_header = request.headers.get('Range')
+        if_range = request.headers.get('If-Range')
+        # If-Range: only honour the range if the client's copy is current
+        if range_header and (not if_range or etag in parse_etags(if_range)):
+            byte_range = _parse_range(range_header, stats.st_size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416, content_type=content_type)
+            response['Content-Range'] = f'bytes */{stats.st_size}'
+        elif byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            body = () if request.method == 'HEAD' else _read_range(full_path, start, length)
+            response = StreamingHttpResponse(body, status=206, content_type=content_type)
+            response['Content-Range'] = f'bytes {start}-{end}/{stats.st_size}'
+            response['Content-Length'] = str(length)
+        elif request.method == 'HEAD':
+            response = HttpResponse(content_type=content_type)
+            response['Content-Length'] = str(stats.st_size)
+        else:
+            # FileResponse streams via wsgi.file_wrapper (sendfile in gunicorn)
+            response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+            response['Content-Length'] = str(stats.st_size)
+
+    if encoding:
+        response['Content-Encoding'] = encoding
+    for name, value in headers.items():
+        response[name] = value
+    return response
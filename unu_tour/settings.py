@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+from importlib.util import find_spec
 from pathlib import Path
 from dotenv import load_dotenv
 import dj_database_url
@@ -66,6 +67,7 @@ MIDDLEWARE = [
     'unu_tour.middleware.DatabaseErrorMiddleware', # Top priority to catch DB errors
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise
+    'tour_api.compression.CompressionMiddleware',  # Brotli/gzip for /api/ JSON
     'corsheaders.middleware.CorsMiddleware',  # Must be before CommonMiddleware
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -126,6 +128,12 @@ if database_url and not USE_LOCAL_DB:
         conn_max_age=0, # Disable persistent connections for stability with Supabase Pooler
         conn_health_checks=False,
     )
+    # QuerySet.iterator() (?stream=1) uses server-side cursors, which do not
+    # survive the transaction-mode pooler (port 6543)
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = os.getenv(
+        'DB_DISABLE_SERVER_SIDE_CURSORS',
+        str(DATABASES['default'].get('PORT') == 6543),
+    ) == 'True'
     print(f"[DB] Using Supabase PostgreSQL")
 else:
     print(f"[DB] Using Local SQLite: {BASE_DIR / 'db.sqlite3'}")
@@ -169,6 +177,8 @@ STATIC_URL = os.getenv('STATIC_URL', '/static/')
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 # Enable WhiteNoise's compression and caching support
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+# Content-hashed names (manifest files and tour/tour.<hash>.json) are cached forever
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{12}\..+$'
 
 # Additional locations of static files
 STATICFILES_DIRS = [
@@ -219,13 +229,108 @@ if not USE_LOCAL_DB and AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY and AWS_STOR
     else:
         MEDIA_URL = f"{AWS_S3_ENDPOINT_URL}/storage/v1/object/public/{AWS_STORAGE_BUCKET_NAME}/"
 
+    TOUR_SERVE_LOCAL_MEDIA = False
     print(f"[STORAGE] Using Supabase S3 Storage. Public URL: {MEDIA_URL}")
 else:
     # Fallback to local storage (Development)
     MEDIA_URL = os.getenv('MEDIA_URL', '/media/')
     MEDIA_ROOT = BASE_DIR / 'media'
+    # Served by unu_tour.media (Range, ETag, immutable caching), also with
+    # DEBUG=False for on-premise installs, unless MEDIA_URL points elsewhere
+    TOUR_SERVE_LOCAL_MEDIA = MEDIA_URL.startswith('/')
     print(f"[STORAGE] Using Local Media: {BASE_DIR / 'media'}")
 
+# Offload file transfer to the web server: '' (Django streams the file),
+# 'x-sendfile' (Apache/lighttpd) or 'x-accel-redirect' (nginx, internal
+# location TOUR_MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT)
+TOUR_MEDIA_SENDFILE = os.getenv('TOUR_MEDIA_SENDFILE', '').lower()
+TOUR_MEDIA_ACCEL_PREFIX = os.getenv('TOUR_MEDIA_ACCEL_PREFIX', '/protected-media/')
+# Cache lifetime (seconds) for media that is not content-addressed
+TOUR_MEDIA_MAX_AGE = int(os.getenv('TOUR_MEDIA_MAX_AGE', '86400'))
+
+# API response cache (tour_api.cache). Keys carry the tour version stored in
+# the database (bumped once per committed Scene/Hotspot change; writes that
+# bypass signals must call mark_tour_changed()), so a change committed by any
+# process misses the old keys and the timeout only bounds memory. A shared backend
+# (Redis/Memcached/database) lets workers share the cached bodies.
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'locmem').lower()
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': 'redis://{}:{}/{}'.format(
+                os.getenv('REDIS_HOST', 'localhost'),
+                os.getenv('REDIS_PORT', '6379'),
+                os.getenv('REDIS_DB', '0'),
+            ),
+        }
+    }
+elif CACHE_BACKEND == 'dummy':
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'unu-tour',
+        }
+    }
+TOUR_API_CACHE_ENABLED = os.getenv('TOUR_API_CACHE_ENABLED', 'True') == 'True'
+TOUR_API_CACHE_TIMEOUT = int(os.getenv('TOUR_API_CACHE_TIMEOUT', '3600'))
+# Max seconds a request waits for another worker rebuilding the same key
+TOUR_API_CACHE_LOCK_WAIT = int(os.getenv('TOUR_API_CACHE_LOCK_WAIT', '5'))
+
+# Brotli/gzip for /api/ responses (compressed bodies cached per ETag)
+TOUR_API_COMPRESS_ENABLED = os.getenv('TOUR_API_COMPRESS_ENABLED', 'True') == 'True'
+TOUR_API_COMPRESS_MIN_SIZE = int(os.getenv('TOUR_API_COMPRESS_MIN_SIZE', '1024'))  # bytes
+TOUR_API_COMPRESS_GZIP_LEVEL = int(os.getenv('TOUR_API_COMPRESS_GZIP_LEVEL', '6'))
+TOUR_API_COMPRESS_BROTLI_QUALITY = int(os.getenv('TOUR_API_COMPRESS_BROTLI_QUALITY', '5'))
+
+# Opt-in cursor pagination (?page_size=/?cursor=) and ?stream=1 listings
+TOUR_API_PAGE_SIZE = int(os.getenv('TOUR_API_PAGE_SIZE', '100'))
+TOUR_API_MAX_PAGE_SIZE = int(os.getenv('TOUR_API_MAX_PAGE_SIZE', '1000'))
+TOUR_API_STREAM_CHUNK_SIZE = int(os.getenv('TOUR_API_STREAM_CHUNK_SIZE', '2000'))
+# Max slugs per /api/scenes/batch/ request
+TOUR_API_BATCH_MAX_SLUGS = int(os.getenv('TOUR_API_BATCH_MAX_SLUGS', '100'))
+# Max operations per /api/hotspots/bulk/ request
+TOUR_API_HOTSPOT_BULK_MAX_OPERATIONS = int(os.getenv('TOUR_API_HOTSPOT_BULK_MAX_OPERATIONS', '500'))
+# Change log entries per /api/changes/ page
+TOUR_API_CHANGES_PAGE_SIZE = int(os.getenv('TOUR_API_CHANGES_PAGE_SIZE', '500'))
+# Entries younger than this are held back so open transactions can commit first
+TOUR_API_CHANGES_SETTLE_SECONDS = int(os.getenv('TOUR_API_CHANGES_SETTLE_SECONDS', '5'))
+# Neighbour panoramas sent as Link: rel=preload with ?neighbors=1 (0 disables)
+TOUR_API_PRELOAD_NEIGHBORS = int(os.getenv('TOUR_API_PRELOAD_NEIGHBORS', '2'))
+
+# Static tour bundle (STATIC_ROOT/tour/, see tour_api.bundle). Content changes
+# queue a `build_bundle` media job that runs this many seconds later; skipped
+# (and logged) when STATIC_ROOT is read-only, e.g. on Vercel.
+TOUR_BUNDLE_AUTO_REBUILD = os.getenv('TOUR_BUNDLE_AUTO_REBUILD', 'True') == 'True'
+TOUR_BUNDLE_REBUILD_DELAY = int(os.getenv('TOUR_BUNDLE_REBUILD_DELAY', '30'))
+
+# Panorama processing
+# Tile size (px) for the multires cube-map pyramid served to Pannellum
+TOUR_TILE_SIZE = int(os.getenv('TOUR_TILE_SIZE', '512'))
+# Output formats for responsive thumbnail/panorama derivatives (webp, jpeg, avif)
+TOUR_DERIVATIVE_FORMATS = os.getenv('TOUR_DERIVATIVE_FORMATS', 'webp,jpeg').split(',')
+# Media jobs run in `manage.py run_media_worker`, a separate process sharing the
+# database and storage (Procfile `worker`, systemd, or cron with --once; see
+# README). Set TOUR_MEDIA_JOBS_EAGER=True to process inline on save instead
+# (local development, or hosts without background processes such as Vercel).
+TOUR_MEDIA_JOBS_EAGER = os.getenv('TOUR_MEDIA_JOBS_EAGER', 'False') == 'True'
+TOUR_MEDIA_WORKERS = int(os.getenv('TOUR_MEDIA_WORKERS', '0')) or None
+TOUR_MEDIA_RETRY_BASE = int(os.getenv('TOUR_MEDIA_RETRY_BASE', '30'))  # seconds
+TOUR_MEDIA_RETRY_MAX = int(os.getenv('TOUR_MEDIA_RETRY_MAX', '3600'))
+# Memory ceiling (bytes) for decoded image data per media job. Large JPEGs are
+# decoded at 1/2, 1/4 or 1/8 scale to fit; other formats have no partial
+# decode (strip/tile decoding is out of scope), so they must fit at full size
+# (~limit / 10 pixels) and larger ones are refused from the header at upload.
+TOUR_MEDIA_MEMORY_LIMIT = int(os.getenv('TOUR_MEDIA_MEMORY_LIMIT', str(768 * 1024 * 1024)))
+# Chunked panorama uploads (chunk must stay below the proxy body limit, ~4.5 MB on Vercel)
+TOUR_UPLOAD_CHUNK_SIZE = int(os.getenv('TOUR_UPLOAD_CHUNK_SIZE', str(4 * 1024 * 1024)))
+TOUR_UPLOAD_MAX_SIZE = int(os.getenv('TOUR_UPLOAD_MAX_SIZE', str(500 * 1024 * 1024)))
+# Upload sessions idle this long (seconds) are abandoned: `manage.py
+# cleanup_uploads` deletes them, their parts and blobs no scene uses
+TOUR_UPLOAD_EXPIRY = int(os.getenv('TOUR_UPLOAD_EXPIRY', str(24 * 3600)))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -275,6 +380,18 @@ REST_FRAMEWORK = {
     ],
     # Disable pagination for simpler frontend
     'DEFAULT_PAGINATION_CLASS': None,
+    # Same JSON as DRF's JSONRenderer, encoded with orjson when installed;
+    # ?format=compact selects the columnar format (docs/API_COMPACT_FORMAT.md)
+    'DEFAULT_RENDERER_CLASSES': [
+        'tour_api.renderers.TourJSONRenderer',
+        'tour_api.renderers.CompactJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     # Throttling
     'DEFAULT_THROTTLE_CLASSES': [
         'rest_framework.throttling.AnonRateThrottle',
@@ -285,6 +402,12 @@ REST_FRAMEWORK = {
     'EXCEPTION_HANDLER': 'tour_api.exceptions.custom_exception_handler',
 }
 
+# MessagePack responses (Accept: application/msgpack or ?format=msgpack) and
+# request bodies, only when the msgpack package is installed
+if find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(-1, 'tour_api.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('tour_api.parsers.MessagePackParser')
+
 # Security Settings (Production)
 # Security Settings (Production)
 if not DEBUG:
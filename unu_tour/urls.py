@@ -14,11 +14,16 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import RedirectView
 from tour_api.admin_site import admin_site
+from tour_api.bundle import BUNDLE_DIR
+from tour_api.views import bundle_file
+from unu_tour.media import serve_media
 
 urlpatterns = [
     path('', RedirectView.as_view(url='/admin/', permanent=False)),  # Redirect root to admin
@@ -26,7 +31,18 @@ urlpatterns = [
     path('api/', include('tour_api.urls')),
 ]
 
-# Serve media files in development
+# Local media (no S3): Range/ETag aware view, in production too
+if settings.TOUR_SERVE_LOCAL_MEDIA:
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.+)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
+
+# Tour bundles rebuilt after startup are not in WhiteNoise's file list yet
+if settings.STATIC_URL.startswith('/'):
+    urlpatterns += [
+        re_path(r'^%s%s/(?P<name>[^/]+)$' % (re.escape(settings.STATIC_URL.lstrip('/')), BUNDLE_DIR), bundle_file),
+    ]
+
+# Serve static files in development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)